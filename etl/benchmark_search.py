@@ -0,0 +1,117 @@
+"""
+Сравнение профилей полнотекстового поиска по задержке и доле запросов с результатом.
+Запросы собираются из дампов etl/dumps, индексы должны быть загружены etl/pipeline.py.
+
+    python3 etl/benchmark_search.py --queries 200 --runs 3
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Callable, Type
+
+from elasticsearch import AsyncElasticsearch
+
+from etl.pipeline import ENTITY_MAPPER, get_file_data
+from src.core.config import settings
+from src.models.film import FilmSearchParams
+from src.models.person import PersonSearchParams
+from src.repositories.elastic import BaseElasticRepository
+from src.repositories.film.elastic import ElasticFilmRepository
+from src.repositories.person.elastic import ElasticPersonRepository
+from src.repositories.search_profiles import FILM_SEARCH_PROFILES, PERSON_SEARCH_PROFILES
+
+
+def make_typo(text: str, rng: random.Random) -> str:
+    """ Переставляет две соседние буквы в самом длинном слове строки """
+
+    words = text.split()
+    longest = max(range(len(words)), key=lambda i: len(words[i]))
+    word = words[longest]
+    if len(word) > 3:
+        i = rng.randrange(1, len(word) - 2)
+        words[longest] = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return ' '.join(words)
+
+
+def get_film_queries(count: int, rng: random.Random) -> list[str]:
+    """ Названия целиком, первое слово названия, названия с опечаткой, имена актёров и начало описания """
+
+    movies = get_file_data(ENTITY_MAPPER['movies']['dump'])
+    queries = []
+    for movie in rng.sample(movies, min(count, len(movies))):
+        title = movie['title']
+        queries.extend([title, title.split()[0], make_typo(title, rng)])
+        if movie['actors_names']:
+            queries.append(rng.choice(movie['actors_names']))
+        if movie['description']:
+            queries.append(' '.join(movie['description'].split()[:3]))
+    return queries
+
+
+def get_person_queries(count: int, rng: random.Random) -> list[str]:
+    """ Имена целиком, фамилии и имена с опечаткой """
+
+    persons = get_file_data(ENTITY_MAPPER['persons']['dump'])
+    queries = []
+    for person in rng.sample(persons, min(count, len(persons))):
+        name = person['name']
+        queries.extend([name, name.split()[-1], make_typo(name, rng)])
+    return queries
+
+
+async def measure(search: Callable, queries: list[str], runs: int) -> tuple[list[float], float]:
+    """ Задержки всех запросов в миллисекундах и доля запросов, нашедших хотя бы одну запись """
+
+    latencies, found = [], 0
+    for query in queries:
+        for run in range(runs):
+            started = time.perf_counter()
+            page = await search(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if run == 0 and page:
+                found += 1
+    return latencies, found / len(queries)
+
+
+async def benchmark(name: str, repository: BaseElasticRepository, params_class: Type, queries: list[str], args) -> str:
+    async def search(query: str):
+        return await repository.search(params_class(limit=args.page_size, offset=0, query=query))
+
+    # Прогон без замера: прогревает кэши Elasticsearch и соединения клиента
+    await measure(search, queries[:20], 1)
+    latencies, hit_rate = await measure(search, queries, args.runs)
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return (
+        f'{name:<24}{statistics.mean(latencies):>8.2f}{percentiles[49]:>8.2f}'
+        f'{percentiles[94]:>8.2f}{percentiles[98]:>8.2f}{hit_rate:>8.0%}'
+    )
+
+
+async def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    film_queries = get_film_queries(args.queries, rng)
+    person_queries = get_person_queries(args.queries, rng)
+
+    client = AsyncElasticsearch(hosts=[settings.elastic.url])
+    try:
+        print(f'{"profile":<24}{"mean":>8}{"p50":>8}{"p95":>8}{"p99":>8}{"found":>8}  (ms)')
+        for name, profile in FILM_SEARCH_PROFILES.items():
+            repository = ElasticFilmRepository(client, search_profile=profile)
+            print(await benchmark(f'films/{name}', repository, FilmSearchParams, film_queries, args))
+        for name, profile in PERSON_SEARCH_PROFILES.items():
+            repository = ElasticPersonRepository(client, search_profile=profile)
+            print(await benchmark(f'persons/{name}', repository, PersonSearchParams, person_queries, args))
+    finally:
+        await client.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сравнение профилей поиска по задержке')
+    parser.add_argument('--queries', type=int, default=200, help='Количество документов, из которых строятся запросы')
+    parser.add_argument('--runs', type=int, default=3, help='Повторы каждого запроса')
+    parser.add_argument('--page-size', type=int, default=12, help='Размер страницы выдачи')
+    parser.add_argument('--seed', type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
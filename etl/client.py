@@ -1,27 +1,74 @@
 import logging
+import time
 
-from elasticsearch import AsyncElasticsearch
+from elasticsearch import AsyncElasticsearch, BadRequestError
 from elasticsearch.helpers import async_bulk
 
+from src.cache.managers.redis import RedisCacheManager
+from src.constants.elastic import ElasticIndexNames
+
 logger = logging.getLogger(__name__)
 
 
 class ElasticLoader:
     """ Класс для добавления данных в Elastic """
 
-    def __init__(self, es: AsyncElasticsearch, batch_size: int = 100):
+    def __init__(self, es: AsyncElasticsearch, batch_size: int = 100, cache: RedisCacheManager | None = None):
         self._es = es
         self.batch_size = batch_size
+        self._cache = cache
 
     async def create_index(self, name: str, schema: dict):
-        """ Функция создания индекса, если его еще не было """
+        """
+        Создаёт индекс или обновляет схему существующего.
+        Индекс создаётся с версией в имени и доступен по алиасу name, чтобы схему можно было сменить без простоя.
+        """
+
+        if not await self._es.indices.exists(index=name):
+            index = self.get_versioned_name(name)
+            await self._es.indices.create(index=index, body={**schema, 'aliases': {name: {}}})
+            logger.info(f'Создан индекс {index} с алиасом {name}')
+            return None
 
-        if await self._es.indices.exists(index=name):
-            logger.info(f'Индекс {name} уже существует')
+        # Новые поля схемы добавляются в существующий индекс, иначе строгий маппинг отклонит документы
+        try:
+            await self._es.indices.put_mapping(index=name, body=schema['mappings'])
+        except BadRequestError as e:
+            # Новые анализаторы и изменения полей в открытый индекс не добавить - переносим данные в новый
+            logger.info(f'Маппинг индекса {name} не обновляется на месте, индекс пересоздаётся: {e}')
+            await self.migrate_index(name, schema)
             return None
+        logger.info(f'Индекс {name} уже существует, маппинг обновлён')
+
+    async def migrate_index(self, name: str, schema: dict):
+        """
+        Переносит документы в новый индекс с текущей схемой и атомарно переключает на него алиас name.
+        Старый индекс удаляется тем же запросом; индекс без алиаса, созданный прежними версиями ETL, заменяется алиасом.
+        Ошибка переноса не подавляется: загружать данные в индекс со старой схемой нельзя.
+        """
+
+        index = self.get_versioned_name(name)
+        await self._es.indices.create(index=index, body=schema)
+        response = await self._es.reindex(
+            source={'index': name},
+            dest={'index': index},
+            refresh=True,
+            wait_for_completion=True,
+        )
+        if response.get('failures'):
+            await self._es.indices.delete(index=index)
+            raise RuntimeError(f'Не удалось перенести документы индекса {name} в {index}: {response["failures"][:3]}')
 
-        await self._es.indices.create(index=name, body=schema)
-        logger.info(f'Создан индекс {name}')
+        old_indexes = list(await self._es.indices.get(index=name))
+        await self._es.indices.update_aliases(actions=[
+            {'add': {'index': index, 'alias': name}},
+            *({'remove_index': {'index': old_index}} for old_index in old_indexes),
+        ])
+        logger.info(f'Индекс {name} пересоздан как {index}: перенесено документов {response.get("total", 0)}')
+
+    @staticmethod
+    def get_versioned_name(name: str) -> str:
+        return f'{name}_{time.time_ns()}'
 
     async def load_data(self, index_name: str, data: list[dict]):
         """ Загружает данные в Elasticsearch пачками """
@@ -31,6 +78,19 @@ class ElasticLoader:
 
         logger.info(f'Записал {success} строк в индекс {index_name}')
 
+    async def invalidate_cache(self, index_name: str, data: list[dict]):
+        """
+        Удаляет из кэша записи, зависящие от индекса и загруженных документов.
+        Вызывается после refresh индекса: иначе запрос между инвалидацией и refresh
+        снова положит в кэш старые данные.
+        """
+
+        if self._cache is None:
+            return
+
+        deleted = await self._cache.invalidate(ElasticIndexNames(index_name), [item['id'] for item in data])
+        logger.info(f'Удалил {deleted} ключей кэша по индексу {index_name}')
+
     @staticmethod
     def generate_actions(index_name: str, items: list[dict]):
         for item in items:
@@ -1,11 +1,19 @@
 import asyncio
 import json
 import os
+from collections import defaultdict
 
 from elasticsearch import AsyncElasticsearch
 
 from etl.client import ElasticLoader
+from src.cache.cache_manager import get_redis_cache_manager
+from src.cache.warmup import warm_up_cache
+from src.constants.elastic import ElasticIndexNames
 from src.core.config import settings
+from src.db.redis import create_redis
+from src.repositories.film.columns import publish_film_columns
+from src.repositories.genre.rankings import GenreRankings
+from src.repositories.queries import PERSON_ROLES
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -30,6 +38,29 @@ def get_file_data(filepath: str):
         return json.load(file)
 
 
+def build_filmographies(movies: list[dict]) -> dict[str, list[dict]]:
+    """ Фильмография каждой персоны: фильмы с рейтингом и ролями персоны в них """
+
+    filmographies = defaultdict(dict)
+    for movie in movies:
+        for role in PERSON_ROLES:
+            for person in movie.get(role) or []:
+                film = filmographies[person['id']].setdefault(movie['id'], {
+                    'id': movie['id'],
+                    'title': movie['title'],
+                    'imdb_rating': movie['imdb_rating'],
+                    'roles': [],
+                })
+                film['roles'].append(role)
+
+    return {person_id: list(films.values()) for person_id, films in filmographies.items()}
+
+
+def add_filmographies(persons: list[dict], movies: list[dict]) -> list[dict]:
+    filmographies = build_filmographies(movies)
+    return [{**person, 'films': filmographies.get(person['id'], [])} for person in persons]
+
+
 async def process_data(loader: ElasticLoader, index_name: str, schema: dict, items: list[dict]):
     await loader.create_index(index_name, schema)
     await loader.load_data(index_name, items)
@@ -37,15 +68,41 @@ async def process_data(loader: ElasticLoader, index_name: str, schema: dict, ite
 
 async def main():
     client = AsyncElasticsearch(hosts=[settings.elastic.url])
+    cache_manager = get_redis_cache_manager()
+    cache_manager.redis = create_redis()
+    loader = ElasticLoader(client, cache=cache_manager)
 
-    for index_name, entity in ENTITY_MAPPER.items():
-        items: list[dict] = get_file_data(entity['dump'])
-        schema: dict = get_file_data(entity['schema'])
-        try:
-            loader = ElasticLoader(client)
+    try:
+        movies: list[dict] = []
+        loaded: dict[str, list[dict]] = {}
+        for index_name, entity in ENTITY_MAPPER.items():
+            items: list[dict] = get_file_data(entity['dump'])
+            schema: dict = get_file_data(entity['schema'])
+            # Фильмы загружаются первыми, по ним персонам собирается фильмография
+            if index_name == 'movies':
+                movies = items
+            elif index_name == 'persons':
+                items = add_filmographies(items, movies)
             await process_data(loader, index_name, schema, items)
-        finally:
-            await client.close()
+            loaded[index_name] = items
+
+        # Загруженные документы становятся видны поиску после refresh, кэш сбрасываем только после него
+        await client.indices.refresh()
+        for index_name, items in loaded.items():
+            await loader.invalidate_cache(index_name, items)
+        # Приложения с колонками фильмов в памяти перестроят их при следующей проверке версии
+        await publish_film_columns(cache_manager.redis)
+
+        if settings.rankings.enabled:
+            await GenreRankings(cache_manager.redis).materialize(client)
+            # Страницы фильмов по жанрам могли попасть в кэш до построения рейтингов
+            await cache_manager.invalidate(ElasticIndexNames.MOVIE)
+
+        if settings.warmup.after_etl and settings.warmup.api_url:
+            await warm_up_cache(settings.warmup.api_url, cache_manager.redis)
+    finally:
+        await client.close()
+        await cache_manager.redis.aclose()
 
 
 if __name__ == '__main__':
@@ -1,12 +1,15 @@
 from http import HTTPStatus
 from typing import Annotated, List
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Path
+from fastapi import APIRouter, Depends, HTTPException, Request, Path, Response
 
-from src.dependencies.film import get_film_service, get_film_list_params, get_film_search_params
-from src.models.film import Film, FilmQueryParams
+from src.dependencies.base import get_autocomplete_params, get_batch_ids
+from src.dependencies.film import get_film_facet_params, get_film_service, get_film_list_params, get_film_search_params
+from src.models.base import AutocompleteParams
+from src.models.film import Film, FilmFacetParams, FilmFacets, FilmQueryParams, FilmSuggestion
 from src.services.film import FilmService
 from src.cache.cache_manager import get_redis_cache_manager
+from src.constants.elastic import ElasticIndexNames
 
 router = APIRouter()
 cache_manager = get_redis_cache_manager()
@@ -16,7 +19,14 @@ cache_manager = get_redis_cache_manager()
     '',
     summary='Список фильмов',
 )
-@cache_manager.cache(Film, 'films_all')
+@cache_manager.cache(
+    Film,
+    'films_all',
+    soft_expire=60 * 4,
+    jitter=0.1,
+    early_refresh_beta=1.0,
+    indexes=[ElasticIndexNames.MOVIE],
+)
 async def film_list(
         request: Request,
         film_service: Annotated[FilmService, Depends(get_film_service)],
@@ -38,7 +48,7 @@ async def film_list(
     '/search',
     summary='Поиск по фильмам',
 )
-@cache_manager.cache(Film, 'films_search')
+@cache_manager.cache(Film, 'films_search', indexes=[ElasticIndexNames.MOVIE])
 async def film_search(
         request: Request,
         film_service: Annotated[FilmService, Depends(get_film_service)],
@@ -55,12 +65,104 @@ async def film_search(
     return await film_service.search(params)
 
 
+@router.get(
+    '/facets',
+    response_model=FilmFacets,
+    summary='Фасеты фильмов',
+)
+@cache_manager.cache(
+    FilmFacets,
+    'films_facets',
+    soft_expire=60 * 4,
+    jitter=0.1,
+    early_refresh_beta=1.0,
+    indexes=[ElasticIndexNames.MOVIE],
+)
+async def film_facets(
+        request: Request,
+        film_service: Annotated[FilmService, Depends(get_film_service)],
+        params: Annotated[FilmFacetParams, Depends(get_film_facet_params)],
+) -> FilmFacets:
+    """
+    Получает количество фильмов по жанрам и гистограмму рейтинга imdb с шагом 1 с теми же фильтрами, что и список фильмов
+    \f
+    :param request: объект запроса FastAPI.
+    :param film_service: сервис для работы с базой фильмов.
+    :param params: query-параметры фильтрации (genre).
+    :return: объект типа FilmFacets.
+    """
+
+    return await film_service.get_facets(params)
+
+
+@router.get(
+    '/autocomplete',
+    response_model=List[FilmSuggestion],
+    summary='Подсказки по названию фильма',
+)
+@cache_manager.cache(
+    FilmSuggestion,
+    'films_autocomplete',
+    soft_expire=60 * 4,
+    jitter=0.1,
+    early_refresh_beta=1.0,
+    indexes=[ElasticIndexNames.MOVIE],
+)
+async def film_autocomplete(
+        request: Request,
+        film_service: Annotated[FilmService, Depends(get_film_service)],
+        params: Annotated[AutocompleteParams, Depends(get_autocomplete_params)],
+) -> List[FilmSuggestion]:
+    """
+    Получает подсказки для ввода названия фильма: фильмы, слова названия которых начинаются со слов префикса
+    \f
+    :param request: объект запроса FastAPI.
+    :param film_service: сервис для работы с базой фильмов.
+    :param params: query-параметры подсказок (prefix, page_size).
+    :return: список объектов типа FilmSuggestion.
+    """
+
+    return await film_service.autocomplete(params)
+
+
+@router.get(
+    '/batch',
+    response_model=List[Film],
+    summary='Данные по нескольким фильмам',
+)
+async def film_batch(
+        request: Request,
+        film_service: Annotated[FilmService, Depends(get_film_service)],
+        ids: Annotated[list[str], Depends(get_batch_ids)],
+) -> Response:
+    """
+    Получает информацию о нескольких фильмах по списку id.
+    Фильмы отдаются в порядке id, отсутствующие пропускаются
+    \f
+    :param request: объект запроса FastAPI.
+    :param film_service: сервис для работы с базой фильмов.
+    :param ids: query-параметр со списком идентификаторов фильмов.
+    :return: список объектов типа Film.
+    """
+
+    return await cache_manager.cache_many(
+        request,
+        Film,
+        'film',
+        'film_id',
+        ids,
+        film_service.get_many,
+        index=ElasticIndexNames.MOVIE,
+        not_found_detail='Film not found',
+    )
+
+
 @router.get(
     '/{film_id}',
     response_model=Film,
     summary='Данные по фильму',
 )
-@cache_manager.cache(Film, 'film')
+@cache_manager.cache(Film, 'film', entities={'film_id': ElasticIndexNames.MOVIE})
 async def film_details(
         request: Request,
         film_service: Annotated[FilmService, Depends(get_film_service)],
@@ -10,6 +10,7 @@ from src.models.base import BasePaginationParams
 from src.models.genre import Genre, Film
 from src.services.genre import GenreService
 from src.cache.cache_manager import get_redis_cache_manager
+from src.constants.elastic import ElasticIndexNames
 
 router = APIRouter()
 cache_manager = get_redis_cache_manager()
@@ -20,7 +21,14 @@ cache_manager = get_redis_cache_manager()
     summary='Список жанров',
     response_model=List[Genre],
 )
-@cache_manager.cache(Genre, 'genres_all')
+@cache_manager.cache(
+    Genre,
+    'genres_all',
+    soft_expire=60 * 4,
+    jitter=0.1,
+    early_refresh_beta=1.0,
+    indexes=[ElasticIndexNames.GENRE],
+)
 async def genre_list(
         request: Request,
         genre_service: Annotated[GenreService, Depends(get_genre_service)],
@@ -43,7 +51,7 @@ async def genre_list(
     response_model=Genre,
     summary='Данные по жанру',
 )
-@cache_manager.cache(Genre, 'genre')
+@cache_manager.cache(Genre, 'genre', entities={'genre_id': ElasticIndexNames.GENRE})
 async def genre_details(
         request: Request,
         genre_service: Annotated[GenreService, Depends(get_genre_service)],
@@ -72,7 +80,12 @@ async def genre_details(
     response_model=List[Film],
     summary='Популярные фильмы в жанре',
 )
-@cache_manager.cache(Film, 'films_by_genre')
+@cache_manager.cache(
+    Film,
+    'films_by_genre',
+    indexes=[ElasticIndexNames.MOVIE],
+    entities={'genre_id': ElasticIndexNames.GENRE},
+)
 async def genre_films(
         request: Request,
         genre_service: Annotated[GenreService, Depends(get_genre_service)],
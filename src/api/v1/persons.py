@@ -1,15 +1,16 @@
 from http import HTTPStatus
 from typing import Annotated, List
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Path
+from fastapi import APIRouter, Depends, HTTPException, Request, Path, Response
 
-from src.dependencies.base import get_pagination_params
+from src.dependencies.base import get_autocomplete_params, get_batch_ids, get_pagination_params
 from src.dependencies.person import get_person_service, get_person_search_params
 from src.exceptions.person import PersonNotFound
-from src.models.base import BasePaginationParams
+from src.models.base import AutocompleteParams, BasePaginationParams
 from src.models.person import PersonSearchParams, Person, Film
 from src.services.person import PersonService
 from src.cache.cache_manager import get_redis_cache_manager
+from src.constants.elastic import ElasticIndexNames
 
 router = APIRouter()
 cache_manager = get_redis_cache_manager()
@@ -20,7 +21,7 @@ cache_manager = get_redis_cache_manager()
     summary='Список персон',
     response_model=List[Person],
 )
-@cache_manager.cache(Person, 'person_all')
+@cache_manager.cache(Person, 'person_all', indexes=[ElasticIndexNames.PERSON])
 async def person_list(
         request: Request,
         person_service: Annotated[PersonService, Depends(get_person_service)],
@@ -43,7 +44,7 @@ async def person_list(
     summary='Поиск персон',
     response_model=List[Person],
 )
-@cache_manager.cache(Person, 'person_search')
+@cache_manager.cache(Person, 'person_search', indexes=[ElasticIndexNames.PERSON])
 async def person_search(
         request: Request,
         person_service: Annotated[PersonService, Depends(get_person_service)],
@@ -61,12 +62,74 @@ async def person_search(
     return await person_service.search(params)
 
 
+@router.get(
+    '/autocomplete',
+    response_model=List[Person],
+    summary='Подсказки по имени персоны',
+)
+@cache_manager.cache(
+    Person,
+    'person_autocomplete',
+    soft_expire=60 * 4,
+    jitter=0.1,
+    early_refresh_beta=1.0,
+    indexes=[ElasticIndexNames.PERSON],
+)
+async def person_autocomplete(
+        request: Request,
+        person_service: Annotated[PersonService, Depends(get_person_service)],
+        params: Annotated[AutocompleteParams, Depends(get_autocomplete_params)],
+) -> List[Person]:
+    """
+    Получает подсказки для ввода имени персоны: персоны, слова имени которых начинаются со слов префикса
+    \f
+    :param request: объект запроса FastAPI.
+    :param person_service: сервис для работы с базой персон.
+    :param params: query-параметры подсказок (prefix, page_size).
+    :return: список объектов типа Person.
+    """
+
+    return await person_service.autocomplete(params)
+
+
+@router.get(
+    '/batch',
+    response_model=List[Person],
+    summary='Данные о нескольких персонах',
+)
+async def person_batch(
+        request: Request,
+        person_service: Annotated[PersonService, Depends(get_person_service)],
+        ids: Annotated[list[str], Depends(get_batch_ids)],
+) -> Response:
+    """
+    Получает информацию о нескольких персонах по списку id.
+    Персоны отдаются в порядке id, отсутствующие пропускаются
+    \f
+    :param request: объект запроса FastAPI.
+    :param person_service: сервис для работы с базой персон.
+    :param ids: query-параметр со списком идентификаторов персон.
+    :return: список объектов типа Person.
+    """
+
+    return await cache_manager.cache_many(
+        request,
+        Person,
+        'person',
+        'person_id',
+        ids,
+        person_service.get_many,
+        index=ElasticIndexNames.PERSON,
+        not_found_detail='Person not found',
+    )
+
+
 @router.get(
     '/{person_id}',
     response_model=Person,
     summary='Данные о персоне',
 )
-@cache_manager.cache(Person, 'person')
+@cache_manager.cache(Person, 'person', entities={'person_id': ElasticIndexNames.PERSON})
 async def person_details(
         request: Request,
         person_service: Annotated[PersonService, Depends(get_person_service)],
@@ -95,7 +158,12 @@ async def person_details(
     response_model=List[Film],
     summary='Фильмы по персоне',
 )
-@cache_manager.cache(Film, 'films_by_person')
+@cache_manager.cache(
+    Film,
+    'films_by_person',
+    indexes=[ElasticIndexNames.MOVIE],
+    entities={'person_id': ElasticIndexNames.PERSON},
+)
 async def person_films(
         request: Request,
         person_service: Annotated[PersonService, Depends(get_person_service)],
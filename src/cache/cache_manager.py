@@ -1,12 +1,62 @@
-from redis.asyncio import Redis
+from functools import lru_cache
 
+from src.cache.managers.memory import LRUCache
 from src.cache.managers.redis import RedisCacheManager
+from src.cache.managers.tiered import TieredCacheManager
+from src.cache.serializers.base import BaseSerializer
+from src.cache.serializers.compressed import CODECS, CompressedSerializer
+from src.cache.serializers.format import FormatSerializer
 from src.cache.serializers.json import JsonSerializer
+from src.cache.serializers.msgpack import MsgpackSerializer
+from src.cache.serializers.orjson import OrjsonSerializer
+from src.cache.serializers.response import ResponseSerializer
 from src.core.config import settings
 
+SERIALIZERS: dict[str, type[BaseSerializer]] = {
+    'response': ResponseSerializer,
+    'orjson': OrjsonSerializer,
+    'msgpack': MsgpackSerializer,
+    'json': JsonSerializer,
+}
 
+
+def get_serializer() -> BaseSerializer:
+    """ Собирает сериализатор кэша по настройкам: формат записи и сжатие """
+
+    writer = SERIALIZERS[settings.cache.serializer]()
+    readers = [serializer_class() for serializer_class in SERIALIZERS.values()]
+    serializer = FormatSerializer(writer, readers=readers, fallback=JsonSerializer())
+
+    codec = CODECS[settings.cache.compression]() if settings.cache.compression else None
+    return CompressedSerializer(serializer, codec=codec, threshold=settings.cache.compression_threshold)
+
+
+@lru_cache()
 def get_redis_cache_manager():
-    redis = Redis(host=settings.redis.host, port=settings.redis.port)
-    serializer = JsonSerializer()
-    cache_manager = RedisCacheManager(redis=redis, serializer=serializer)
+    """
+    Возвращает общий для всех роутеров менеджер кэша.
+    Клиент Redis подключается в lifespan приложения, см. src.main.
+    """
+
+    serializer = get_serializer()
+    options = {
+        'lock_timeout': settings.cache.lock_timeout,
+        'lock_wait': settings.cache.lock_wait,
+        'lock_poll_interval': settings.cache.lock_poll_interval,
+        'invalidate_batch_size': settings.cache.invalidate_batch_size,
+        'tag_prune_batch_size': settings.cache.tag_prune_batch_size,
+        'negative_expire': settings.cache.negative_expire,
+        'http_max_age': settings.cache.http_max_age,
+    }
+
+    if settings.cache.local_enabled:
+        local = LRUCache(
+            max_size=settings.cache.local_max_size,
+            max_entries=settings.cache.local_max_entries,
+            ttl=settings.cache.local_ttl,
+            prefix_ttls=settings.cache.local_prefix_ttls,
+        )
+        return TieredCacheManager(redis=None, serializer=serializer, local=local, **options)
+
+    cache_manager = RedisCacheManager(redis=None, serializer=serializer, **options)
     return cache_manager
@@ -0,0 +1,92 @@
+import math
+import random
+import struct
+import time
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from http import HTTPStatus
+
+import orjson
+
+
+@dataclass
+class CacheEntry:
+    """
+    Запись кэша: сериализованные данные и метаданные свежести.
+    В Redis хранится как бинарный заголовок фиксированной длины, за которым идут
+    HTTP-заголовки ответа в JSON и данные.
+    """
+    payload: bytes
+    # Unix-время, после которого запись считается устаревшей (soft TTL)
+    stale_at: float = math.inf
+    # Время вычисления значения в секундах, используется для вероятностного раннего обновления
+    delta: float = 0.0
+    # HTTP-статус ответа; для негативных записей (404) payload содержит текст ошибки
+    status_code: int = HTTPStatus.OK
+    # Хэш содержимого для заголовка ETag, вычисляется при создании записи
+    etag: bytes = b''
+    # HTTP-заголовки, которые отдаются вместе с ответом, например курсор следующей страницы
+    headers: dict[str, str] = field(default_factory=dict)
+
+    MAGIC = b'CE'
+    VERSION = 4
+    # magic, version, stale_at, delta, status_code, etag, длина заголовков ответа
+    HEADER = struct.Struct('!2sBdfH16sH')
+    # Заголовки предыдущих версий, которые ещё могут встретиться в Redis
+    LEGACY_HEADERS = {
+        1: struct.Struct('!2sBdf'),
+        2: struct.Struct('!2sBdfH'),
+        3: struct.Struct('!2sBdfH16s'),
+    }
+
+    def __post_init__(self):
+        if not self.etag:
+            content = self.payload + orjson.dumps(self.headers) if self.headers else self.payload
+            self.etag = blake2b(content, digest_size=8).hexdigest().encode()
+
+    @property
+    def is_negative(self) -> bool:
+        return self.status_code == HTTPStatus.NOT_FOUND
+
+    def pack(self) -> bytes:
+        headers = orjson.dumps(self.headers) if self.headers else b''
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, self.stale_at, self.delta, self.status_code, self.etag, len(headers))
+        return header + headers + self.payload
+
+    @classmethod
+    def unpack(cls, data: bytes | str) -> 'CacheEntry':
+        if isinstance(data, str):
+            data = data.encode()
+
+        version = data[len(cls.MAGIC)] if len(data) > len(cls.MAGIC) else None
+        header = cls.HEADER if version == cls.VERSION else cls.LEGACY_HEADERS.get(version)
+        if not data.startswith(cls.MAGIC) or header is None or len(data) < header.size:
+            # Запись, сохранённая до появления заголовка - свежая до истечения TTL в Redis
+            return cls(payload=data)
+
+        _, _, *fields = header.unpack_from(data)
+        if header is not cls.HEADER:
+            return cls(data[header.size:], *fields)
+
+        *fields, headers_size = fields
+        headers_end = header.size + headers_size
+        headers = orjson.loads(data[header.size:headers_end]) if headers_size else {}
+        return cls(data[headers_end:], *fields, headers=headers)
+
+    def is_stale(self, now: float | None = None) -> bool:
+        return (now or time.time()) >= self.stale_at
+
+    def should_refresh(self, beta: float = 0.0, now: float | None = None) -> bool:
+        """
+        Проверяет, пора ли обновлять запись. При beta > 0 запись обновляется заранее
+        с вероятностью, растущей по мере приближения к stale_at (XFetch).
+        """
+
+        now = now or time.time()
+        if self.is_stale(now):
+            return True
+
+        if beta <= 0 or self.delta <= 0:
+            return False
+
+        return now - self.delta * beta * math.log(1.0 - random.random()) >= self.stale_at  # nosec B311
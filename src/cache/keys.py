@@ -0,0 +1,91 @@
+import hashlib
+import inspect
+from enum import Enum
+from typing import Annotated, Any, Callable, get_args, get_origin, get_type_hints
+from urllib.parse import quote
+from uuid import UUID
+
+from fastapi import Request
+from fastapi.params import Depends
+from pydantic import BaseModel
+
+from src.constants.elastic import ElasticIndexNames
+from src.models.base import BaseSortParams, SortOrder
+
+# Ключи длиннее этого значения заменяются хешем фиксированной длины
+MAX_KEY_LENGTH = 200
+
+_SCALAR_TYPES = (str, int, float, bool, UUID)
+
+
+def build_cache_key(prefix: str, kwargs: dict[str, Any]) -> str:
+    """
+    Строит канонический ключ кэша из разобранных параметров обработчика.
+    Ключ не зависит от хоста, порядка query-параметров и от того, переданы ли
+    значения по умолчанию явно: в него попадают уже провалидированные значения.
+    Строки попадают в ключ без изменений, ровно в том виде, в каком уходят в запрос к данным.
+    Request пропускается, значение неизвестного типа - ошибка, а не молча выпавший из ключа параметр.
+    """
+
+    params: dict[str, str] = {}
+    for name, value in kwargs.items():
+        if isinstance(value, Request):
+            continue
+        if isinstance(value, BaseModel):
+            for field in type(value).model_fields:
+                params[field] = _normalize(field, getattr(value, field))
+        else:
+            params[name] = _normalize(name, value)
+
+    key = '&'.join(f'{name}={value}' for name, value in sorted(params.items()))
+    if len(key) > MAX_KEY_LENGTH:
+        key = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    return f'{prefix}:{key}'
+
+
+def get_key_params(func: Callable) -> set[str]:
+    """
+    Имена параметров обработчика, от которых зависит ответ.
+    Зависимости (Depends), которые возвращают не модель параметров, а сервис, в ключ не попадают.
+    """
+
+    hints = get_type_hints(func, include_extras=True)
+    names = set()
+    for name in inspect.signature(func).parameters:
+        hint = hints.get(name)
+        if get_origin(hint) is Annotated:
+            annotation, *metadata = get_args(hint)
+            is_dependency = any(isinstance(item, Depends) for item in metadata)
+            if is_dependency and not (isinstance(annotation, type) and issubclass(annotation, BaseModel)):
+                continue
+        names.add(name)
+    return names
+
+
+def normalize_search_query(query: str) -> str:
+    """ Приводит строку поиска к нижнему регистру и схлопывает пробелы """
+    return ' '.join(query.lower().split())
+
+
+def _normalize(name: str, value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, BaseSortParams):
+        return f"{'-' if value.order == SortOrder.DESC else ''}{value.field.value}"
+    if isinstance(value, Enum):
+        return quote(str(value.value), safe='')
+    if isinstance(value, _SCALAR_TYPES):
+        # Экранируем, чтобы значения с & и = не давали ключ другого набора параметров
+        return quote(str(value), safe='')
+    raise TypeError(f'Параметр {name} типа {type(value).__name__} не поддерживается в ключе кэша')
+
+
+def index_tag(index: ElasticIndexNames) -> str:
+    """ Тег записей, зависящих от содержимого индекса целиком (списки, поиск) """
+    return f'tag:{index.value}'
+
+
+def entity_tag(index: ElasticIndexNames, entity_id: str) -> str:
+    """ Тег записей, зависящих от одного документа индекса """
+    return f'tag:{index.value}:{entity_id}'
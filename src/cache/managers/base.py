@@ -1,8 +1,10 @@
-from typing import Any, Type, Callable
+from typing import Any, Type, Callable, Awaitable, Sequence
 from abc import ABC, abstractmethod
+from fastapi import Request
 from pydantic import BaseModel
 
 from src.cache.serializers.base import BaseSerializer
+from src.constants.elastic import ElasticIndexNames
 
 
 class CacheManager(ABC):
@@ -14,9 +16,43 @@ class CacheManager(ABC):
         ...
 
     @abstractmethod
-    async def set(self, key: str, value: Any, expire: int) -> None:
+    async def set(
+            self,
+            key: str,
+            value: Any,
+            expire: int,
+            stale_after: float | None = None,
+            delta: float = 0.0,
+            tags: Sequence[str] = (),
+    ) -> None:
         ...
 
     @abstractmethod
-    def cache(self, model: Type[BaseModel], cache_key_prefix: str, expire: int) -> Callable:
+    def cache(
+            self,
+            model: Type[BaseModel],
+            cache_key_prefix: str,
+            expire: int,
+            soft_expire: int | None = None,
+            jitter: float = 0.0,
+            early_refresh_beta: float = 0.0,
+            indexes: Sequence[ElasticIndexNames] = (),
+            entities: dict[str, ElasticIndexNames] | None = None,
+            negative_expire: int | None = None,
+    ) -> Callable:
+        ...
+
+    @abstractmethod
+    async def cache_many(
+            self,
+            request: Request,
+            model: Type[BaseModel],
+            cache_key_prefix: str,
+            param: str,
+            ids: Sequence[str],
+            fetch: Callable[[list[str]], Awaitable[dict[str, Any]]],
+            expire: int,
+            index: ElasticIndexNames | None = None,
+            not_found_detail: str | None = None,
+    ) -> Any:
         ...
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """ In-process LRU-кэш с ограничением по объёму, количеству записей и TTL """
+
+    def __init__(
+            self,
+            max_size: int,
+            max_entries: int,
+            ttl: int,
+            prefix_ttls: dict[str, int] | None = None,
+    ):
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prefix_ttls = prefix_ttls or {}
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> bytes | None:
+        """ Возвращает значение по ключу и помечает его как недавно использованное """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expire_at = entry
+        if expire_at <= time.monotonic():
+            self.delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes | str, expire: float | None = None) -> None:
+        """
+        Сохраняет значение. TTL записи не превышает ни TTL префикса ключа,
+        ни переданный expire (оставшийся TTL записи в Redis).
+        """
+
+        if isinstance(value, str):
+            value = value.encode()
+
+        ttl = self.get_ttl(key, expire)
+        entry_size = self._entry_size(key, value)
+        if ttl <= 0 or entry_size > self.max_size:
+            self.delete(key)
+            return
+
+        self.delete(key)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._size += entry_size
+        self._evict()
+
+    def delete(self, key: str) -> None:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self._size -= self._entry_size(key, entry[0])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def get_ttl(self, key: str, expire: float | None = None) -> float:
+        """ Определяет TTL записи по префиксу ключа (часть до первого ':') """
+
+        prefix = key.split(':', 1)[0]
+        ttl = self.prefix_ttls.get(prefix, self.ttl)
+        return min(ttl, expire) if expire is not None else ttl
+
+    def _evict(self) -> None:
+        """ Вытесняет самые давно использованные записи, пока не уложимся в лимиты """
+
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_size):
+            key, (value, _) = self._entries.popitem(last=False)
+            self._size -= self._entry_size(key, value)
+
+    @staticmethod
+    def _entry_size(key: str, value: bytes) -> int:
+        return len(key) + len(value)
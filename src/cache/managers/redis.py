@@ -1,38 +1,562 @@
-from functools import wraps
-from typing import Any, Type, Callable
+import asyncio
+import logging
+import time
+from functools import partial, wraps
+from hashlib import blake2b
+from http import HTTPStatus
+from typing import Any, Type, Callable, Awaitable, Iterable, Iterator, Sequence
+from uuid import uuid4
+
+import orjson
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 from pydantic import BaseModel
 
+from src.cache.entry import CacheEntry
+from src.cache.keys import build_cache_key, entity_tag, get_key_params, index_tag
 from src.cache.managers.base import CacheManager
+from src.cache.policy import CachePolicy
 from src.cache.serializers.base import BaseSerializer
+from src.constants.elastic import ElasticIndexNames
+from src.models.base import Page
+
+logger = logging.getLogger(__name__)
+
+# Снимает блокировку, только если она всё ещё принадлежит нам
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Канал, в который публикуются удалённые при инвалидации ключи: процессы с локальным кэшем удаляют их у себя
+INVALIDATION_CHANNEL = 'cache:invalidated'
+
+# Заголовок ответа: HIT - запись была в кэше, MISS - вычислена и записана при этом запросе
+CACHE_STATUS_HEADER = 'X-Cache'
+
+# Маркер для ожидающих запросов: лидер был отменён и значение не вычислено
+_NOT_COMPUTED = object()
 
 
 class RedisCacheManager(CacheManager):
-    def __init__(self, redis: Redis, serializer: BaseSerializer):
+    def __init__(
+            self,
+            redis: Redis | None,
+            serializer: BaseSerializer,
+            lock_timeout: float = 5,
+            lock_wait: float = 2,
+            lock_poll_interval: float = 0.05,
+            invalidate_batch_size: int = 500,
+            tag_prune_batch_size: int = 100,
+            negative_expire: int = 30,
+            http_max_age: int = 60,
+    ):
         super().__init__(serializer)
         self.redis = redis
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.lock_poll_interval = lock_poll_interval
+        self.invalidate_batch_size = invalidate_batch_size
+        self.tag_prune_batch_size = tag_prune_batch_size
+        self.negative_expire = negative_expire
+        self.http_max_age = http_max_age
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._refreshing: set[str] = set()
+        self._background_tasks: set[asyncio.Task] = set()
+        # Позиции SSCAN для тегов, проход по которым ещё не завершён, см. _prune_tags
+        self._prune_cursors: dict[str, int] = {}
 
     async def get(self, key: str) -> Any:
         return await self.redis.get(key)
 
-    async def set(self, key: str, value: Any, expire: int) -> None:
-        await self.redis.set(key, self.serializer.serialize(value), ex=expire)
+    async def set(
+            self,
+            key: str,
+            value: Any,
+            expire: int,
+            stale_after: float | None = None,
+            delta: float = 0.0,
+            tags: Sequence[str] = (),
+    ) -> CacheEntry:
+        """
+        Сохраняет значение в кэш.
+        :param expire: hard TTL - время жизни записи в Redis.
+        :param stale_after: soft TTL - через сколько секунд запись считается устаревшей.
+        :param delta: время вычисления значения, используется для раннего обновления.
+        :param tags: теги инвалидации, к которым привязывается запись.
+        :return: сохранённая запись.
+        """
+
+        if isinstance(value, Page) and value.max_age is not None:
+            # Курсор страницы ссылается на point-in-time: запись не должна пережить его keep_alive
+            expire = max(1, min(expire, int(value.max_age)))
+            stale_after = min(stale_after, expire) if stale_after is not None else None
+        entry = self._make_entry(value, expire, stale_after, delta)
+        await self._store(key, entry.pack(), expire, tags)
+        return entry
+
+    async def set_not_found(self, key: str, detail: str, expire: int, tags: Sequence[str] = ()) -> None:
+        """ Сохраняет негативную запись: ответ 404 с текстом ошибки """
+
+        entry = CacheEntry(payload=detail.encode(), status_code=HTTPStatus.NOT_FOUND)
+        await self._store(key, entry.pack(), expire, tags)
+
+    async def get_entry(self, key: str) -> CacheEntry | None:
+        if data := await self.get(key):
+            return CacheEntry.unpack(data)
+        return None
+
+    async def get_entries(self, keys: Sequence[str]) -> list[CacheEntry | None]:
+        """ Читает записи по нескольким ключам одним MGET """
+
+        values = await self._get_many(keys) if keys else []
+        return [CacheEntry.unpack(data) if data else None for data in values]
+
+    async def cache_many(
+            self,
+            request: Request,
+            model: Type[BaseModel],
+            cache_key_prefix: str,
+            param: str,
+            ids: Sequence[str],
+            fetch: Callable[[list[str]], Awaitable[dict[str, Any]]],
+            expire: int = 60 * 5,
+            index: ElasticIndexNames | None = None,
+            not_found_detail: str | None = None,
+    ) -> Response:
+        """
+        Отдаёт записи по списку id одним JSON-массивом в порядке id, отсутствующие id пропускаются.
+        Закэшированные записи читаются одним MGET, недостающие загружаются одним вызовом fetch
+        и сохраняются одним pipeline под теми же ключами, что и у обработчика одной записи.
+        ETag ответа строится по ETag записей, поэтому при совпадении If-None-Match 304 отдаётся без десериализации.
+        :param param: path-параметр обработчика одной записи, из которого строится ключ.
+        :param fetch: загружает записи по списку id, возвращает словарь id -> значение.
+        :param index: индекс записей, ключи привязываются к тегам документов.
+        :param not_found_detail: текст ответа 404 обработчика одной записи;
+            если задан, для отсутствующих id сохраняются негативные записи.
+        """
+
+        keys = {entity_id: build_cache_key(cache_key_prefix, {param: entity_id}) for entity_id in ids}
+        entries = dict(zip(keys, await self.get_entries(list(keys.values()))))
+
+        if missing := {entity_id: keys[entity_id] for entity_id, entry in entries.items() if entry is None}:
+            found = await fetch(list(missing))
+            entries.update(await self._store_fetched(missing, found, expire, index, not_found_detail))
+
+        available = [entry for entry in entries.values() if entry is not None and not entry.is_negative]
+        etag = blake2b(b''.join(entry.etag for entry in available), digest_size=8).hexdigest().encode()
+        max_age = min((self._get_max_age(entry) for entry in available), default=self.http_max_age)
+        headers = self._get_headers(etag, max_age, hit=not missing)
+        if _etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        bodies = [self._render(entry, model) for entry in available]
+        return Response(content=b'[' + b','.join(bodies) + b']', media_type='application/json', headers=headers)
+
+    def cache(
+            self,
+            model: Type[BaseModel],
+            cache_key_prefix: str,
+            expire: int = 60 * 5,
+            soft_expire: int | None = None,
+            jitter: float = 0.0,
+            early_refresh_beta: float = 0.0,
+            indexes: Sequence[ElasticIndexNames] = (),
+            entities: dict[str, ElasticIndexNames] | None = None,
+            negative_expire: int | None = None,
+    ) -> Callable:
+        """
+        Кэширует ответ обработчика. Ответ отдаётся с заголовками ETag и Cache-Control,
+        при совпадении If-None-Match возвращается 304 без обращения к данным и десериализации.
+        :param expire: hard TTL - после него запись удаляется из Redis.
+        :param soft_expire: soft TTL - после него и до hard TTL отдаётся устаревшее значение,
+            а обновление выполняется одной фоновой задачей (stale-while-revalidate).
+        :param jitter: доля случайного сокращения soft TTL, чтобы одновременно записанные
+            ключи не устаревали одновременно.
+        :param early_refresh_beta: коэффициент вероятностного раннего обновления (XFetch), 0 - выключено.
+        :param indexes: индексы, при изменении которых запись инвалидируется целиком.
+        :param entities: path-параметры с id документов и их индексы; запись инвалидируется
+            при изменении этих документов.
+        :param negative_expire: TTL негативной записи для ответов 404, 0 - не кэшировать 404.
+            По умолчанию берётся из настроек менеджера.
+        """
+
+        policy = CachePolicy(
+            expire=expire,
+            soft_expire=soft_expire,
+            jitter=jitter,
+            early_refresh_beta=early_refresh_beta,
+            negative_expire=negative_expire if negative_expire is not None else self.negative_expire,
+            indexes=indexes,
+            entities=entities or {},
+        )
 
-    def cache(self, model: Type[BaseModel], cache_key_prefix: str, expire: int = 60 * 5) -> Callable:
         def decorator(func: Callable):
+            key_params = get_key_params(func)
+
             @wraps(func)
             async def wrapper(*args, **kwargs):
                 request = kwargs.get('request')
                 if request is None:
                     raise ValueError('Request object must be provided in kwargs')
 
-                cache_key = f"{cache_key_prefix}:{request.url}"
-                cached_data = await self.get(cache_key)
-                if cached_data:
-                    return self.serializer.deserialize(cached_data, model)
+                cache_key = build_cache_key(cache_key_prefix, {name: value for name, value in kwargs.items() if name in key_params})
+                compute = partial(self._compute, cache_key, policy, func, args, kwargs)
+                read = partial(self.get_entry, cache_key)
 
-                response = await func(*args, **kwargs)
-                await self.set(cache_key, response, expire)
-                return response
+                hit = True
+                if entry := await self.get_entry(cache_key):
+                    if entry.should_refresh(policy.early_refresh_beta):
+                        self._refresh_in_background(cache_key, compute)
+                else:
+                    entry, hit = await self._single_flight(cache_key, compute, read), False
+
+                return self._respond(request, entry, model, hit)
             return wrapper
         return decorator
+
+    async def _compute(self, key: str, policy: CachePolicy, func: Callable, args: tuple, kwargs: dict) -> CacheEntry:
+        """ Вызывает обработчик и сохраняет результат; ответ 404 сохраняется как негативная запись """
+
+        tags = policy.get_tags(kwargs)
+        started = time.monotonic()
+        try:
+            response = await func(*args, **kwargs)
+        except HTTPException as e:
+            if e.status_code == HTTPStatus.NOT_FOUND and policy.negative_expire:
+                await self.set_not_found(key, str(e.detail), policy.negative_expire, tags)
+            raise
+
+        return await self.set(key, response, policy.expire, policy.get_stale_after(), time.monotonic() - started, tags)
+
+    async def _store_fetched(
+            self,
+            keys: dict[str, str],
+            found: dict[str, Any],
+            expire: int,
+            index: ElasticIndexNames | None,
+            not_found_detail: str | None,
+    ) -> dict[str, CacheEntry | None]:
+        """ Сохраняет загруженные записи и негативные записи для отсутствующих id одним pipeline """
+
+        entries, items = {}, []
+        for entity_id, key in keys.items():
+            tags = [entity_tag(index, entity_id)] if index else []
+            entry = None
+            if (value := found.get(entity_id)) is not None:
+                entry = self._make_entry(value, expire)
+                items.append((key, entry.pack(), expire, tags))
+            elif not_found_detail and self.negative_expire:
+                entry = CacheEntry(payload=not_found_detail.encode(), status_code=HTTPStatus.NOT_FOUND)
+                items.append((key, entry.pack(), self.negative_expire, tags))
+            entries[entity_id] = entry
+
+        await self._store_many(items)
+        return entries
+
+    def _make_entry(self, value: Any, expire: int, stale_after: float | None = None, delta: float = 0.0) -> CacheEntry:
+        data = self.serializer.serialize(value)
+        if isinstance(data, str):
+            data = data.encode()
+
+        return CacheEntry(
+            payload=data,
+            stale_at=time.time() + (stale_after if stale_after is not None else expire),
+            delta=delta,
+            headers=value.headers if isinstance(value, Page) else {},
+        )
+
+    def _render(self, entry: CacheEntry, model: Type[BaseModel]) -> bytes:
+        """ JSON-тело записи: готовое тело ответа отдаётся как есть, модели кодируются заново """
+
+        value = self.serializer.deserialize(entry.payload, model)
+        if isinstance(value, Response):
+            return value.body
+        return orjson.dumps(jsonable_encoder(value))
+
+    def _respond(self, request: Request, entry: CacheEntry, model: Type[BaseModel], hit: bool = True) -> Response:
+        """ Собирает HTTP-ответ из записи кэша, для негативной записи повторяет 404 """
+
+        if entry.is_negative:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=entry.payload.decode())
+
+        headers = {**entry.headers, **self._get_headers(entry.etag, self._get_max_age(entry), hit)}
+        if _etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        response = self.serializer.deserialize(entry.payload, model)
+        if not isinstance(response, Response):
+            response = ORJSONResponse(jsonable_encoder(response))
+        response.headers.update(headers)
+        return response
+
+    @staticmethod
+    def _get_headers(etag: bytes, max_age: int, hit: bool) -> dict[str, str]:
+        return {
+            'ETag': f'"{etag.decode()}"',
+            'Cache-Control': f'public, max-age={max_age}',
+            CACHE_STATUS_HEADER: 'HIT' if hit else 'MISS',
+        }
+
+    def _get_max_age(self, entry: CacheEntry) -> int:
+        # Клиент может не перепроверять ответ, пока запись в кэше не устарела
+        return max(0, int(min(self.http_max_age, entry.stale_at - time.time())))
+
+    async def invalidate(self, index: ElasticIndexNames, ids: Iterable[str] = ()) -> int:
+        """ Удаляет записи, зависящие от индекса и от переданных документов этого индекса """
+
+        tags = [index_tag(index), *(entity_tag(index, entity_id) for entity_id in ids)]
+        return await self.invalidate_tags(tags)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Удаляет все записи, привязанные к тегам, и сами теги.
+        Члены тегов читаются через SSCAN, удаление идёт пачками через UNLINK;
+        ключи каждой пачки публикуются в INVALIDATION_CHANNEL для локальных кэшей процессов.
+        :return: количество удалённых ключей, включая теги.
+        """
+
+        deleted = 0
+        for chunk in _chunks(tags, self.invalidate_batch_size):
+            keys = await self._collect_tagged_keys(chunk)
+            for keys_chunk in _chunks([*keys, *chunk], self.invalidate_batch_size):
+                deleted += await self._delete(keys_chunk)
+
+        return deleted
+
+    async def _collect_tagged_keys(self, tags: list[str]) -> list[bytes]:
+        # Первые страницы SSCAN всех тегов пачки запрашиваем одним pipeline,
+        # большие теги дочитываем отдельно
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.sscan(tag, 0, count=self.invalidate_batch_size)
+            pages = await pipe.execute()
+
+        keys = set()
+        for tag, (cursor, members) in zip(tags, pages):
+            keys.update(members)
+            while cursor:
+                cursor, members = await self.redis.sscan(tag, cursor, count=self.invalidate_batch_size)
+                keys.update(members)
+
+        return list(keys)
+
+    async def _delete(self, keys: list[str | bytes]) -> int:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.unlink(*keys)
+            pipe.publish(INVALIDATION_CHANNEL, orjson.dumps([_decode(key) for key in keys]))
+            deleted, _ = await pipe.execute()
+        return deleted
+
+    async def _get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        return await self.redis.mget(keys)
+
+    async def _store(self, key: str, data: bytes, expire: int, tags: Sequence[str] = ()) -> None:
+        if not tags:
+            await self.redis.set(key, data, ex=expire)
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            self._queue_store(pipe, key, data, expire, tags)
+            await pipe.execute()
+        await self._prune_tags(tags)
+
+    async def _store_many(self, items: Sequence[tuple[str, bytes, int, Sequence[str]]]) -> None:
+        """ Сохраняет несколько записей одним pipeline: (ключ, данные, TTL, теги) """
+
+        if not items:
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, data, expire, tags in items:
+                self._queue_store(pipe, key, data, expire, tags)
+            await pipe.execute()
+        await self._prune_tags(list(dict.fromkeys(tag for *_, tags in items for tag in tags)))
+
+    @staticmethod
+    def _queue_store(pipe: Pipeline, key: str, data: bytes, expire: int, tags: Sequence[str]) -> None:
+        pipe.set(key, data, ex=expire)
+        for tag in tags:
+            pipe.sadd(tag, key)
+            # Тег живёт не меньше самой долгоживущей из привязанных к нему записей
+            pipe.expire(tag, expire, nx=True)
+            pipe.expire(tag, expire, gt=True)
+
+    async def _prune_tags(self, tags: Sequence[str]) -> None:
+        """
+        Удаляет из тегов ключи, которые уже истекли в Redis. Без этого индексный тег
+        (tag:movies) растёт бесконечно: записи истекают, а их ключи остаются в множестве.
+        За вызов просматривается одна страница SSCAN каждого тега, следующий вызов
+        продолжает с того же места, так что каждый тег регулярно просматривается целиком.
+        """
+
+        if not (members := await self._scan_tags(tags)):
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for _, member in members:
+                pipe.exists(member)
+            exists = await pipe.execute()
+
+        expired: dict[str, list] = {}
+        for (tag, member), found in zip(members, exists):
+            if not found:
+                expired.setdefault(tag, []).append(member)
+
+        if expired:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for tag, keys in expired.items():
+                    pipe.srem(tag, *keys)
+                await pipe.execute()
+
+    async def _scan_tags(self, tags: Sequence[str]) -> list[tuple[str, bytes]]:
+        """ Читает следующую страницу SSCAN каждого тега, возвращает пары (тег, ключ) """
+
+        if not tags:
+            return []
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.sscan(tag, self._prune_cursors.get(tag, 0), count=self.tag_prune_batch_size)
+            pages = await pipe.execute()
+
+        members = []
+        for tag, (cursor, page) in zip(tags, pages):
+            # Курсор храним только до конца прохода, иначе словарь рос бы вместе с числом тегов сущностей
+            if cursor:
+                self._prune_cursors[tag] = cursor
+            else:
+                self._prune_cursors.pop(tag, None)
+            members.extend((tag, member) for member in page)
+
+        return members
+
+    async def _single_flight(self, key: str, compute: Callable[[], Awaitable], read: Callable[[], Awaitable]) -> Any:
+        """
+        Схлопывает одновременные промахи по одному ключу: внутри процесса запросы ждут
+        один future, между воркерами - короткую блокировку в Redis.
+        Если ожидание затянулось, запрос вычисляет значение самостоятельно.
+        """
+
+        if (future := self._in_flight.get(key)) is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), self.lock_wait)
+            except asyncio.TimeoutError:
+                return await compute()
+            return await compute() if result is _NOT_COMPUTED else result
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._compute_with_lock(key, compute, read)
+        except Exception as e:
+            future.set_exception(e)
+            # Помечаем исключение как полученное, даже если ожидающих нет
+            future.exception()
+            raise
+        except BaseException:
+            future.set_result(_NOT_COMPUTED)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _compute_with_lock(self, key: str, compute: Callable[[], Awaitable], read: Callable[[], Awaitable]) -> Any:
+        lock_key, token = self._get_lock_key(key), uuid4().hex
+
+        if await self._acquire_lock(lock_key, token):
+            try:
+                return await compute()
+            finally:
+                await self._release_lock(lock_key, token)
+
+        # Значение уже вычисляет другой воркер - ждём его появления в кэше
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_wait
+        while loop.time() < deadline:
+            await asyncio.sleep(self.lock_poll_interval)
+            if (result := await read()) is not None:
+                return result
+            if not await self.redis.exists(lock_key):
+                break
+
+        return await compute()
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Awaitable]) -> None:
+        """ Запускает фоновое обновление ключа, если оно ещё не запущено в этом процессе """
+
+        if key in self._refreshing:
+            return
+
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, compute))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def close(self) -> None:
+        """
+        Отменяет фоновые обновления и дожидается их завершения.
+        Вызывается при остановке сервера до закрытия клиента Redis: отменённое обновление ещё снимает свою блокировку.
+        """
+
+        tasks = list(self._background_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable]) -> None:
+        lock_key, token = self._get_lock_key(key), uuid4().hex
+        try:
+            # Если ключ уже обновляет другой воркер, ничего не делаем
+            if not await self._acquire_lock(lock_key, token):
+                return
+            try:
+                await compute()
+            finally:
+                await self._release_lock(lock_key, token)
+        except Exception:
+            logger.exception(f'Не удалось обновить ключ кэша {key}')
+        finally:
+            self._refreshing.discard(key)
+
+    @staticmethod
+    def _get_lock_key(key: str) -> str:
+        return f'lock:{key}'
+
+    async def _acquire_lock(self, lock_key: str, token: str) -> bool:
+        return bool(await self.redis.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000)))
+
+    async def _release_lock(self, lock_key: str, token: str) -> None:
+        await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """ Проверяет заголовок If-None-Match, слабые ETag сравниваются как сильные """
+
+    if not if_none_match:
+        return False
+
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
+
+
+def _decode(key: str | bytes) -> str:
+    return key.decode() if isinstance(key, bytes) else key
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Any, Sequence
+
+import orjson
+from redis.asyncio import Redis
+
+from src.cache.managers.memory import LRUCache
+from src.cache.managers.redis import INVALIDATION_CHANNEL, RedisCacheManager
+from src.cache.serializers.base import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCacheManager(RedisCacheManager):
+    """
+    Двухуровневый кэш: in-process LRU (L1) перед Redis (L2).
+    Горячие ключи отдаются из памяти процесса без похода в Redis.
+    Запись живёт в L1 не дольше, чем в Redis. Ключи, удалённые инвалидацией в любом процессе,
+    удаляются из L1 по сообщению из INVALIDATION_CHANNEL (см. listen_invalidations);
+    пока подписка не работает, устаревшая запись отдаётся из L1 не дольше TTL L1.
+    """
+
+    def __init__(self, redis: Redis | None, serializer: BaseSerializer, local: LRUCache, **kwargs):
+        super().__init__(redis=redis, serializer=serializer, **kwargs)
+        self.local = local
+
+    async def get(self, key: str) -> Any:
+        if (data := self.local.get(key)) is not None:
+            return data
+
+        return (await self._get_many([key]))[0]
+
+    async def _get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        values = [self.local.get(key) for key in keys]
+        if missing := [key for key, data in zip(keys, values) if data is None]:
+            # Вместе с данными читаем оставшийся TTL записей, чтобы L1 не пережил Redis
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.mget(missing)
+                for key in missing:
+                    pipe.pttl(key)
+                found, *ttls = await pipe.execute()
+
+            fetched = dict(zip(missing, found))
+            for key, data, ttl in zip(missing, found, ttls):
+                if data is not None:
+                    self.local.set(key, data, _get_expire(ttl))
+            values = [data if data is not None else fetched[key] for key, data in zip(keys, values)]
+        return values
+
+    async def _store(self, key: str, data: bytes, expire: int, tags: Sequence[str] = ()) -> None:
+        await super()._store(key, data, expire, tags)
+        self.local.set(key, data, expire)
+
+    async def _store_many(self, items: Sequence[tuple[str, bytes, int, Sequence[str]]]) -> None:
+        await super()._store_many(items)
+        for key, data, expire, _ in items:
+            self.local.set(key, data, expire)
+
+    async def _delete(self, keys: list[str | bytes]) -> int:
+        for key in keys:
+            self.local.delete(key.decode() if isinstance(key, bytes) else key)
+        return await super()._delete(keys)
+
+    async def listen_invalidations(self, retry_interval: float = 1.0) -> None:
+        """
+        Удаляет из L1 ключи, инвалидированные любым процессом, в том числе ETL.
+        Сообщения, отправленные без подписки, теряются, поэтому после (пере)подключения L1 очищается целиком.
+        """
+
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    self.local.clear()
+                    async for message in pubsub.listen():
+                        if message['type'] != 'message':
+                            continue
+                        for key in orjson.loads(message['data']):
+                            self.local.delete(key)
+            except Exception:
+                logger.exception('Подписка на инвалидацию кэша прервана')
+            await asyncio.sleep(retry_interval)
+
+
+def _get_expire(pttl: int) -> float | None:
+    """ Оставшийся TTL записи в Redis в секундах; None, если у записи нет TTL """
+    return pttl / 1000 if pttl >= 0 else None
@@ -0,0 +1,40 @@
+import random
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+from src.cache.keys import entity_tag, index_tag
+from src.constants.elastic import ElasticIndexNames
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """ Параметры кэширования одного обработчика """
+    # hard TTL - после него запись удаляется из Redis
+    expire: int
+    # soft TTL - после него запись считается устаревшей и обновляется в фоне
+    soft_expire: int | None = None
+    # Доля случайного сокращения soft TTL
+    jitter: float = 0.0
+    # Коэффициент вероятностного раннего обновления (XFetch), 0 - выключено
+    early_refresh_beta: float = 0.0
+    # TTL негативной записи для ответов 404, 0 - не кэшировать 404
+    negative_expire: int = 0
+    # Индексы, при изменении которых запись инвалидируется целиком
+    indexes: Sequence[ElasticIndexNames] = ()
+    # Path-параметры с id документов и индексы, к которым эти документы относятся
+    entities: dict[str, ElasticIndexNames] = field(default_factory=dict)
+
+    def get_stale_after(self) -> float:
+        stale_after = self.soft_expire if self.soft_expire is not None else self.expire
+        if self.jitter > 0:
+            stale_after *= 1 - random.uniform(0, self.jitter)  # nosec B311
+        return stale_after
+
+    def get_tags(self, kwargs: dict[str, Any]) -> list[str]:
+        """ Собирает теги инвалидации записи по параметрам обработчика """
+
+        tags = [index_tag(index) for index in self.indexes]
+        for param, index in self.entities.items():
+            if (entity_id := kwargs.get(param)) is not None:
+                tags.append(entity_tag(index, entity_id))
+        return tags
@@ -4,10 +4,13 @@ from pydantic import BaseModel
 
 
 class BaseSerializer(ABC):
+    # Однобайтовый тег формата, по которому FormatSerializer выбирает сериализатор при чтении
+    format: bytes = b''
+
     @abstractmethod
-    def serialize(self, data: Any) -> str:
+    def serialize(self, data: Any) -> str | bytes:
         ...
 
     @abstractmethod
-    def deserialize(self, data: str, model: Type[BaseModel]) -> Any:
+    def deserialize(self, data: str | bytes, model: Type[BaseModel]) -> Any:
         ...
@@ -0,0 +1,111 @@
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Type
+
+import lz4.frame as lz4_frame
+import zstandard
+from pydantic import BaseModel
+
+from src.cache.serializers.base import BaseSerializer
+
+
+class Codec(ABC):
+    # Однобайтовый маркер кодека в начале записи
+    marker: bytes
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        ...
+
+
+class ZlibCodec(Codec):
+    marker = b'\x01'
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCodec(Codec):
+    marker = b'\x02'
+
+    def __init__(self, level: int = 3):
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+class Lz4Codec(Codec):
+    marker = b'\x03'
+
+    def __init__(self, level: int = 0):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return lz4_frame.compress(data, compression_level=self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4_frame.decompress(data)
+
+
+CODECS: dict[str, Type[Codec]] = {
+    'zlib': ZlibCodec,
+    'zstd': ZstdCodec,
+    'lz4': Lz4Codec,
+}
+
+
+class CompressedSerializer(BaseSerializer):
+    """
+    Сжимает данные вложенного сериализатора, если их размер не меньше порога.
+    Первый байт записи - маркер кодека (NO_COMPRESSION для несжатых данных),
+    поэтому записи читаются при любых настройках сжатия.
+    """
+    NO_COMPRESSION = b'\x00'
+
+    def __init__(self, serializer: BaseSerializer, codec: Codec | None = None, threshold: int = 1024):
+        self.serializer = serializer
+        self.codec = codec
+        self.threshold = threshold
+
+    def serialize(self, data: Any) -> bytes:
+        payload = self.serializer.serialize(data)
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        if self.codec is None or len(payload) < self.threshold:
+            return self.NO_COMPRESSION + payload
+
+        return self.codec.marker + self.codec.compress(payload)
+
+    def deserialize(self, data: str | bytes, model: Type[BaseModel]) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+
+        marker, payload = data[:1], data[1:]
+        if marker == self.NO_COMPRESSION:
+            return self.serializer.deserialize(payload, model)
+
+        if self.codec is not None and marker == self.codec.marker:
+            return self.serializer.deserialize(self.codec.decompress(payload), model)
+
+        for codec_class in CODECS.values():
+            if codec_class.marker == marker:
+                return self.serializer.deserialize(codec_class().decompress(payload), model)
+
+        # Запись без маркера кодека, сохранённая до появления сжатия
+        return self.serializer.deserialize(data, model)
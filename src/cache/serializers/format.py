@@ -0,0 +1,43 @@
+from typing import Any, Type
+
+from pydantic import BaseModel
+
+from src.cache.serializers.base import BaseSerializer
+
+
+class FormatSerializer(BaseSerializer):
+    """
+    Добавляет к данным однобайтовый тег формата и при чтении выбирает сериализатор по тегу.
+    Благодаря этому сериализатор можно сменить без очистки Redis: старые записи
+    читаются сериализатором, которым были записаны.
+    """
+
+    def __init__(self, serializer: BaseSerializer, readers: list[BaseSerializer] | None = None, fallback: BaseSerializer | None = None):
+        """
+        :param serializer: сериализатор для записи.
+        :param readers: сериализаторы, которыми читаются записи других форматов.
+        :param fallback: сериализатор для записей без тега формата.
+        """
+
+        self.serializer = serializer
+        self.readers = {reader.format: reader for reader in readers or []}
+        self.readers[serializer.format] = serializer
+        self.fallback = fallback
+
+    def serialize(self, data: Any) -> bytes:
+        payload = self.serializer.serialize(data)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        return self.serializer.format + payload
+
+    def deserialize(self, data: str | bytes, model: Type[BaseModel]) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+
+        if reader := self.readers.get(data[:1]):
+            return reader.deserialize(data[1:], model)
+
+        if self.fallback is None:
+            raise ValueError(f'Неизвестный формат записи кэша: {data[:1]!r}')
+
+        return self.fallback.deserialize(data, model)
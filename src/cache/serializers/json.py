@@ -6,12 +6,14 @@ from src.cache.serializers.base import BaseSerializer
 
 
 class JsonSerializer(BaseSerializer):
+    format = b'\x10'
+
     def serialize(self, data: Any) -> str:
         if isinstance(data, list):
             return json.dumps([item.json() for item in data])
         return data.json()
 
-    def deserialize(self, data: str, model: Type[BaseModel]) -> Any:
+    def deserialize(self, data: str | bytes, model: Type[BaseModel]) -> Any:
         items = json.loads(data)
         if isinstance(items, list):
             return [model.parse_raw(item) for item in items]
@@ -0,0 +1,22 @@
+from typing import Any, Type
+
+import msgpack
+from pydantic import BaseModel
+
+from src.cache.serializers.base import BaseSerializer
+
+
+class MsgpackSerializer(BaseSerializer):
+    """ Компактная бинарная сериализация моделей в msgpack """
+    format = b'\x13'
+
+    def serialize(self, data: Any) -> bytes:
+        if isinstance(data, list):
+            return msgpack.packb([item.model_dump(mode='json') for item in data])
+        return msgpack.packb(data.model_dump(mode='json'))
+
+    def deserialize(self, data: str | bytes, model: Type[BaseModel]) -> Any:
+        items = msgpack.unpackb(data)
+        if isinstance(items, list):
+            return [model.model_validate(item) for item in items]
+        return model.model_validate(items)
@@ -0,0 +1,26 @@
+from typing import Any, Type
+
+import orjson
+from pydantic import BaseModel
+
+from src.cache.serializers.base import BaseSerializer
+
+
+class OrjsonSerializer(BaseSerializer):
+    """ Сериализует модели одним вызовом orjson без промежуточных JSON-строк """
+    format = b'\x12'
+
+    def serialize(self, data: Any) -> bytes:
+        return orjson.dumps(data, default=self._default)
+
+    def deserialize(self, data: str | bytes, model: Type[BaseModel]) -> Any:
+        items = orjson.loads(data)
+        if isinstance(items, list):
+            return [model.model_validate(item) for item in items]
+        return model.model_validate(items)
+
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        if isinstance(obj, BaseModel):
+            return obj.model_dump()
+        raise TypeError(f'Object of type {type(obj).__name__} is not serializable')
@@ -0,0 +1,23 @@
+from typing import Any, Type
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from src.cache.serializers.base import BaseSerializer
+
+
+class ResponseSerializer(BaseSerializer):
+    """
+    Хранит в кэше готовое тело HTTP-ответа.
+    При попадании в кэш тело отдаётся как есть: без сборки моделей, валидации и повторного кодирования в JSON.
+    """
+    format = b'\x11'
+    media_type = 'application/json'
+
+    def serialize(self, data: Any) -> bytes:
+        return orjson.dumps(jsonable_encoder(data), option=orjson.OPT_NON_STR_KEYS)
+
+    def deserialize(self, data: str | bytes, model: Type[BaseModel]) -> Response:
+        return Response(content=data, media_type=self.media_type)
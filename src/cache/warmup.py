@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Iterable
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from httpx import ASGITransport, AsyncClient, HTTPError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp
+
+from src.cache.managers.redis import CACHE_STATUS_HEADER
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sorted set с количеством обращений к страницам, из которого берутся страницы для прогрева
+HITS_KEY = 'warmup:hits'
+# Заголовок запросов прогрева, такие запросы не попадают в статистику обращений
+WARMUP_HEADER = 'X-Cache-Warmup'
+# Страницы с этими параметрами не учитываются: курсоры одноразовые, свободный текст почти не повторяется
+UNTRACKED_PARAMS = frozenset(('cursor', 'query', 'prefix', 'ids'))
+
+
+class WarmResult(Enum):
+    WRITTEN = 'written'
+    CACHED = 'cached'
+    FAILED = 'failed'
+
+
+@dataclass
+class WarmupReport:
+    """
+    Итог прогрева: сколько страниц запрошено, для скольких записи в кэше не было и она записана,
+    сколько уже были в кэше, сколько запросов завершились ошибкой и сколько заняло времени
+    """
+    total: int
+    warmed: int
+    cached: int
+    failed: int
+    duration: float
+
+
+class HitCounter:
+    """
+    Статистика обращений к страницам для прогрева.
+    Обращения считаются в памяти процесса и периодически сбрасываются в Redis одним pipeline,
+    чтобы запросы к API не ждали Redis; при сбросе sorted set обрезается до max_size самых популярных страниц.
+    """
+
+    def __init__(self, max_size: int, max_pending: int = 10_000):
+        self.max_size = max_size
+        self.max_pending = max_pending
+        self.pending: Counter[str] = Counter()
+
+    def add(self, path: str) -> None:
+        # Новые страницы сверх max_pending до сброса не учитываются, чтобы счётчик не рос без ограничений
+        if path in self.pending or len(self.pending) < self.max_pending:
+            self.pending[path] += 1
+
+    async def flush(self, redis_client: Redis) -> int:
+        """ Добавляет накопленные обращения в Redis и обрезает хвост статистики; возвращает число страниц """
+
+        if not self.pending:
+            return 0
+
+        pending, self.pending = self.pending, Counter()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for path, count in pending.items():
+                pipe.zincrby(HITS_KEY, count, path)
+            pipe.zremrangebyrank(HITS_KEY, 0, -self.max_size - 1)
+            await pipe.execute()
+        return len(pending)
+
+    async def run(self, redis_client: Redis, interval: float) -> None:
+        """ Сбрасывает обращения каждые interval секунд и один раз при остановке """
+
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self._safe_flush(redis_client)
+        finally:
+            await self._safe_flush(redis_client)
+
+    async def _safe_flush(self, redis_client: Redis) -> None:
+        try:
+            await self.flush(redis_client)
+        except RedisError:
+            logger.warning('Не удалось записать статистику обращений для прогрева')
+
+
+@lru_cache()
+def get_hit_counter() -> HitCounter:
+    # Храним с запасом, чтобы новые страницы успевали набрать обращения
+    return HitCounter(max_size=settings.warmup.hits_limit * 10)
+
+
+class CacheWarmer:
+    """
+    Прогревает кэш, запрашивая страницы у ASGI-приложения напрямую, без сетевого сервера,
+    или у запущенного API по его адресу - так прогревают процессы, которые не импортируют приложение, например ETL.
+    Записи заполняет сам декоратор кэша, поэтому ключи совпадают с ключами обычных запросов.
+    """
+
+    def __init__(self, app: ASGIApp | str, concurrency: int = 8):
+        self.app = app
+        self.concurrency = concurrency
+
+    async def run(self, paths: Iterable[str]) -> WarmupReport:
+        """ Запрашивает страницы с ограничением числа одновременных запросов """
+
+        paths = list(dict.fromkeys(paths))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async with self._get_client() as client:
+            results = await asyncio.gather(*(self._warm(client, semaphore, path) for path in paths))
+
+        report = WarmupReport(
+            total=len(paths),
+            warmed=results.count(WarmResult.WRITTEN),
+            cached=results.count(WarmResult.CACHED),
+            failed=results.count(WarmResult.FAILED),
+            duration=time.monotonic() - started,
+        )
+        logger.info(
+            f'Прогрев кэша завершён за {report.duration:.2f} с: из {report.total} страниц '
+            f'записано в кэш {report.warmed}, уже были в кэше {report.cached}, ошибок {report.failed}',
+        )
+        return report
+
+    async def get_genre_films_paths(self, limit: int) -> list[str]:
+        """ Первые страницы фильмов по каждому жанру """
+
+        async with self._get_client() as client:
+            try:
+                response = await client.get('/api/v1/genres', params={'page_size': limit})
+                response.raise_for_status()
+            except HTTPError:
+                logger.exception('Не удалось получить список жанров для прогрева')
+                return []
+
+        return [f'/api/v1/genres/{genre["id"]}/films' for genre in response.json()]
+
+    def _get_client(self) -> AsyncClient:
+        if isinstance(self.app, str):
+            return AsyncClient(base_url=self.app, headers={WARMUP_HEADER: '1'})
+        return AsyncClient(
+            transport=ASGITransport(app=self.app),
+            base_url='http://warmup',
+            headers={WARMUP_HEADER: '1'},
+        )
+
+    @staticmethod
+    async def _warm(client: AsyncClient, semaphore: asyncio.Semaphore, path: str) -> WarmResult:
+        async with semaphore:
+            try:
+                response = await client.get(path)
+            except HTTPError:
+                logger.exception(f'Не удалось прогреть {path}')
+                return WarmResult.FAILED
+
+        if response.status_code != HTTPStatus.OK:
+            logger.warning(f'Прогрев {path} вернул статус {response.status_code}')
+            return WarmResult.FAILED
+        # Декоратор кэша сообщает, была ли запись в кэше; ответ без заголовка не кэшируется
+        cache_status = response.headers.get(CACHE_STATUS_HEADER)
+        if cache_status == 'MISS':
+            return WarmResult.WRITTEN
+        if cache_status == 'HIT':
+            return WarmResult.CACHED
+        logger.warning(f'Ответ {path} не кэшируется')
+        return WarmResult.FAILED
+
+
+def get_default_paths(film_pages: int) -> list[str]:
+    """ Самые популярные страницы: список жанров и первые страницы фильмов по рейтингу """
+
+    return [
+        '/api/v1/genres',
+        *(f'/api/v1/films?sort=-imdb_rating&page_number={page}' for page in range(1, film_pages + 1)),
+    ]
+
+
+async def get_recorded_paths(redis_client: Redis, limit: int) -> list[str]:
+    """ Самые запрашиваемые страницы по статистике обращений """
+
+    paths = await redis_client.zrevrange(HITS_KEY, 0, limit - 1)
+    return [path.decode() if isinstance(path, bytes) else path for path in paths]
+
+
+def get_canonical_path(request: Request) -> str | None:
+    """
+    Страница запроса с отсортированными параметрами: запросы, различающиеся только порядком параметров,
+    попадают в одну запись кэша и должны учитываться вместе. None - страница не учитывается.
+    """
+
+    params = sorted((name, value) for name, value in request.query_params.multi_items() if value != '')
+    if any(name in UNTRACKED_PARAMS for name, _ in params):
+        return None
+    return f'{request.url.path}?{urlencode(params)}' if params else request.url.path
+
+
+async def record_hits(request: Request, call_next) -> Response:
+    """ Middleware: считает успешные GET-запросы к API для прогрева по статистике """
+
+    response = await call_next(request)
+    if (
+        request.method == 'GET'
+        and response.status_code == HTTPStatus.OK
+        and WARMUP_HEADER not in request.headers
+        and request.url.path.startswith('/api/v1/')
+        and (path := get_canonical_path(request))
+    ):
+        get_hit_counter().add(path)
+
+    return response
+
+
+async def warm_up_cache(app: ASGIApp | str, redis_client: Redis) -> WarmupReport:
+    """
+    Прогревает кэш по настройкам: заданные и популярные страницы, фильмы по жанрам.
+    :param app: ASGI-приложение или базовый URL запущенного API.
+    """
+
+    warmer = CacheWarmer(app, settings.warmup.concurrency)
+    paths = [*settings.warmup.paths, *get_default_paths(settings.warmup.film_pages)]
+
+    if settings.warmup.record_hits:
+        paths.extend(await get_recorded_paths(redis_client, settings.warmup.hits_limit))
+
+    if settings.warmup.genre_films:
+        paths.extend(await warmer.get_genre_films_paths(settings.warmup.genres_limit))
+
+    return await warmer.run(paths)
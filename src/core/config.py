@@ -1,4 +1,5 @@
 from logging import config as logging_config
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic import Field
@@ -8,6 +9,12 @@ from src.core.logger import LOGGING
 
 load_dotenv()
 
+# Имена профилей полнотекстового поиска из src/repositories/search_profiles.py
+SearchProfileName = Literal['all_fields', 'fields', 'exact_first']
+# Форматы записей кэша и кодеки сжатия из src/cache/cache_manager.py и src/cache/serializers/compressed.py
+CacheSerializerName = Literal['response', 'orjson', 'msgpack', 'json']
+CacheCompressionName = Literal['zlib', 'zstd', 'lz4']
+
 # Применяем настройки логирования
 logging_config.dictConfig(LOGGING)
 
@@ -15,12 +22,93 @@ logging_config.dictConfig(LOGGING)
 class RedisSettings(BaseSettings):
     host: str = Field(alias='REDIS_HOST', default='127.0.0.1')
     port: int = Field(alias='REDIS_PORT', default=6379)
+    max_connections: int = Field(alias='REDIS_MAX_CONNECTIONS', default=50)
+    socket_timeout: float = Field(alias='REDIS_SOCKET_TIMEOUT', default=1.0)
+    socket_connect_timeout: float = Field(alias='REDIS_SOCKET_CONNECT_TIMEOUT', default=1.0)
+    health_check_interval: int = Field(alias='REDIS_HEALTH_CHECK_INTERVAL', default=30)
+
+
+class CacheSettings(BaseSettings):
+    # In-process L1 кэш перед Redis
+    local_enabled: bool = Field(alias='CACHE_LOCAL_ENABLED', default=False)
+    local_max_size: int = Field(alias='CACHE_LOCAL_MAX_SIZE', default=32 * 1024 * 1024)
+    local_max_entries: int = Field(alias='CACHE_LOCAL_MAX_ENTRIES', default=10_000)
+    local_ttl: int = Field(alias='CACHE_LOCAL_TTL', default=30)
+    local_prefix_ttls: dict[str, int] = Field(alias='CACHE_LOCAL_PREFIX_TTLS', default={})
+    # Формат хранения записей: response, orjson, msgpack, json
+    serializer: CacheSerializerName = Field(alias='CACHE_SERIALIZER', default='response')
+    # Сжатие записей: zlib, zstd, lz4 или пусто - без сжатия
+    compression: CacheCompressionName | Literal[''] | None = Field(alias='CACHE_COMPRESSION', default=None)
+    compression_threshold: int = Field(alias='CACHE_COMPRESSION_THRESHOLD', default=1024)
+    # Схлопывание одновременных промахов (single-flight)
+    lock_timeout: float = Field(alias='CACHE_LOCK_TIMEOUT', default=5)
+    lock_wait: float = Field(alias='CACHE_LOCK_WAIT', default=2)
+    lock_poll_interval: float = Field(alias='CACHE_LOCK_POLL_INTERVAL', default=0.05)
+    # TTL негативных записей (ответов 404) в секундах, 0 - не кэшировать 404
+    negative_expire: int = Field(alias='CACHE_NEGATIVE_EXPIRE', default=30)
+    # Максимальный max-age в заголовке Cache-Control ответов из кэша
+    http_max_age: int = Field(alias='CACHE_HTTP_MAX_AGE', default=60)
+    # Размер пачки ключей при инвалидации по тегам
+    invalidate_batch_size: int = Field(alias='CACHE_INVALIDATE_BATCH_SIZE', default=500)
+    # Сколько ключей тега проверяется при каждой записи, чтобы убрать из тега истёкшие
+    tag_prune_batch_size: int = Field(alias='CACHE_TAG_PRUNE_BATCH_SIZE', default=100)
+
+
+class WarmupSettings(BaseSettings):
+    # Прогрев кэша при старте приложения и после загрузки данных ETL
+    on_startup: bool = Field(alias='CACHE_WARMUP_ON_STARTUP', default=False)
+    after_etl: bool = Field(alias='CACHE_WARMUP_AFTER_ETL', default=True)
+    # Адрес запущенного API, через который ETL прогревает кэш; пусто - ETL кэш не прогревает
+    api_url: str | None = Field(alias='CACHE_WARMUP_API_URL', default=None)
+    # Дополнительные страницы для прогрева, например /api/v1/films?genre=<id>
+    paths: list[str] = Field(alias='CACHE_WARMUP_PATHS', default=[])
+    # Количество первых страниц списка фильмов по рейтингу
+    film_pages: int = Field(alias='CACHE_WARMUP_FILM_PAGES', default=5)
+    # Прогревать первые страницы фильмов каждого жанра
+    genre_films: bool = Field(alias='CACHE_WARMUP_GENRE_FILMS', default=True)
+    genres_limit: int = Field(alias='CACHE_WARMUP_GENRES_LIMIT', default=50)
+    concurrency: int = Field(alias='CACHE_WARMUP_CONCURRENCY', default=8)
+    # Запись статистики обращений и прогрев самых запрашиваемых страниц
+    record_hits: bool = Field(alias='CACHE_WARMUP_RECORD_HITS', default=False)
+    hits_limit: int = Field(alias='CACHE_WARMUP_HITS_LIMIT', default=100)
+    # Период сброса статистики обращений из памяти процесса в Redis в секундах
+    hits_flush_interval: float = Field(alias='CACHE_WARMUP_HITS_FLUSH_INTERVAL', default=10)
+
+
+class RankingsSettings(BaseSettings):
+    # Рейтинги фильмов по жанрам в Redis, строятся ETL после загрузки данных
+    enabled: bool = Field(alias='GENRE_RANKINGS_ENABLED', default=False)
+    # Период перестроения рейтингов приложением в секундах, 0 - только из ETL
+    refresh_interval: float = Field(alias='GENRE_RANKINGS_REFRESH_INTERVAL', default=0)
+
+
+class FilmColumnsSettings(BaseSettings):
+    # Колонки фильмов в памяти для списков с сортировкой по рейтингу и фильтром по жанру
+    enabled: bool = Field(alias='FILM_COLUMNS_ENABLED', default=False)
+    # Период проверки версии данных в секундах: после загрузки ETL колонки перестраиваются
+    refresh_interval: float = Field(alias='FILM_COLUMNS_REFRESH_INTERVAL', default=30)
+
+
+class SearchSettings(BaseSettings):
+    # Профили полнотекстового поиска, по умолчанию прежний нечёткий поиск по всем полям
+    film_profile: SearchProfileName = Field(alias='SEARCH_FILM_PROFILE', default='all_fields')
+    person_profile: SearchProfileName = Field(alias='SEARCH_PERSON_PROFILE', default='all_fields')
 
 
 class ElasticSettings(BaseSettings):
     host: str = Field(alias='ELASTIC_HOST', default='127.0.0.1')
     port: int = Field(alias='ELASTIC_PORT', default=9200)
     protocol: str = Field(alias='ELASTIC_SCHEMA', default='http')
+    # Время жизни point-in-time для курсорной пагинации, например 1m; пусто - без PIT
+    pit_keep_alive: str | None = Field(alias='ELASTIC_PIT_KEEP_ALIVE', default=None)
+    # Объединение одновременных поисков в _msearch: размер пачки и ожидание в секундах
+    msearch_enabled: bool = Field(alias='ELASTIC_MSEARCH_ENABLED', default=False)
+    msearch_max_batch_size: int = Field(alias='ELASTIC_MSEARCH_MAX_BATCH_SIZE', default=20)
+    msearch_max_wait: float = Field(alias='ELASTIC_MSEARCH_MAX_WAIT', default=0.002)
+    # Кэш выдачи на шардах для списков без полнотекстового поиска
+    request_cache: bool = Field(alias='ELASTIC_REQUEST_CACHE', default=True)
+    # Постоянный preference направляет одинаковые запросы на одни копии шардов, где лежит их кэш; пусто - любые копии
+    preference: str | None = Field(alias='ELASTIC_PREFERENCE', default='cinema-api')
 
     @property
     def url(self) -> str:
@@ -29,7 +117,21 @@ class ElasticSettings(BaseSettings):
 
 class Settings(BaseSettings):
     project_name: str = Field(alias='PROJECT_NAME', default='movies')
+    # Максимальный размер страницы, большие значения page_size урезаются до него
+    max_page_size: int = Field(alias='MAX_PAGE_SIZE', default=100)
+    # Максимальное количество id в batch-запросе
+    max_batch_size: int = Field(alias='MAX_BATCH_SIZE', default=100)
+    # Максимальное количество подсказок автодополнения
+    max_autocomplete_size: int = Field(alias='MAX_AUTOCOMPLETE_SIZE', default=20)
+    # Хранилище данных API: elastic или memory - каталог в памяти процесса, загруженный из дампов ETL
+    backend: Literal['elastic', 'memory'] = Field(alias='REPOSITORY_BACKEND', default='elastic')
+    memory_dumps_dir: str = Field(alias='MEMORY_DUMPS_DIR', default='etl/dumps')
     redis: RedisSettings = RedisSettings()
+    cache: CacheSettings = CacheSettings()
+    warmup: WarmupSettings = WarmupSettings()
+    rankings: RankingsSettings = RankingsSettings()
+    film_columns: FilmColumnsSettings = FilmColumnsSettings()
+    search: SearchSettings = SearchSettings()
     elastic: ElasticSettings = ElasticSettings()
 
 
@@ -1,10 +1,26 @@
 from typing import Optional
 
-from redis.asyncio import Redis
+from redis.asyncio import ConnectionPool, Redis
+
+from src.core.config import settings
 
 redis: Optional[Redis] = None
 
 
+def create_redis() -> Redis:
+    """ Создаёт клиент Redis с общим пулом соединений. Пул закрывается вместе с клиентом """
+
+    pool = ConnectionPool(
+        host=settings.redis.host,
+        port=settings.redis.port,
+        max_connections=settings.redis.max_connections,
+        socket_timeout=settings.redis.socket_timeout,
+        socket_connect_timeout=settings.redis.socket_connect_timeout,
+        health_check_interval=settings.redis.health_check_interval,
+    )
+    return Redis.from_pool(pool)
+
+
 # Функция понадобится при внедрении зависимостей
 async def get_redis() -> Redis:
     return redis
@@ -1,18 +1,84 @@
-from fastapi import Query
+from functools import lru_cache
+from http import HTTPStatus
 
-from src.models.base import BasePaginationParams
+from elasticsearch import AsyncElasticsearch
+from fastapi import HTTPException, Query
+
+from src.cache.keys import normalize_search_query
+from src.core.config import settings
+from src.models.base import AutocompleteParams, BasePaginationParams, Cursor
+from src.repositories.elastic import SEARCH_FILTER_PATH
+from src.repositories.memory.catalog import MemoryCatalog
+from src.repositories.msearch import SearchDispatcher
 
 
 def get_pagination_params(
         page_size: int = Query(12, description='Количество записей на страницу'),
         page_number: int = Query(1, description='Номер текущей страницы'),
+        cursor: str | None = Query(
+            None,
+            description='Курсор следующей страницы из заголовка X-Next-Cursor, при передаче page_number не учитывается',
+        ),
 ) -> BasePaginationParams:
     """ Получает параметры пагинации """
 
-    limit = page_size if page_size > 0 else 12
+    limit = min(page_size, settings.max_page_size) if page_size > 0 else 12
     offset = (page_number - 1) * limit if page_number > 1 else 0
 
+    if cursor:
+        # Проверяем курсор заранее, чтобы битый курсор давал 400, а не ошибку Elasticsearch
+        Cursor.decode(cursor)
+
     return BasePaginationParams(
         limit=limit,
         offset=offset,
+        cursor=cursor or None,
     )
+
+
+def get_autocomplete_params(
+        prefix: str = Query(..., min_length=1, max_length=100, description='Начало названия или имени'),
+        page_size: int = Query(10, description='Количество подсказок'),
+) -> AutocompleteParams:
+    """ Получает параметры подсказок; префикс нормализуется, чтобы одинаковый ввод давал одну запись кэша """
+
+    return AutocompleteParams(
+        prefix=normalize_search_query(prefix),
+        limit=min(page_size, settings.max_autocomplete_size) if page_size > 0 else 10,
+    )
+
+
+def get_batch_ids(
+        ids: list[str] = Query(..., description='Список id, можно передать несколько раз: ?ids=1&ids=2'),
+) -> list[str]:
+    """ Получает список id для batch-запроса без повторов, в исходном порядке """
+
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Too many ids, maximum is {settings.max_batch_size}',
+        )
+
+    return ids
+
+
+@lru_cache()
+def get_search_dispatcher(elastic: AsyncElasticsearch) -> SearchDispatcher | None:
+    """ Общий для всех репозиториев диспетчер _msearch, если он включён в настройках """
+
+    if not settings.elastic.msearch_enabled:
+        return None
+
+    return SearchDispatcher(
+        elastic,
+        max_batch_size=settings.elastic.msearch_max_batch_size,
+        max_wait=settings.elastic.msearch_max_wait,
+        filter_path=SEARCH_FILTER_PATH,
+    )
+
+
+@lru_cache()
+def get_memory_catalog() -> MemoryCatalog:
+    """ Каталог в памяти процесса, загружается из дампов один раз """
+    return MemoryCatalog.load(settings.memory_dumps_dir)
@@ -3,12 +3,18 @@ from typing import Annotated
 
 from elasticsearch import AsyncElasticsearch
 from fastapi import Depends, Query
+from redis.asyncio import Redis
 
+from src.core.config import settings
 from src.db.elastic import get_elastic
-from src.dependencies.base import get_pagination_params
+from src.db.redis import get_redis
+from src.dependencies.base import get_memory_catalog, get_pagination_params, get_search_dispatcher
 from src.models.base import BasePaginationParams
-from src.models.film import FilmSearchParams, FilmQueryParams, FilmSortParams
+from src.models.film import FilmFacetParams, FilmSearchParams, FilmQueryParams, FilmSortParams
+from src.repositories.film.columns import FilmColumnIndex
 from src.repositories.film.elastic import ElasticFilmRepository
+from src.repositories.film.memory import MemoryFilmRepository
+from src.repositories.search_profiles import FILM_SEARCH_PROFILES
 from src.serializers.films.elastic import ElasticFilmSerializer
 from src.services.film import FilmService
 
@@ -24,11 +30,20 @@ def get_film_list_params(
     return FilmQueryParams(
         limit=pagination.limit,
         offset=pagination.offset,
+        cursor=pagination.cursor,
         sort=sorting,
         genre=genre,
     )
 
 
+def get_film_facet_params(
+        genre: str | None = Query(None, description='Параметр фильтрации по id жанра'),
+) -> FilmFacetParams:
+    """ Получает query параметры фильтрации для фасетов фильмов """
+
+    return FilmFacetParams(genre=genre)
+
+
 def get_film_search_params(
         pagination: Annotated[BasePaginationParams, Depends(get_pagination_params)],
         query: str | None = Query(None, description='Строка поиска по названию фильма'),
@@ -38,14 +53,37 @@ def get_film_search_params(
     return FilmSearchParams(
         limit=pagination.limit,
         offset=pagination.offset,
+        cursor=pagination.cursor,
         query=query,
     )
 
 
+@lru_cache()
+def get_film_columns(redis: Redis) -> FilmColumnIndex | None:
+    """ Общий снимок колонок фильмов, если он включён в настройках """
+
+    if not settings.film_columns.enabled:
+        return None
+
+    return FilmColumnIndex(redis)
+
+
 @lru_cache()
 def get_film_service(
         elastic: AsyncElasticsearch = Depends(get_elastic),
+        redis: Redis = Depends(get_redis),
 ) -> FilmService:
-    repository = ElasticFilmRepository(elastic)
     serializer = ElasticFilmSerializer()
+    if settings.backend == 'memory':
+        return FilmService(repository=MemoryFilmRepository(get_memory_catalog()), serializer=serializer)
+
+    repository = ElasticFilmRepository(
+        elastic,
+        pit_keep_alive=settings.elastic.pit_keep_alive,
+        dispatcher=get_search_dispatcher(elastic),
+        request_cache=settings.elastic.request_cache,
+        preference=settings.elastic.preference,
+        search_profile=FILM_SEARCH_PROFILES[settings.search.film_profile],
+        columns=get_film_columns(redis),
+    )
     return FilmService(repository=repository, serializer=serializer)
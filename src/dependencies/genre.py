@@ -2,9 +2,15 @@ from functools import lru_cache
 
 from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
+from redis.asyncio import Redis
 
+from src.core.config import settings
 from src.db.elastic import get_elastic
+from src.db.redis import get_redis
+from src.dependencies.base import get_memory_catalog, get_search_dispatcher
 from src.repositories.genre.elastic import ElasticGenreRepository
+from src.repositories.genre.memory import MemoryGenreRepository
+from src.repositories.genre.rankings import GenreRankings
 from src.serializers.genre.elastic import ElasticGenreSerializer
 from src.services.genre import GenreService
 
@@ -12,7 +18,18 @@ from src.services.genre import GenreService
 @lru_cache()
 def get_genre_service(
         elastic: AsyncElasticsearch = Depends(get_elastic),
+        redis: Redis = Depends(get_redis),
 ) -> GenreService:
-    repository = ElasticGenreRepository(elastic)
     serializer = ElasticGenreSerializer()
+    if settings.backend == 'memory':
+        return GenreService(MemoryGenreRepository(get_memory_catalog()), serializer)
+
+    repository = ElasticGenreRepository(
+        elastic,
+        pit_keep_alive=settings.elastic.pit_keep_alive,
+        dispatcher=get_search_dispatcher(elastic),
+        request_cache=settings.elastic.request_cache,
+        preference=settings.elastic.preference,
+        rankings=GenreRankings(redis) if settings.rankings.enabled else None,
+    )
     return GenreService(repository, serializer)
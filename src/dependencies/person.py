@@ -4,11 +4,14 @@ from typing import Annotated
 from elasticsearch import AsyncElasticsearch
 from fastapi import Depends, Query
 
+from src.core.config import settings
 from src.db.elastic import get_elastic
-from src.dependencies.base import get_pagination_params
+from src.dependencies.base import get_memory_catalog, get_pagination_params, get_search_dispatcher
 from src.models.base import BasePaginationParams
 from src.models.person import PersonSearchParams
 from src.repositories.person.elastic import ElasticPersonRepository
+from src.repositories.person.memory import MemoryPersonRepository
+from src.repositories.search_profiles import PERSON_SEARCH_PROFILES
 from src.serializers.person.elastic import ElasticPersonSerializer
 from src.services.person import PersonService
 
@@ -22,6 +25,7 @@ def get_person_search_params(
     return PersonSearchParams(
         limit=pagination.limit,
         offset=pagination.offset,
+        cursor=pagination.cursor,
         query=query,
     )
 
@@ -30,6 +34,16 @@ def get_person_search_params(
 def get_person_service(
         elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> PersonService:
-    repository = ElasticPersonRepository(elastic)
     serializer = ElasticPersonSerializer()
+    if settings.backend == 'memory':
+        return PersonService(MemoryPersonRepository(get_memory_catalog()), serializer)
+
+    repository = ElasticPersonRepository(
+        elastic,
+        pit_keep_alive=settings.elastic.pit_keep_alive,
+        dispatcher=get_search_dispatcher(elastic),
+        request_cache=settings.elastic.request_cache,
+        preference=settings.elastic.preference,
+        search_profile=PERSON_SEARCH_PROFILES[settings.search.person_profile],
+    )
     return PersonService(repository, serializer)
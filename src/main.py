@@ -1,23 +1,54 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from elasticsearch import AsyncElasticsearch
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
-from redis.asyncio import Redis
 
 from src.api.v1 import films, genres, persons
+from src.cache.cache_manager import get_redis_cache_manager
+from src.cache.managers.tiered import TieredCacheManager
+from src.cache.warmup import get_hit_counter, record_hits, warm_up_cache
 from src.core.config import settings
 from src.db import elastic, redis
+from src.dependencies.base import get_memory_catalog
+from src.dependencies.film import get_film_columns
+from src.repositories.film.columns import refresh_film_columns
+from src.repositories.genre.rankings import GenreRankings, refresh_rankings
 
 
 @asynccontextmanager
 async def lifespan(application: FastAPI):
     # Подключаемся к базам при старте сервера
-    redis.redis = Redis(host=settings.redis.host, port=settings.redis.port)
+    redis.redis = redis.create_redis()
+    cache_manager = get_redis_cache_manager()
+    cache_manager.redis = redis.redis
     elastic.es = AsyncElasticsearch(hosts=[settings.elastic.url])
+    if settings.backend == 'memory':
+        # Загружаем каталог до приёма запросов, чтобы первый запрос не ждал построения индексов
+        get_memory_catalog()
+    # Прогреваем кэш в фоне, чтобы не задерживать старт сервера
+    tasks = []
+    if settings.warmup.on_startup:
+        tasks.append(asyncio.create_task(warm_up_cache(application, redis.redis)))
+    if isinstance(cache_manager, TieredCacheManager):
+        tasks.append(asyncio.create_task(cache_manager.listen_invalidations()))
+    if settings.warmup.record_hits:
+        tasks.append(asyncio.create_task(get_hit_counter().run(redis.redis, settings.warmup.hits_flush_interval)))
+    if settings.backend == 'elastic' and settings.rankings.enabled and settings.rankings.refresh_interval:
+        rankings = GenreRankings(redis.redis)
+        tasks.append(asyncio.create_task(refresh_rankings(rankings, elastic.es, settings.rankings.refresh_interval)))
+    if settings.backend == 'elastic' and (columns := get_film_columns(redis.redis)) is not None:
+        interval = settings.film_columns.refresh_interval
+        tasks.append(asyncio.create_task(refresh_film_columns(columns, elastic.es, interval)))
     yield
+    for task in tasks:
+        task.cancel()
+    # Дожидаемся завершения фоновых задач, чтобы они не обращались к уже закрытым клиентам
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await cache_manager.close()
     # Отключаемся от баз при выключении сервера
-    await redis.redis.close()
+    await redis.redis.aclose()
     await elastic.es.close()
 
 
@@ -33,3 +64,6 @@ app = FastAPI(
 app.include_router(films.router, prefix='/api/v1/films', tags=['films'])
 app.include_router(genres.router, prefix='/api/v1/genres', tags=['genres'])
 app.include_router(persons.router, prefix='/api/v1/persons', tags=['persons'])
+
+if settings.warmup.record_hits:
+    app.middleware('http')(record_hits)
@@ -1,12 +1,18 @@
+import base64
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import Type
+from http import HTTPStatus
+from typing import Any, Generic, Iterable, Type, TypeVar
 
+import orjson
 from fastapi import HTTPException, Query
 from pydantic import BaseModel, Field
 
 
+T = TypeVar('T')
+
+
 class SortOrder(str, Enum):
     ASC = 'asc'
     DESC = 'desc'
@@ -47,6 +53,12 @@ class BaseSortParams(ABC):
         return f'{self.field.value}, {self.order.value}'
 
 
+class AutocompleteParams(BaseModel):
+    """ Параметры подсказок по префиксу """
+    prefix: str
+    limit: int
+
+
 class BasePaginationParams(BaseModel):
     """ Базовый класс параметров пагинации """
     limit: int = Field(
@@ -55,3 +67,48 @@ class BasePaginationParams(BaseModel):
     offset: int = Field(
         Query(alias='page_number', ge=0),
     )
+    cursor: str | None = None
+
+
+@dataclass
+class Cursor:
+    """
+    Курсор постраничной выдачи: значения сортировки последней записи страницы
+    и, если включён, id point-in-time, на котором выполняется выдача.
+    Клиенту передаётся как непрозрачная base64-строка.
+    """
+    search_after: list[Any]
+    pit_id: str | None = None
+
+    def encode(self) -> str:
+        data = orjson.dumps([self.search_after, self.pit_id])
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, cursor: str) -> 'Cursor':
+        try:
+            search_after, pit_id = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+
+        if not isinstance(search_after, list) or not (pit_id is None or isinstance(pit_id, str)):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+
+        return cls(search_after=search_after, pit_id=pit_id)
+
+
+class Page(list, Generic[T]):
+    """
+    Страница результатов: список записей и курсор следующей страницы.
+    max_age - сколько секунд страницу можно хранить в кэше: курсор с point-in-time живёт не дольше его keep_alive.
+    """
+
+    def __init__(self, items: Iterable[T] = (), next_cursor: str | None = None, max_age: float | None = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+        self.max_age = max_age
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """ HTTP-заголовки страницы, сохраняются в кэше вместе с телом ответа """
+        return {'X-Next-Cursor': self.next_cursor} if self.next_cursor else {}
@@ -30,6 +30,29 @@ class Film(BaseModel):
         from_attributes = True
 
 
+class FilmSuggestion(BaseModel):
+    id: UUID
+    title: str
+
+
+class GenreFacet(BaseModel):
+    id: UUID
+    name: str | None
+    count: int
+
+
+class RatingFacet(BaseModel):
+    rating: float
+    count: int
+
+
+class FilmFacets(BaseModel):
+    """ Количество фильмов по жанрам и гистограмма рейтинга imdb """
+    total: int
+    genres: list[GenreFacet]
+    ratings: list[RatingFacet]
+
+
 class FilmSortField(BaseSortField):
     """ Enum полей доступных для сортировки фильмов """
     IMDB_RATING = 'imdb_rating'
@@ -56,3 +79,7 @@ class FilmSearchParams(BasePaginationParams):
 
     class Config:
         arbitrary_types_allowed = True
+
+
+class FilmFacetParams(BaseModel):
+    genre: str | None
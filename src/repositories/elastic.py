@@ -0,0 +1,297 @@
+import re
+from functools import lru_cache, partial
+from http import HTTPStatus
+from typing import Any, Type, get_args
+
+from elasticsearch import AsyncElasticsearch, NotFoundError
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from src.models.base import AutocompleteParams, BasePaginationParams, Cursor, Page
+from src.repositories.loader import DocumentLoader
+from src.repositories.msearch import SearchDispatcher
+from src.repositories.queries import SearchQuery, build_autocomplete_query, build_search_query
+from src.repositories.search_profiles import SearchProfile
+
+# Поле-тайбрейкер: делает порядок выдачи однозначным, без него search_after может пропускать записи
+TIEBREAKER_SORT = {'id': 'asc'}
+# Значение неявного тайбрейкера _shard_doc, который Elasticsearch добавляет к сортировке запросов с PIT.
+# Записи уникальны по id, поэтому для курсора без PIT подходит любое значение - берём максимальное
+MAX_SHARD_DOC = 2 ** 63 - 1
+# Поля сортировки с числовыми значениями; значения сортировки остальных полей - строки
+NUMERIC_SORT_FIELDS = {'_score', 'imdb_rating'}
+# Части ответа Elasticsearch, которые читают репозитории; остальные метаданные не передаются по сети
+SEARCH_FILTER_PATH = ['hits.hits._source', 'hits.hits.sort', 'pit_id']
+MGET_FILTER_PATH = ['docs._id', 'docs._source', 'docs.found']
+AGGREGATION_FILTER_PATH = ['hits.total.value', 'aggregations']
+# Единицы времени Elasticsearch, в которых задаётся keep_alive point-in-time, в секундах
+TIME_UNITS = {'d': 86400, 'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+
+class BaseElasticRepository:
+    """
+    Общая логика репозиториев Elasticsearch: постраничная выдача по номеру страницы (from/size)
+    или по курсору (search_after), при необходимости закреплённая за point-in-time.
+    PIT открывается на первой странице курсорной выдачи и закрывается на последней.
+    Из документов запрашиваются только поля, нужные модели ответа.
+    Поиски без PIT могут объединяться в _msearch через общий диспетчер,
+    одновременные запросы документов по id - в один mget.
+    Кэшируемые запросы отправляются с request_cache и постоянным preference:
+    одинаковые запросы попадают на одни и те же копии шардов и берут выдачу из их кэша.
+    """
+
+    def __init__(
+            self,
+            elastic: AsyncElasticsearch,
+            pit_keep_alive: str | None = None,
+            dispatcher: SearchDispatcher | None = None,
+            request_cache: bool = True,
+            preference: str | None = None,
+    ):
+        self.elastic = elastic
+        self.pit_keep_alive = pit_keep_alive
+        self.pit_max_age = parse_time_value(pit_keep_alive) if pit_keep_alive else None
+        self.dispatcher = dispatcher
+        self.request_cache = request_cache
+        self.preference = preference
+        self._loaders: dict[tuple[str, Type[BaseModel]], DocumentLoader] = {}
+
+    async def _search_page(
+            self,
+            index: str,
+            query: SearchQuery,
+            params: BasePaginationParams,
+            model: Type[BaseModel],
+            sort: list[Any] | None = None,
+            pit: bool = True,
+    ) -> Page[dict[str, Any]]:
+        """
+        Выполняет поиск одной страницы.
+        :param query: запрос без пагинации и сортировки.
+        :param model: модель ответа, по её полям ограничивается _source.
+        :param sort: сортировка выдачи, к ней всегда добавляется сортировка по id.
+        :param pit: можно ли открыть point-in-time; не нужен запросам, выдачу которых не листают.
+        :return: страница hits с курсором следующей страницы, если она может существовать.
+        """
+
+        sort = [*(sort or []), TIEBREAKER_SORT]
+        body = {**query.compile(), 'size': params.limit, 'sort': sort, '_source': get_source_fields(model)}
+
+        cursor = Cursor.decode(params.cursor) if params.cursor else None
+        if cursor is None:
+            body['from'] = params.offset
+        elif not is_valid_search_after(cursor.search_after, sort):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+        else:
+            body['search_after'] = cursor.search_after
+
+        try:
+            response = await self._search(index, body, cursor, self._get_search_params(query), pit)
+        except NotFoundError:
+            return Page()
+
+        # При пустой выдаче filter_path убирает из ответа и сам ключ hits
+        hits = response.get('hits', {}).get('hits', [])
+        pit_id = response.get('pit_id')
+        if not hits or len(hits) < params.limit:
+            # Последняя страница: следующей нет, point-in-time больше не нужен
+            if pit_id is not None:
+                await self._close_pit(pit_id)
+            return Page(hits)
+
+        return Page(hits, Cursor(hits[-1]['sort'], pit_id).encode(), self.pit_max_age if pit_id else None)
+
+    async def _search_text(
+            self,
+            index: str,
+            search: str | None,
+            params: BasePaginationParams,
+            model: Type[BaseModel],
+            profile: SearchProfile,
+    ) -> Page[dict[str, Any]]:
+        """
+        Полнотекстовый поиск по профилю, выдача по релевантности.
+        В режиме exact_first нечёткий запрос выполняется, только если точный не нашёл ничего:
+        пустая не первая страница точного запроса проверяется запросом его первой записи,
+        чтобы отличить конец точной выдачи от перехода по страницам нечёткой.
+        """
+
+        sort = ['_score']
+        if not profile.exact_first or not search:
+            return await self._search_page(index, build_search_query(search, profile), params, model, sort)
+
+        exact = build_search_query(search, profile, fuzzy=False)
+        if page := await self._search_page(index, exact, params, model, sort):
+            return page
+
+        if params.offset or params.cursor:
+            if await self._search_page(index, exact, BasePaginationParams(limit=1, offset=0), model, sort, pit=False):
+                return page
+
+        return await self._search_page(index, build_search_query(search, profile), params, model, sort)
+
+    async def _autocomplete(
+            self,
+            index: str,
+            field_name: str,
+            params: AutocompleteParams,
+            model: Type[BaseModel],
+            sort: list[Any],
+    ) -> list[dict[str, Any]]:
+        """ Подсказки по префиксу поля с edge n-gram; без пагинации, только первые params.limit документов """
+
+        if not params.prefix:
+            return []
+
+        query = build_autocomplete_query(field_name, params.prefix)
+        params = BasePaginationParams(limit=params.limit, offset=0)
+        return list(await self._search_page(index, query, params, model, sort, pit=False))
+
+    async def _aggregate(self, index: str, query: SearchQuery, aggs: dict[str, Any]) -> dict[str, Any]:
+        """
+        Выполняет агрегации без выдачи документов.
+        Запрос идёт мимо диспетчера _msearch: его filter_path оставляет только hits.
+        :return: ответ с hits.total и aggregations, пустой - если индекса нет.
+        """
+
+        body = {**query.compile(), 'size': 0, 'track_total_hits': True, 'aggs': aggs}
+        try:
+            return await self.elastic.search(
+                index=index,
+                body=body,
+                filter_path=AGGREGATION_FILTER_PATH,
+                **self._get_search_params(query),
+            )
+        except NotFoundError:
+            return {}
+
+    async def _get_by_id(self, index: str, doc_id: str, model: Type[BaseModel]) -> dict[str, Any] | None:
+        """ Получает документ по id с полями, нужными модели ответа """
+
+        if (loader := self._loaders.get((index, model))) is None:
+            loader = self._loaders[(index, model)] = DocumentLoader(partial(self._get_many, index, model=model))
+        return await loader.load(doc_id)
+
+    async def _get_many(self, index: str, doc_ids: list[str], model: Type[BaseModel]) -> list[dict[str, Any]]:
+        """ Получает найденные документы по списку id одним запросом mget """
+        try:
+            response = await self.elastic.mget(
+                index=index,
+                ids=doc_ids,
+                source_includes=get_source_fields(model),
+                filter_path=MGET_FILTER_PATH,
+            )
+        except NotFoundError:
+            return []
+
+        return [doc for doc in response.get('docs', []) if doc.get('found')]
+
+    def _get_search_params(self, query: SearchQuery) -> dict[str, Any]:
+        """ Параметры shard request cache для запроса, выдача которого зависит только от индекса """
+
+        if not query.cacheable or not self.request_cache:
+            return {}
+
+        params = {'request_cache': True}
+        if self.preference:
+            params['preference'] = self.preference
+        return params
+
+    async def _search(
+            self,
+            index: str,
+            body: dict[str, Any],
+            cursor: Cursor | None,
+            search_params: dict[str, Any],
+            pit: bool = True,
+    ) -> dict[str, Any]:
+        # Point-in-time открывается на первой странице и дальше передаётся в курсоре;
+        # выдача по номеру страницы (from > 0) остаётся без изменений
+        if not self.pit_keep_alive or not pit or (cursor is None and body.get('from')):
+            return await self._search_index(index, self._without_shard_doc(body), search_params)
+
+        pit_id = cursor.pit_id if cursor is not None else None
+        if pit_id is None:
+            pit_id = (await self.elastic.open_point_in_time(index=index, keep_alive=self.pit_keep_alive))['id']
+
+        pit_body = {**body, 'pit': {'id': pit_id, 'keep_alive': self.pit_keep_alive}}
+        if 'search_after' in body and len(body['search_after']) == len(body['sort']):
+            pit_body['search_after'] = [*body['search_after'], MAX_SHARD_DOC]
+
+        # Запрос с PIT не принимает preference, а его выдача привязана к снимку, поэтому без кэша шардов
+        try:
+            return await self.elastic.search(body=pit_body, filter_path=SEARCH_FILTER_PATH)
+        except NotFoundError:
+            # Point-in-time истёк - продолжаем выдачу по текущему состоянию индекса
+            return await self._search_index(index, self._without_shard_doc(body), search_params)
+
+    async def _close_pit(self, pit_id: str) -> None:
+        try:
+            await self.elastic.close_point_in_time(id=pit_id)
+        except NotFoundError:
+            # Point-in-time уже истёк или закрыт выдачей другого клиента
+            pass
+
+    async def _search_index(self, index: str, body: dict[str, Any], search_params: dict[str, Any]) -> dict[str, Any]:
+        if self.dispatcher is not None:
+            return await self.dispatcher.search(index, body, **search_params)
+        return await self.elastic.search(index=index, body=body, filter_path=SEARCH_FILTER_PATH, **search_params)
+
+    @staticmethod
+    def _without_shard_doc(body: dict[str, Any]) -> dict[str, Any]:
+        """ Убирает из search_after значение _shard_doc, оставшееся от выдачи с PIT """
+
+        if 'search_after' not in body:
+            return body
+        return {**body, 'search_after': body['search_after'][:len(body['sort'])]}
+
+
+def parse_time_value(value: str) -> float:
+    """ Переводит значение времени Elasticsearch (30s, 1m, 500ms) в секунды """
+
+    match = re.fullmatch(r'(\d+)(d|h|m|s|ms)', value.strip())
+    if match is None:
+        raise ValueError(f'Invalid time value: {value}')
+    return int(match.group(1)) * TIME_UNITS[match.group(2)]
+
+
+def is_valid_search_after(search_after: list[Any], sort: list[Any]) -> bool:
+    """
+    Проверяет, что значения курсора подходят к сортировке: по одному значению её типа на каждое поле
+    и, для курсора выдачи с PIT, целое значение _shard_doc в конце. Иначе Elasticsearch ответит ошибкой.
+    """
+
+    if len(search_after) not in (len(sort), len(sort) + 1):
+        return False
+
+    for value, field in zip(search_after, sort):
+        field_name = field if isinstance(field, str) else next(iter(field))
+        expected = (int, float) if field_name in NUMERIC_SORT_FIELDS else str
+        if isinstance(value, bool) or not isinstance(value, expected):
+            return False
+
+    shard_doc = search_after[len(sort):]
+    return not shard_doc or (isinstance(shard_doc[0], int) and not isinstance(shard_doc[0], bool))
+
+
+@lru_cache()
+def get_source_fields(model: Type[BaseModel]) -> tuple[str, ...]:
+    """ Поля _source, из которых собирается модель; вложенные модели раскрываются в пути через точку """
+
+    fields = []
+    for name, field in model.model_fields.items():
+        name = field.alias or name
+        if (nested := _get_nested_model(field.annotation)) is not None:
+            fields.extend(f'{name}.{nested_field}' for nested_field in get_source_fields(nested))
+        else:
+            fields.append(name)
+    return tuple(fields)
+
+
+def _get_nested_model(annotation: Any) -> Type[BaseModel] | None:
+    """ Модель, вложенная в аннотацию поля: Model, list[Model], Model | None """
+
+    for candidate in (annotation, *get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
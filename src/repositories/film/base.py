@@ -1,19 +1,32 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
-from src.models.film import FilmQueryParams, FilmSearchParams
+from src.models.base import AutocompleteParams, Page
+from src.models.film import FilmFacetParams, FilmQueryParams, FilmSearchParams
 
 
 class BaseFilmRepository(ABC):
 
     @abstractmethod
-    async def all(self, params: FilmQueryParams) -> list[dict[str, Any]]:
+    async def all(self, params: FilmQueryParams) -> Page[dict[str, Any]]:
         ...
 
     @abstractmethod
-    async def search(self, params: FilmSearchParams) -> list[dict[str, Any]]:
+    async def search(self, params: FilmSearchParams) -> Page[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_facets(self, params: FilmFacetParams) -> dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def autocomplete(self, params: AutocompleteParams) -> list[dict[str, Any]]:
         ...
 
     @abstractmethod
     async def get_by_id(self, film_id: str) -> dict[str, Any] | None:
         ...
+
+    @abstractmethod
+    async def get_many(self, film_ids: list[str]) -> list[dict[str, Any]]:
+        ...
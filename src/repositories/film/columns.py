@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from http import HTTPStatus
+from typing import Any, Iterable
+
+import numpy as np
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_scan
+from fastapi import HTTPException
+from redis.asyncio import Redis
+
+from src.constants.elastic import ElasticIndexNames
+from src.models.base import Cursor, Page, SortOrder
+from src.models.film import FilmQueryParams
+
+logger = logging.getLogger(__name__)
+
+# Версия данных фильмов: ETL увеличивает её после загрузки, приложение перестраивает колонки при изменении
+VERSION_KEY = 'columns:films:version'
+
+
+class FilmColumns:
+    """
+    Колоночный снимок индекса фильмов для списков без полнотекстового поиска.
+    Хранит массивы id и рейтингов, порядки фильмов для каждой сортировки и по маске принадлежности на жанр;
+    страница выбирается векторными операциями, документы страницы запрашиваются отдельно.
+    Рейтинг хранится во float32, как поле float в индексе: значения курсора совпадают с выдачей Elasticsearch,
+    поэтому курсоры переходят между колонками и индексом в обе стороны.
+    """
+
+    def __init__(self, films: Iterable[dict[str, Any]]):
+        films = list(films)
+        self.ids = np.array([film['id'] for film in films], dtype=str)
+        self.ratings = np.array([film.get('imdb_rating') or 0 for film in films], dtype=np.float32)
+
+        genre_films = {}
+        for i, film in enumerate(films):
+            for genre in film.get('genres') or []:
+                genre_films.setdefault(genre['id'], []).append(i)
+        self.genres: dict[str, np.ndarray] = {}
+        for genre_id, indexes in genre_films.items():
+            mask = np.zeros(len(films), dtype=bool)
+            mask[indexes] = True
+            self.genres[genre_id] = mask
+
+        # Порядки, как у сортировки в индексе: по рейтингу, при равном рейтинге - по id
+        self._orders = {
+            None: np.argsort(self.ids, kind='stable'),
+            SortOrder.DESC: np.lexsort((self.ids, -self.ratings)),
+            SortOrder.ASC: np.lexsort((self.ids, self.ratings)),
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get_page(self, params: FilmQueryParams) -> Page[str] | None:
+        """ id фильмов страницы в порядке выдачи; None, если жанра нет в снимке и ответить должен индекс """
+
+        if params.genre and params.genre not in self.genres:
+            return None
+
+        sort = params.sort.order if params.sort else None
+        order = self._orders[sort]
+        if params.genre:
+            order = order[self.genres[params.genre][order]]
+
+        start = self._get_start(order, sort, params.cursor) if params.cursor else params.offset
+        page = order[start:start + params.limit]
+
+        next_cursor = None
+        if len(page) == params.limit:
+            last = page[-1]
+            search_after = [str(self.ids[last])] if sort is None else [float(self.ratings[last]), str(self.ids[last])]
+            next_cursor = Cursor(search_after, None).encode()
+
+        return Page(self.ids[page].tolist(), next_cursor)
+
+    def _get_start(self, order: 'np.ndarray', sort: SortOrder | None, cursor: str) -> int:
+        """ Позиция первого фильма после курсора; значение _shard_doc курсора с PIT не учитывается """
+
+        search_after = Cursor.decode(cursor).search_after
+        if sort is None:
+            if len(search_after) not in (1, 2) or not isinstance(search_after[0], str):
+                raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+            return int(np.searchsorted(self.ids[order], search_after[0], side='right'))
+
+        if (
+                len(search_after) not in (2, 3)
+                or not isinstance(search_after[0], (int, float))
+                or not isinstance(search_after[1], str)
+        ):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+
+        rating, film_id = np.float32(search_after[0]), search_after[1]
+        ratings = self.ratings[order]
+        if sort == SortOrder.DESC:
+            ratings, rating = -ratings, -rating
+        # Фильмы с тем же рейтингом идут подряд по возрастанию id: ищем позицию id внутри их диапазона
+        low, high = np.searchsorted(ratings, rating, side='left'), np.searchsorted(ratings, rating, side='right')
+        return int(low + np.searchsorted(self.ids[order[low:high]], film_id, side='right'))
+
+
+class FilmColumnIndex:
+    """ Текущий снимок колонок фильмов; перестраивается, когда ETL меняет версию данных в Redis """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self.columns: FilmColumns | None = None
+        self.version: bytes | None = None
+
+    def get_page(self, params: FilmQueryParams) -> Page[str] | None:
+        """ id фильмов страницы; None, если снимок ещё не построен """
+        return self.columns.get_page(params) if self.columns is not None else None
+
+    async def refresh(self, elastic: AsyncElasticsearch) -> bool:
+        """
+        Перестраивает снимок по индексу фильмов, если он не построен или версия данных изменилась.
+        :return: был ли снимок перестроен.
+        """
+
+        version = await self.redis.get(VERSION_KEY)
+        if self.columns is not None and version == self.version:
+            return False
+
+        films = [
+            hit['_source'] async for hit in async_scan(
+                elastic,
+                index=ElasticIndexNames.MOVIE.value,
+                query={'_source': ['id', 'imdb_rating', 'genres.id']},
+            )
+        ]
+        # Сборка массивов занимает процессор, поэтому выполняется вне цикла событий
+        self.columns = await asyncio.to_thread(FilmColumns, films)
+        self.version = version
+        logger.info(f'Построены колонки фильмов: фильмов {len(self.columns)}, жанров {len(self.columns.genres)}')
+        return True
+
+
+async def refresh_film_columns(index: FilmColumnIndex, elastic: AsyncElasticsearch, interval: float) -> None:
+    """ Строит снимок при старте и проверяет версию данных каждые interval секунд """
+
+    while True:
+        try:
+            await index.refresh(elastic)
+        except Exception:
+            logger.exception('Не удалось перестроить колонки фильмов')
+        await asyncio.sleep(interval)
+
+
+async def publish_film_columns(redis: Redis) -> None:
+    """ Сообщает приложениям, что данные фильмов загружены заново и колонки нужно перестроить """
+    await redis.incr(VERSION_KEY)
@@ -1,108 +1,94 @@
 from typing import Any
 
-from elasticsearch import NotFoundError, AsyncElasticsearch
-
 from src.constants.elastic import ElasticIndexNames
-from src.models.film import FilmQueryParams, FilmSearchParams
+from src.models.base import AutocompleteParams, Page
+from src.models.film import Film, FilmFacetParams, FilmQueryParams, FilmSearchParams, FilmSuggestion
+from src.repositories.elastic import BaseElasticRepository
 from src.repositories.film.base import BaseFilmRepository
+from src.repositories.film.columns import FilmColumnIndex
+from src.repositories.queries import SearchQuery, build_list_query, nested_term
+from src.repositories.search_profiles import DEFAULT_SEARCH_PROFILE, FILM_SEARCH_PROFILES, SearchProfile
 
 
-class ElasticFilmRepository(BaseFilmRepository):
-
-    def __init__(self, elastic: AsyncElasticsearch):
-        self.elastic = elastic
-
-    async def all(self, params: FilmQueryParams) -> list[dict[str, Any]]:
-        """ Достает фильмы из эластика по query параметрам """
-        body = self._build_list_query_body(params)
-
-        try:
-            response = await self.elastic.search(
-                index=ElasticIndexNames.MOVIE.value,
-                body=body,
-            )
-        except NotFoundError as e:
-            print(e)
-            return []
+# Ширина корзины гистограммы рейтинга и максимальное число жанров в фасетах
+RATING_HISTOGRAM_INTERVAL = 1
+MAX_GENRE_FACETS = 100
 
-        return response['hits']['hits']
 
-    async def search(self, params: FilmSearchParams) -> list[dict[str, Any]]:
-        """ Ищет фильмы по параметру query """
-        body = self._build_search_query_body(params)
+class ElasticFilmRepository(BaseElasticRepository, BaseFilmRepository):
+    """ Страница списка фильмов выбирается по колонкам в памяти, если их снимок построен, иначе ищется в индексе """
 
-        try:
-            response = await self.elastic.search(
-                index=ElasticIndexNames.MOVIE.value,
-                body=body,
-            )
-        except NotFoundError as e:
-            print(e)
-            return []
+    def __init__(
+            self,
+            *args,
+            search_profile: SearchProfile = FILM_SEARCH_PROFILES[DEFAULT_SEARCH_PROFILE],
+            columns: FilmColumnIndex | None = None,
+            **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.search_profile = search_profile
+        self.columns = columns
 
-        return response['hits']['hits']
+    async def all(self, params: FilmQueryParams) -> Page[dict[str, Any]]:
+        """ Достает фильмы из эластика по query параметрам """
 
-    async def get_by_id(self, film_id: str) -> dict[str, Any] | None:
-        """ Получает фильм из эластика по id """
-        try:
-            return await self.elastic.get(
-                index=ElasticIndexNames.MOVIE.value,
-                id=film_id,
-            )
-        except NotFoundError:
-            return None
-
-    def _build_list_query_body(self, params: FilmQueryParams) -> dict[str, Any]:
-        body = {
-            'size': params.limit,
-            'from': params.offset,
-        }
+        if self.columns is not None and (page := self.columns.get_page(params)) is not None:
+            films = {film['_id']: film for film in await self._get_many(ElasticIndexNames.MOVIE.value, list(page), Film)}
+            return Page((films[film_id] for film_id in page if film_id in films), page.next_cursor)
 
-        if query_body := self._build_list_query(params):
-            body['query'] = query_body
+        sort = []
 
-        if sort := params.sort:
-            body['sort'] = [{sort.field.value: {'order': sort.order.value}}]
+        if params.sort:
+            sort.append({params.sort.field.value: {'order': params.sort.order.value}})
 
-        return body
+        return await self._search_page(ElasticIndexNames.MOVIE.value, self._build_list_query(params), params, Film, sort)
 
-    def _build_search_query_body(self, params: FilmSearchParams) -> dict[str, Any]:
-        body = {
-            'size': params.limit,
-            'from': params.offset,
+    async def search(self, params: FilmSearchParams) -> Page[dict[str, Any]]:
+        """ Ищет фильмы по параметру query """
+        return await self._search_text(ElasticIndexNames.MOVIE.value, params.query, params, Film, self.search_profile)
+
+    async def get_facets(self, params: FilmFacetParams) -> dict[str, Any]:
+        """ Количество фильмов по жанрам и гистограмма рейтинга одним запросом агрегаций """
+
+        aggs = {
+            'genres': {
+                'nested': {'path': 'genres'},
+                'aggs': {
+                    'ids': {
+                        'terms': {'field': 'genres.id', 'size': MAX_GENRE_FACETS},
+                        'aggs': {'name': {'top_hits': {'size': 1, '_source': ['genres.name']}}},
+                    },
+                },
+            },
+            'ratings': {
+                'histogram': {
+                    'field': 'imdb_rating',
+                    'interval': RATING_HISTOGRAM_INTERVAL,
+                    'min_doc_count': 0,
+                    'extended_bounds': {'min': 0, 'max': 10},
+                },
+            },
         }
+        return await self._aggregate(ElasticIndexNames.MOVIE.value, self._build_list_query(params), aggs)
 
-        if query_body := self._build_search_query(params):
-            body['query'] = query_body
+    async def autocomplete(self, params: AutocompleteParams) -> list[dict[str, Any]]:
+        """ Подсказки по началу слов названия, сначала фильмы с высоким рейтингом """
+        sort = [{'imdb_rating': {'order': 'desc'}}]
+        return await self._autocomplete(ElasticIndexNames.MOVIE.value, 'title', params, FilmSuggestion, sort)
 
-        return body
-
-    @staticmethod
-    def _build_search_query(params: FilmSearchParams) -> dict[str, Any]:
-        must_clauses = []
-
-        if search := params.query:
-            must_clauses.append({
-                'multi_match': {
-                    'query': search,
-                    'fuzziness': 'AUTO',
-                },
-            })
+    async def get_by_id(self, film_id: str) -> dict[str, Any] | None:
+        """ Получает фильм из эластика по id """
+        return await self._get_by_id(ElasticIndexNames.MOVIE.value, film_id, Film)
 
-        return {'bool': {'must': must_clauses}} if must_clauses else {}
+    async def get_many(self, film_ids: list[str]) -> list[dict[str, Any]]:
+        """ Получает найденные фильмы по списку id одним запросом """
+        return await self._get_many(ElasticIndexNames.MOVIE.value, film_ids, Film)
 
     @staticmethod
-    def _build_list_query(params: FilmQueryParams) -> dict[str, Any]:
-        must_clauses = []
+    def _build_list_query(params: FilmQueryParams | FilmFacetParams) -> SearchQuery:
+        filters = []
 
         if genre := params.genre:
-            must_clauses.append({
-                'nested': {
-                    'path': 'genres',
-                    'query': {
-                        'term': {'genres.id': genre},
-                    },
-                },
-            })
+            filters.append(nested_term('genres', 'id', genre))
 
-        return {'bool': {'must': must_clauses}} if must_clauses else {}
+        return build_list_query(*filters)
@@ -0,0 +1,76 @@
+import math
+from collections import Counter
+from typing import Any
+
+from src.models.base import AutocompleteParams, Page, SortOrder
+from src.models.film import FilmFacetParams, FilmQueryParams, FilmSearchParams
+from src.repositories.film.base import BaseFilmRepository
+from src.repositories.film.elastic import MAX_GENRE_FACETS, RATING_HISTOGRAM_INTERVAL
+from src.repositories.memory.base import BaseMemoryRepository, by_id, by_rating
+
+
+def by_rating_asc(doc: dict[str, Any]) -> tuple:
+    return doc['imdb_rating'], doc['id']
+
+
+class MemoryFilmRepository(BaseMemoryRepository, BaseFilmRepository):
+
+    async def all(self, params: FilmQueryParams) -> Page[dict[str, Any]]:
+        """ Фильмы каталога в памяти с фильтром по жанру и сортировкой по рейтингу """
+
+        films = self._filter(params)
+        if params.sort is None:
+            films = sorted(films, key=by_id) if params.genre else self.catalog.films_ordered_by_id
+            return self._paginate(films, params, by_id)
+        if params.sort.order == SortOrder.ASC:
+            return self._paginate(sorted(films, key=by_rating_asc), params, by_rating_asc)
+        return self._paginate(films, params, by_rating)
+
+    async def search(self, params: FilmSearchParams) -> Page[dict[str, Any]]:
+        """ Ищет фильмы по параметру query в индексе в памяти """
+        catalog = self.catalog
+        return self._search(catalog.film_index, catalog.films, params.query, params, catalog.films_ordered_by_id)
+
+    async def get_facets(self, params: FilmFacetParams) -> dict[str, Any]:
+        """ Количество фильмов по жанрам и гистограмма рейтинга в формате ответа агрегаций Elasticsearch """
+
+        films = self._filter(params)
+        genres, names, ratings = Counter(), {}, Counter()
+        for film in films:
+            for genre in film.get('genres') or []:
+                genres[genre['id']] += 1
+                names.setdefault(genre['id'], genre.get('name'))
+            ratings[math.floor(film['imdb_rating'] / RATING_HISTOGRAM_INTERVAL) * RATING_HISTOGRAM_INTERVAL] += 1
+
+        genre_buckets = [
+            {'key': genre_id, 'doc_count': count, 'name': {'hits': {'hits': [{'_source': {'name': names[genre_id]}}]}}}
+            for genre_id, count in sorted(genres.items(), key=lambda item: (-item[1], item[0]))[:MAX_GENRE_FACETS]
+        ]
+        rating_buckets = [
+            {'key': float(rating), 'doc_count': ratings[rating]}
+            for rating in range(0, 10 + RATING_HISTOGRAM_INTERVAL, RATING_HISTOGRAM_INTERVAL)
+        ]
+        return {
+            'hits': {'total': {'value': len(films)}},
+            'aggregations': {'genres': {'ids': {'buckets': genre_buckets}}, 'ratings': {'buckets': rating_buckets}},
+        }
+
+    async def autocomplete(self, params: AutocompleteParams) -> list[dict[str, Any]]:
+        """ Подсказки по началу слов названия, сначала фильмы с высоким рейтингом """
+        return self._autocomplete(self.catalog.film_index, self.catalog.films, params, by_rating)
+
+    async def get_by_id(self, film_id: str) -> dict[str, Any] | None:
+        """ Получает фильм из каталога в памяти по id """
+        if film := self.catalog.films_by_id.get(film_id):
+            return {'_id': film_id, '_source': film}
+        return None
+
+    async def get_many(self, film_ids: list[str]) -> list[dict[str, Any]]:
+        """ Получает найденные фильмы по списку id """
+        return self._get_many(self.catalog.films_by_id, film_ids)
+
+    def _filter(self, params: FilmQueryParams | FilmFacetParams) -> list[dict[str, Any]]:
+        """ Фильмы, подходящие под фильтры, в порядке убывания рейтинга """
+        if params.genre:
+            return self.catalog.genre_films.get(params.genre, [])
+        return self.catalog.films
@@ -1,13 +1,13 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
-from src.models.base import BasePaginationParams
+from src.models.base import BasePaginationParams, Page
 
 
 class BaseGenreRepository(ABC):
 
     @abstractmethod
-    async def all(self, params: BasePaginationParams) -> list[dict[str, Any]]:
+    async def all(self, params: BasePaginationParams) -> Page[dict[str, Any]]:
         ...
 
     @abstractmethod
@@ -15,5 +15,5 @@ class BaseGenreRepository(ABC):
         ...
 
     @abstractmethod
-    async def get_films(self, genre_id: str, params: BasePaginationParams) -> list[dict[str, Any]]:
+    async def get_films(self, genre_id: str, params: BasePaginationParams) -> Page[dict[str, Any]]:
         ...
@@ -1,65 +1,36 @@
 from typing import Any
 
-from elasticsearch import NotFoundError, AsyncElasticsearch
-
 from src.constants.elastic import ElasticIndexNames
-from src.models.base import BasePaginationParams
+from src.models.base import BasePaginationParams, Page
+from src.models.genre import Film, Genre
+from src.repositories.elastic import BaseElasticRepository
 from src.repositories.genre.base import BaseGenreRepository
+from src.repositories.genre.rankings import GenreRankings
+from src.repositories.queries import build_genre_films_query, build_list_query
 
 
-class ElasticGenreRepository(BaseGenreRepository):
+class ElasticGenreRepository(BaseElasticRepository, BaseGenreRepository):
+    """ Фильмы жанра берутся из рейтинга в Redis, если он построен, иначе ищутся в индексе фильмов """
 
-    def __init__(self, elastic: AsyncElasticsearch):
-        self.elastic = elastic
+    def __init__(self, *args, rankings: GenreRankings | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rankings = rankings
 
-    async def all(self, params: BasePaginationParams) -> list[dict[str, Any]]:
+    async def all(self, params: BasePaginationParams) -> Page[dict[str, Any]]:
         """ Получает все жанры из эластика с пагинацией """
-        body = {
-            'size': params.limit,
-            'from': params.offset,
-        }
-
-        try:
-            response = await self.elastic.search(
-                index=ElasticIndexNames.GENRE.value,
-                body=body,
-            )
-        except NotFoundError:
-            return []
-
-        return response['hits']['hits']
+        return await self._search_page(ElasticIndexNames.GENRE.value, build_list_query(), params, Genre)
 
     async def get_by_id(self, genre_id: str) -> dict[str, Any] | None:
         """ Получает жанр из эластика по id """
-        try:
-            return await self.elastic.get(
-                index=ElasticIndexNames.GENRE.value,
-                id=genre_id,
-            )
-        except NotFoundError:
-            return None
-
-    async def get_films(self, genre_id: str, params: BasePaginationParams) -> list[dict[str, Any]]:
-        """ Получение фильмов с пагинацией по жанру """
-        query = {
-            'nested': {
-                'path': 'genres',
-                'query': {'bool': {'must': [{'match': {'genres.id': genre_id}}]}},
-            },
-        }
+        return await self._get_by_id(ElasticIndexNames.GENRE.value, genre_id, Genre)
 
-        body = {
-            'size': params.limit,
-            'from': params.offset,
-            'query': query,
-        }
+    async def get_films(self, genre_id: str, params: BasePaginationParams) -> Page[dict[str, Any]]:
+        """ Получение фильмов с пагинацией по жанру в порядке убывания рейтинга """
 
-        try:
-            response = await self.elastic.search(
-                index=ElasticIndexNames.MOVIE.value,
-                body=body,
-            )
-        except NotFoundError:
-            return []
+        if self.rankings is not None and (page := await self.rankings.get_page(genre_id, params)) is not None:
+            films = {film['_id']: film for film in await self._get_many(ElasticIndexNames.MOVIE.value, list(page), Film)}
+            return Page((films[film_id] for film_id in page if film_id in films), page.next_cursor)
 
-        return response['hits']['hits']
+        query = build_genre_films_query(genre_id)
+        sort = [{'imdb_rating': {'order': 'desc'}}]
+        return await self._search_page(ElasticIndexNames.MOVIE.value, query, params, Film, sort)
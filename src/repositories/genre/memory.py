@@ -0,0 +1,22 @@
+from typing import Any
+
+from src.models.base import BasePaginationParams, Page
+from src.repositories.genre.base import BaseGenreRepository
+from src.repositories.memory.base import BaseMemoryRepository, by_id, by_rating
+
+
+class MemoryGenreRepository(BaseMemoryRepository, BaseGenreRepository):
+
+    async def all(self, params: BasePaginationParams) -> Page[dict[str, Any]]:
+        """ Получает все жанры каталога в памяти с пагинацией """
+        return self._paginate(self.catalog.genres, params, by_id)
+
+    async def get_by_id(self, genre_id: str) -> dict[str, Any] | None:
+        """ Получает жанр из каталога в памяти по id """
+        if genre := self.catalog.genres_by_id.get(genre_id):
+            return {'_id': genre_id, '_source': genre}
+        return None
+
+    async def get_films(self, genre_id: str, params: BasePaginationParams) -> Page[dict[str, Any]]:
+        """ Получение фильмов жанра с пагинацией в порядке убывания рейтинга """
+        return self._paginate(self.catalog.genre_films.get(genre_id, []), params, by_rating)
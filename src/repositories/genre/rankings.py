@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from bisect import bisect_right
+from collections import defaultdict
+from http import HTTPStatus
+
+import numpy as np
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_scan
+from fastapi import HTTPException
+from redis.asyncio import Redis
+
+from src.constants.elastic import ElasticIndexNames
+from src.models.base import BasePaginationParams, Cursor, Page
+
+logger = logging.getLogger(__name__)
+
+# Sorted set фильмов жанра со score = -рейтинг и множество жанров, для которых он построен
+RANKING_KEY = 'rankings:genre:{genre_id}'
+GENRES_KEY = 'rankings:genres'
+
+
+class GenreRankings:
+    """
+    Рейтинги фильмов по жанрам, материализованные в sorted set Redis.
+    Страница читается через ZRANGE за O(log N + M) независимо от числа фильмов в жанре.
+    Порядок и курсор совпадают с выдачей индекса (imdb_rating desc, id asc): score - рейтинг во float32
+    со знаком минус, поэтому по возрастанию score фильмы с равным рейтингом идут по возрастанию id.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def get_page(self, genre_id: str, params: BasePaginationParams) -> Page[str] | None:
+        """ id фильмов страницы в порядке убывания рейтинга; None, если рейтинг жанра не построен """
+
+        key = RANKING_KEY.format(genre_id=genre_id)
+        start = await self._get_start(key, params) if params.cursor else params.offset
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.exists(key)
+            pipe.zrange(key, start, start + params.limit - 1, withscores=True)
+            exists, members = await pipe.execute()
+
+        if not exists:
+            return None
+
+        next_cursor = None
+        if len(members) == params.limit:
+            last_id, last_score = members[-1]
+            next_cursor = Cursor([-last_score, last_id.decode()], None).encode()
+
+        return Page((film_id.decode() for film_id, _ in members), next_cursor)
+
+    async def _get_start(self, key: str, params: BasePaginationParams) -> int:
+        search_after = Cursor.decode(params.cursor).search_after
+        if len(search_after) != 2 or not isinstance(search_after[0], (int, float)) or not isinstance(search_after[1], str):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+
+        rating, film_id = search_after
+        if (rank := await self.redis.zrank(key, film_id)) is not None:
+            return rank + 1
+
+        # Фильм выпал из рейтинга после перестроения - продолжаем после фильмов с рейтингом выше
+        # и фильмов с тем же рейтингом и id не больше, чем в курсоре
+        score = get_score(rating)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zcount(key, '-inf', f'({score!r}')
+            pipe.zrange(key, score, score, byscore=True)
+            higher, same = await pipe.execute()
+
+        return higher + bisect_right([member.decode() for member in same], film_id)
+
+    async def materialize(self, elastic: AsyncElasticsearch) -> int:
+        """
+        Перестраивает рейтинги всех жанров по индексу фильмов.
+        Рейтинги заменяются одной транзакцией, рейтинги исчезнувших жанров удаляются.
+        Для жанров с фильмами без рейтинга рейтинг не строится: их страницы отдаются из индекса,
+        где такие фильмы идут в конце выдачи.
+        :return: количество жанров.
+        """
+
+        rankings = defaultdict(dict)
+        unrated = set()
+        async for hit in async_scan(
+                elastic,
+                index=ElasticIndexNames.MOVIE.value,
+                query={'_source': ['id', 'imdb_rating', 'genres.id']},
+        ):
+            film = hit['_source']
+            rating = film.get('imdb_rating')
+            for genre in film.get('genres') or []:
+                if rating is None:
+                    unrated.add(genre['id'])
+                else:
+                    rankings[genre['id']][film['id']] = get_score(rating)
+
+        for genre_id in unrated:
+            rankings.pop(genre_id, None)
+
+        stale = {
+            genre_id.decode() for genre_id in await self.redis.smembers(GENRES_KEY)
+        } - rankings.keys()
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for genre_id in stale:
+                pipe.delete(RANKING_KEY.format(genre_id=genre_id))
+            pipe.delete(GENRES_KEY)
+            for genre_id, films in rankings.items():
+                key = RANKING_KEY.format(genre_id=genre_id)
+                pipe.delete(key)
+                pipe.zadd(key, films)
+                pipe.sadd(GENRES_KEY, genre_id)
+            await pipe.execute()
+
+        logger.info(f'Построены рейтинги фильмов для {len(rankings)} жанров, пропущено жанров с фильмами без рейтинга: {len(unrated)}')
+        return len(rankings)
+
+
+def get_score(rating: float) -> float:
+    """ Score фильма в рейтинге: рейтинг, приведённый к float32, как поле float в индексе, со знаком минус """
+    return -float(np.float32(rating))
+
+
+async def refresh_rankings(rankings: GenreRankings, elastic: AsyncElasticsearch, interval: float) -> None:
+    """ Периодически перестраивает рейтинги; ошибка одного прохода не останавливает обновление """
+
+    while True:
+        try:
+            await rankings.materialize(elastic)
+        except Exception:
+            logger.exception('Не удалось перестроить рейтинги жанров')
+        await asyncio.sleep(interval)
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+from weakref import WeakKeyDictionary
+
+
+class DocumentLoader:
+    """
+    Объединяет запросы документов по id, пришедшие в одной итерации цикла событий,
+    в одну загрузку: повторяющиеся id запрашиваются один раз, каждый вызывающий получает
+    свой документ или None. Очередь своя у каждого цикла событий.
+    """
+
+    def __init__(self, load_many: Callable[[list[str]], Awaitable[list[dict[str, Any]]]]):
+        self.load_many = load_many
+        self._queues: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Future]] = WeakKeyDictionary()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, doc_id: str) -> dict[str, Any] | None:
+        loop = asyncio.get_running_loop()
+
+        queue = self._queues.get(loop)
+        if queue is None:
+            queue = self._queues[loop] = {}
+            # Загрузка стартует после того, как отработают уже готовые к запуску задачи этой итерации
+            loop.call_soon(self._dispatch, loop)
+
+        if (future := queue.get(doc_id)) is None:
+            future = queue[doc_id] = loop.create_future()
+
+        # Отмена одного вызывающего не должна отменять загрузку для остальных
+        return await asyncio.shield(future)
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop) -> None:
+        queue = self._queues.pop(loop, {})
+        task = loop.create_task(self._load(queue))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, queue: dict[str, asyncio.Future]) -> None:
+        try:
+            docs = await self.load_many(list(queue))
+        except Exception as e:
+            for future in queue.values():
+                future.set_exception(e)
+                # Помечаем исключение как полученное, даже если все вызывающие отменены
+                future.exception()
+            return
+
+        found = {doc['_id']: doc for doc in docs}
+        for doc_id, future in queue.items():
+            future.set_result(found.get(doc_id))
@@ -0,0 +1,52 @@
+import re
+from functools import lru_cache
+
+# Приближение анализатора ru_en из etl/schemas: standard-токенизация, lowercase,
+# удаление притяжательного 's, стоп-слова и лёгкий стемминг английского и русского
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+CYRILLIC_RE = re.compile(r'[а-яё]')
+
+ENGLISH_STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in', 'into', 'is', 'it', 'no', 'not',
+    'of', 'on', 'or', 'such', 'that', 'the', 'their', 'then', 'there', 'these', 'they', 'this', 'to', 'was',
+    'will', 'with',
+))
+RUSSIAN_STOP_WORDS = frozenset((
+    'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то', 'все', 'она', 'так', 'его', 'но',
+    'да', 'ты', 'к', 'у', 'же', 'вы', 'за', 'бы', 'по', 'только', 'ее', 'мне', 'было', 'вот', 'от', 'меня', 'еще',
+    'нет', 'о', 'из', 'ему', 'ли', 'если', 'уже', 'или', 'ни', 'быть', 'был', 'него', 'до', 'вас', 'для', 'мы',
+))
+
+ENGLISH_SUFFIXES = ('ational', 'fulness', 'iveness', 'ization', 'ations', 'ation', 'ement', 'ness', 'ment',
+                    'ings', 'ing', 'edly', 'ies', 'ied', 'ers', 'est', 'ed', 'er', 'ly', 'es', 's')
+RUSSIAN_SUFFIXES = ('иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ая', 'яя', 'ое', 'ее', 'ые',
+                    'ие', 'ой', 'ей', 'ий', 'ый', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ию', 'ью',
+                    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь')
+
+# Основа не короче этого числа символов, иначе короткие слова сливаются в одну
+MIN_STEM_LENGTH = 3
+
+
+def analyze(text: str) -> list[str]:
+    """ Термы текста в порядке следования """
+
+    terms = []
+    for token in TOKEN_RE.findall(text.lower().replace("'s", '').replace('’s', '')):
+        if token in ENGLISH_STOP_WORDS or token in RUSSIAN_STOP_WORDS:
+            continue
+        terms.append(stem(token))
+    return terms
+
+
+def tokenize(text: str) -> list[str]:
+    """ Слова текста в нижнем регистре без стемминга, для поиска по началу слов """
+    return TOKEN_RE.findall(text.lower())
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    suffixes = RUSSIAN_SUFFIXES if CYRILLIC_RE.search(token) else ENGLISH_SUFFIXES
+    for suffix in suffixes:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[:-len(suffix)]
+    return token
@@ -0,0 +1,110 @@
+from bisect import bisect_right
+from http import HTTPStatus
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+from src.models.base import AutocompleteParams, BasePaginationParams, Cursor, Page
+from src.repositories.memory.catalog import MemoryCatalog
+from src.repositories.memory.index import InvertedIndex
+
+SortKey = Callable[[dict[str, Any]], tuple]
+
+
+def by_rating(doc: dict[str, Any]) -> tuple:
+    return -doc['imdb_rating'], doc['id']
+
+
+def by_id(doc: dict[str, Any]) -> tuple:
+    return doc['id'],
+
+
+class BaseMemoryRepository:
+    """
+    Общая логика репозиториев каталога в памяти.
+    Документы отдаются в том же виде, что и hits Elasticsearch, поэтому подходят те же сериализаторы;
+    пагинация - по номеру страницы или по курсору из значений сортировки последней записи.
+    """
+
+    def __init__(self, catalog: MemoryCatalog):
+        self.catalog = catalog
+
+    @classmethod
+    def _paginate(cls, docs: list[dict[str, Any]], params: BasePaginationParams, key: SortKey) -> Page[dict[str, Any]]:
+        """
+        Страница документов.
+        :param docs: документы, уже упорядоченные по key.
+        :param key: ключ сортировки, его значения - значения курсора.
+        """
+
+        if params.cursor and docs:
+            search_after = cls._get_search_after(params.cursor, len(key(docs[0])))
+            try:
+                start = bisect_right(docs, search_after, key=key)
+            except TypeError:
+                raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+        elif params.cursor:
+            start = 0
+        else:
+            start = params.offset
+        hits = [{'_id': doc['id'], '_source': doc, 'sort': list(key(doc))} for doc in docs[start:start + params.limit]]
+        return cls._get_page(hits, params)
+
+    @staticmethod
+    def _get_page(hits: list[dict[str, Any]], params: BasePaginationParams) -> Page[dict[str, Any]]:
+        """ Страница с курсором из значений сортировки последней записи, если страница заполнена целиком """
+        next_cursor = Cursor(hits[-1]['sort'], None).encode() if len(hits) == params.limit else None
+        return Page(hits, next_cursor)
+
+    @staticmethod
+    def _get_search_after(cursor: str, size: int) -> tuple:
+        """ Значения сортировки из курсора; курсор другой выдачи даёт 400 """
+
+        search_after = tuple(Cursor.decode(cursor).search_after)
+        if len(search_after) != size:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+        return search_after
+
+    def _search(
+            self,
+            index: InvertedIndex,
+            docs: list[dict[str, Any]],
+            search: str | None,
+            params: BasePaginationParams,
+            docs_ordered_by_id: list[dict[str, Any]],
+    ) -> Page[dict[str, Any]]:
+        """
+        Полнотекстовый поиск по релевантности; без строки поиска - все документы по id.
+        Индекс отбирает только записи до конца запрошенной страницы, документы берутся для одной страницы.
+        :param docs: документы в порядке добавления в index.
+        """
+
+        if not search:
+            return self._paginate(docs_ordered_by_id, params, by_id)
+
+        after, start = None, params.offset
+        if params.cursor:
+            after = self._get_search_after(params.cursor, 2)
+            if not isinstance(after[0], (int, float)) or not isinstance(after[1], str):
+                raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+            start = 0
+
+        hits = [
+            {'_id': doc_id, '_source': docs[doc], 'sort': [score, doc_id]}
+            for score, doc_id, doc in index.search(search, start + params.limit, after)[start:]
+        ]
+        return self._get_page(hits, params)
+
+    @staticmethod
+    def _autocomplete(
+            index: InvertedIndex,
+            docs: list[dict[str, Any]],
+            params: AutocompleteParams,
+            key: SortKey,
+    ) -> list[dict[str, Any]]:
+        found = sorted((docs[doc] for doc in index.search_prefix(params.prefix)), key=key)
+        return [{'_id': doc['id'], '_source': doc} for doc in found[:params.limit]]
+
+    @staticmethod
+    def _get_many(docs: dict[str, dict[str, Any]], doc_ids: list[str]) -> list[dict[str, Any]]:
+        return [{'_id': doc_id, '_source': docs[doc_id], 'found': True} for doc_id in doc_ids if doc_id in docs]
@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any
+
+from src.repositories.memory.index import InvertedIndex
+from src.repositories.queries import PERSON_ROLES
+from src.repositories.search_profiles import FILM_SEARCH_FIELDS, PERSON_SEARCH_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+def get_field_boosts(fields: tuple[str, ...]) -> dict[str, float]:
+    """ Поля профиля поиска с весами; keyword-подполя .raw в памяти не индексируются """
+
+    boosts = {}
+    for field in fields:
+        name, _, boost = field.partition('^')
+        if not name.endswith('.raw'):
+            boosts[name] = float(boost or 1)
+    return boosts
+
+
+class MemoryCatalog:
+    """
+    Каталог фильмов, персон и жанров в памяти процесса с полнотекстовыми индексами.
+    Фильмы хранятся в порядке убывания рейтинга, при равном рейтинге - по id:
+    в этом порядке отдаются списки, фильмы жанра и фильмография.
+    """
+
+    def __init__(self, films: list[dict[str, Any]], persons: list[dict[str, Any]], genres: list[dict[str, Any]]):
+        self.films = sorted(films, key=lambda film: (-film['imdb_rating'], film['id']))
+        self.persons = sorted(persons, key=lambda person: person['id'])
+        self.genres = sorted(genres, key=lambda genre: genre['id'])
+
+        # Фильмы в порядке id для списков без сортировки, чтобы не сортировать их на каждый запрос
+        self.films_ordered_by_id = sorted(self.films, key=lambda film: film['id'])
+        self.films_by_id = {film['id']: film for film in self.films}
+        self.persons_by_id = {person['id']: person for person in self.persons}
+        self.genres_by_id = {genre['id']: genre for genre in self.genres}
+
+        self.genre_films: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self.person_films: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for film in self.films:
+            for genre in film.get('genres') or []:
+                self.genre_films[genre['id']].append(film)
+            person_ids = {person['id'] for role in PERSON_ROLES for person in film.get(role) or []}
+            for person_id in person_ids:
+                self.person_films[person_id].append(film)
+
+        self.film_index = InvertedIndex(get_field_boosts(FILM_SEARCH_FIELDS), prefix_field='title')
+        self.film_index.add_many(self.films)
+        self.person_index = InvertedIndex(get_field_boosts(PERSON_SEARCH_FIELDS), prefix_field='name')
+        self.person_index.add_many(self.persons)
+
+    @classmethod
+    def load(cls, dumps_dir: str) -> 'MemoryCatalog':
+        """ Загружает дампы в формате etl/dumps """
+
+        data = {}
+        for name in ('movies', 'persons', 'genres'):
+            with open(os.path.join(dumps_dir, f'{name}_dump.json'), encoding='UTF-8') as file:
+                data[name] = json.load(file)
+
+        catalog = cls(data['movies'], data['persons'], data['genres'])
+        logger.info(
+            f'Каталог в памяти загружен из {dumps_dir}: фильмов {len(catalog.films)}, '
+            f'персон {len(catalog.persons)}, жанров {len(catalog.genres)}',
+        )
+        return catalog
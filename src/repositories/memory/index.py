@@ -0,0 +1,239 @@
+import heapq
+import math
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Any, Iterable
+
+from src.repositories.memory.analysis import analyze, tokenize
+
+# Параметры BM25, как у similarity по умолчанию в Elasticsearch
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Ограничения нечёткого поиска, как в профиле fields: первая буква совпадает точно,
+# терм раскрывается не более чем в MAX_EXPANSIONS ближайших
+PREFIX_LENGTH = 1
+MAX_EXPANSIONS = 10
+MAX_CACHED_EXPANSIONS = 10_000
+
+
+def get_max_edits(term: str) -> int:
+    """ Допустимое число правок по правилу fuzziness AUTO: 0 для 1-2 символов, 1 для 3-5, иначе 2 """
+    return 0 if len(term) < 3 else 1 if len(term) < 6 else 2
+
+
+def bounded_distance(source: str, target: str, max_edits: int) -> int | None:
+    """
+    Расстояние правки с перестановкой соседних букв за одну правку, как у fuzzy-запроса Elasticsearch,
+    или None, если оно больше max_edits; расчёт обрывается, как только вся строка матрицы превысила предел.
+    """
+
+    if abs(len(source) - len(target)) > max_edits:
+        return None
+
+    before, previous = None, list(range(len(target) + 1))
+    for i, source_char in enumerate(source, 1):
+        current = [i]
+        for j, target_char in enumerate(target, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (source_char != target_char))
+            if before and i > 1 and j > 1 and source_char == target[j - 2] and source[i - 2] == target_char:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > max_edits:
+            return None
+        before, previous = previous, current
+
+    return previous[-1] if previous[-1] <= max_edits else None
+
+
+class FieldIndex:
+    """
+    Обратный индекс одного поля: терм -> {номер документа: вклад терма в счёт документа по BM25} и длины поля.
+    Пока документы добавляются, в списках термов хранятся частоты; build заменяет их вкладами
+    и упорядочивает документы каждого терма по убыванию вклада.
+    """
+
+    def __init__(self, boost: float):
+        self.boost = boost
+        self.postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self.lengths: list[int] = []
+        self.total_length = 0
+
+    def add(self, terms: list[str]) -> None:
+        doc = len(self.lengths)
+        self.lengths.append(len(terms))
+        self.total_length += len(terms)
+        for term, frequency in Counter(terms).items():
+            self.postings[term][doc] = frequency
+
+    def build(self) -> None:
+        """ Считает вклады термов по BM25 после добавления всех документов """
+
+        count = len(self.lengths)
+        average_length = self.total_length / count if self.total_length else 1.0
+        for term, postings in self.postings.items():
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            impacts = (
+                (doc, self.boost * idf * frequency * (BM25_K1 + 1) / (
+                    frequency + BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc] / average_length)
+                ))
+                for doc, frequency in postings.items()
+            )
+            self.postings[term] = dict(sorted(impacts, key=_get_impact, reverse=True))
+
+
+class TopDocs:
+    """ Лучшие size документов выдачи после записи after, ключ документа - (-счёт, id, номер документа) """
+
+    def __init__(self, size: int, after: tuple[float, str] | None = None):
+        self.size = size
+        self.after = after
+        self.found: list[tuple[float, str, int]] = []
+        self._scores: list[float] = []
+
+    def add(self, key: tuple[float, str, int]) -> None:
+        if self.after is not None and key[:2] <= self.after:
+            return
+
+        self.found.append(key)
+        if len(self._scores) < self.size:
+            heapq.heappush(self._scores, -key[0])
+        elif -key[0] > self._scores[0]:
+            heapq.heapreplace(self._scores, -key[0])
+
+    def is_complete(self, threshold: float) -> bool:
+        """ Есть size документов со счётом больше threshold: документ со счётом не больше него в выдачу не попадёт """
+        return len(self._scores) == self.size and self._scores[0] > threshold
+
+    def get(self) -> list[tuple[float, str, int]]:
+        return heapq.nsmallest(self.size, self.found)
+
+
+class InvertedIndex:
+    """
+    Полнотекстовый индекс документов в памяти по нескольким полям с весами.
+    Поиск устроен как multi_match best_fields: счёт документа - лучший из счетов его полей.
+    Нечёткий поиск ограничен: терм, который есть в словаре, не раскрывается,
+    остальные раскрываются в ближайшие термы словаря с той же первой буквой.
+    Индекс строится один раз: все документы добавляются одним вызовом add_many.
+    """
+
+    def __init__(self, fields: dict[str, float], prefix_field: str | None = None):
+        self.fields = {name: FieldIndex(boost) for name, boost in fields.items()}
+        self.prefix_field = prefix_field
+        self.ids: list[str] = []
+        self._prefixes: dict[str, set[int]] = defaultdict(set)
+        self._prefix_words: list[str] = []
+        # Словарь по первой букве и длине терма: кандидаты нечёткого поиска отличаются по длине не больше, чем на число правок
+        self._vocabulary: dict[tuple[str, int], list[str]] = defaultdict(list)
+        self._expansions: dict[str, list[tuple[str, float]]] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def add_many(self, docs: Iterable[dict[str, Any]]) -> None:
+        if self.ids:
+            raise RuntimeError('Индекс уже построен')
+
+        for doc in docs:
+            for name, field in self.fields.items():
+                field.add(analyze(_get_text(doc.get(name))))
+            if self.prefix_field:
+                for word in tokenize(_get_text(doc.get(self.prefix_field))):
+                    self._prefixes[word].add(self.size)
+            self.ids.append(doc['id'])
+
+        for field in self.fields.values():
+            field.build()
+        for term in sorted({term for field in self.fields.values() for term in field.postings}):
+            self._vocabulary[term[:PREFIX_LENGTH], len(term)].append(term)
+        self._prefix_words = sorted(self._prefixes)
+
+    def search(self, text: str, size: int, after: tuple[float, str] | None = None) -> list[tuple[float, str, int]]:
+        """
+        Первые size найденных документов по убыванию счёта релевантности, при равном счёте - по id.
+        Списки документов термов читаются параллельно от больших вкладов к меньшим, счёт встреченного документа
+        считается целиком. Чтение останавливается, когда size-й лучший счёт больше суммы вкладов на текущих позициях
+        списков: у непрочитанных документов счёт не больше этой суммы.
+        :param after: (-счёт, id) последней записи предыдущей страницы, выдача начинается после неё.
+        :return: (-счёт, id, номер документа) в порядке выдачи.
+        """
+
+        variants = [variant for term in analyze(text) for variant in self._expand(term)]
+        fields = []
+        for field in self.fields.values():
+            if terms := [(weight, postings) for variant, weight in variants if (postings := field.postings.get(variant))]:
+                fields.append(terms)
+
+        # Позиции чтения списков по полям: вес варианта терма, итератор списка, вклад последнего прочитанного документа
+        heads = [[[weight, iter(postings.items()), 0.0] for weight, postings in terms] for terms in fields]
+        top, seen = TopDocs(size, after), set()
+        while heads:
+            for field_heads in heads:
+                for head in field_heads:
+                    if (item := next(head[1], None)) is None:
+                        head[2] = 0.0
+                        continue
+                    doc, head[2] = item
+                    if doc not in seen:
+                        seen.add(doc)
+                        score = max(sum(weight * postings.get(doc, 0.0) for weight, postings in terms) for terms in fields)
+                        top.add((-score, self.ids[doc], doc))
+
+            threshold = max(sum(weight * impact for weight, _, impact in field_heads) for field_heads in heads)
+            if not threshold or top.is_complete(threshold):
+                break
+
+        return top.get()
+
+    def search_prefix(self, text: str) -> set[int]:
+        """ Документы, в поле prefix_field которых каждое слово text - начало какого-то слова """
+
+        docs = None
+        for prefix in tokenize(text):
+            matched = set()
+            for i in range(bisect_left(self._prefix_words, prefix), len(self._prefix_words)):
+                if not self._prefix_words[i].startswith(prefix):
+                    break
+                matched |= self._prefixes[self._prefix_words[i]]
+            docs = matched if docs is None else docs & matched
+            if not docs:
+                return set()
+        return docs or set()
+
+    def _expand(self, term: str) -> list[tuple[str, float]]:
+        """ Варианты терма с весами: сам терм, если он есть в словаре, иначе ближайшие по расстоянию правки """
+
+        if any(term in field.postings for field in self.fields.values()):
+            return [(term, 1.0)]
+
+        if (expansions := self._expansions.get(term)) is not None:
+            return expansions
+
+        max_edits = get_max_edits(term)
+        candidates = []
+        if max_edits:
+            for length in range(len(term) - max_edits, len(term) + max_edits + 1):
+                for candidate in self._vocabulary.get((term[:PREFIX_LENGTH], length), []):
+                    if (distance := bounded_distance(term, candidate, max_edits)) is not None:
+                        candidates.append((distance, candidate))
+
+        # Вклад найденного варианта снижается с числом правок, как у fuzzy-запроса Elasticsearch
+        expansions = [
+            (candidate, 1 - distance / (len(term) + 1))
+            for distance, candidate in sorted(candidates)[:MAX_EXPANSIONS]
+        ]
+        if len(self._expansions) >= MAX_CACHED_EXPANSIONS:
+            self._expansions.clear()
+        self._expansions[term] = expansions
+        return expansions
+
+
+def _get_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(item) for item in value)
+    return str(value) if value is not None else ''
+
+
+def _get_impact(posting: tuple[int, float]) -> float:
+    return posting[1]
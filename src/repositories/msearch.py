@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Any, Sequence
+
+from elastic_transport import ApiResponseMeta
+from elasticsearch import ApiError, AsyncElasticsearch
+from elasticsearch.exceptions import HTTP_EXCEPTIONS
+
+logger = logging.getLogger(__name__)
+
+
+class SearchDispatcher:
+    """
+    Собирает поисковые запросы, пришедшие в коротком окне, и отправляет их одним _msearch.
+    Пачка уходит, когда набралось max_batch_size запросов или прошло max_wait секунд с первого из них.
+    Каждый вызывающий получает свой ответ или свою ошибку, как от обычного search.
+    """
+
+    def __init__(
+            self,
+            elastic: AsyncElasticsearch,
+            max_batch_size: int = 20,
+            max_wait: float = 0.002,
+            filter_path: Sequence[str] = (),
+    ):
+        self.elastic = elastic
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # filter_path задаётся для отдельного ответа, статус и ошибку оставляем всегда,
+        # иначе пустой ответ выпадет из массива и ответы сместятся относительно запросов
+        self.filter_path = [f'responses.{path}' for path in (*filter_path, 'status', 'error')] if filter_path else None
+        self._pending: list[tuple[dict[str, Any], dict[str, Any], asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def search(self, index: str, body: dict[str, Any], **params: Any) -> dict[str, Any]:
+        """ params - параметры отдельного запроса в заголовке _msearch: preference, request_cache """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(({'index': index, **params}, body, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[dict[str, Any], dict[str, Any], asyncio.Future]]) -> None:
+        searches = [part for header, body, _ in batch for part in (header, body)]
+        try:
+            response = await self.elastic.msearch(searches=searches, filter_path=self.filter_path)
+        except Exception as e:
+            logger.warning(f'Не удалось выполнить _msearch из {len(batch)} запросов: {e}')
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (*_, future), item in zip(batch, response['responses']):
+            # Вызывающий мог быть отменён, пока пачка выполнялась
+            if future.done():
+                continue
+            if 'error' in item:
+                future.set_exception(self._get_error(item, response.meta))
+            else:
+                future.set_result(item)
+
+    @staticmethod
+    def _get_error(item: dict[str, Any], meta: ApiResponseMeta) -> ApiError:
+        """ Ошибка отдельного запроса в том же виде, в каком её поднял бы обычный search """
+
+        status = item.get('status', 500)
+        item_meta = ApiResponseMeta(
+            status=status,
+            http_version=meta.http_version,
+            headers=meta.headers,
+            duration=meta.duration,
+            node=meta.node,
+        )
+        error = item['error']
+        message = error.get('type', str(error)) if isinstance(error, dict) else str(error)
+        return HTTP_EXCEPTIONS.get(status, ApiError)(message=message, meta=item_meta, body=item)
@@ -1,18 +1,22 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
-from src.models.base import BasePaginationParams
+from src.models.base import AutocompleteParams, BasePaginationParams, Page
 from src.models.person import PersonSearchParams
 
 
 class BasePersonRepository(ABC):
 
     @abstractmethod
-    async def all(self, params: BasePaginationParams) -> list[dict[str, Any]]:
+    async def all(self, params: BasePaginationParams) -> Page[dict[str, Any]]:
         ...
 
     @abstractmethod
-    async def search(self, params: PersonSearchParams) -> list[dict[str, Any]]:
+    async def search(self, params: PersonSearchParams) -> Page[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def autocomplete(self, params: AutocompleteParams) -> list[dict[str, Any]]:
         ...
 
     @abstractmethod
@@ -20,5 +24,9 @@ class BasePersonRepository(ABC):
         ...
 
     @abstractmethod
-    async def get_films(self, person_id: str, params: BasePaginationParams) -> list[dict[str, Any]]:
+    async def get_many(self, person_ids: list[str]) -> list[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_films(self, person_id: str, params: BasePaginationParams) -> Page[dict[str, Any]] | None:
         ...
@@ -1,110 +1,103 @@
+from bisect import bisect_right
+from http import HTTPStatus
 from typing import Any
 
-from elasticsearch import NotFoundError, AsyncElasticsearch
+from elasticsearch import NotFoundError
+from fastapi import HTTPException
 
 from src.constants.elastic import ElasticIndexNames
-from src.models.base import BasePaginationParams
-from src.models.person import PersonSearchParams
+from src.models.base import AutocompleteParams, BasePaginationParams, Cursor, Page
+from src.models.person import Film, Person, PersonSearchParams
+from src.repositories.elastic import BaseElasticRepository
 from src.repositories.person.base import BasePersonRepository
+from src.repositories.queries import build_list_query, build_person_films_query
+from src.repositories.search_profiles import DEFAULT_SEARCH_PROFILE, PERSON_SEARCH_PROFILES, SearchProfile
 
 
-class ElasticPersonRepository(BasePersonRepository):
+class ElasticPersonRepository(BaseElasticRepository, BasePersonRepository):
 
-    def __init__(self, elastic: AsyncElasticsearch):
-        self.elastic = elastic
+    def __init__(self, *args, search_profile: SearchProfile = PERSON_SEARCH_PROFILES[DEFAULT_SEARCH_PROFILE], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.search_profile = search_profile
 
-    async def all(self, params: BasePaginationParams) -> list[dict[str, Any]]:
+    async def all(self, params: BasePaginationParams) -> Page[dict[str, Any]]:
         """ Получает всех персон из эластика с пагинацией и поиском """
-        body = {
-            'size': params.limit,
-            'from': params.offset,
-        }
-
-        try:
-            response = await self.elastic.search(
-                index=ElasticIndexNames.PERSON.value,
-                body=body,
-            )
-        except NotFoundError:
-            return []
-
-        return response['hits']['hits']
+        return await self._search_page(ElasticIndexNames.PERSON.value, build_list_query(), params, Person)
 
-    async def search(self, params: PersonSearchParams) -> list[dict[str, Any]]:
+    async def search(self, params: PersonSearchParams) -> Page[dict[str, Any]]:
         """ Получает всех персон из эластика с пагинацией и поиском """
-        body = {
-            'size': params.limit,
-            'from': params.offset,
-        }
-
-        if search := params.query:
-            body['query'] = self._build_search_query_body(search)
-
-        try:
-            response = await self.elastic.search(
-                index=ElasticIndexNames.PERSON.value,
-                body=body,
-            )
-        except NotFoundError:
-            return []
+        return await self._search_text(ElasticIndexNames.PERSON.value, params.query, params, Person, self.search_profile)
 
-        return response['hits']['hits']
+    async def autocomplete(self, params: AutocompleteParams) -> list[dict[str, Any]]:
+        """ Подсказки по началу слов имени в алфавитном порядке """
+        sort = [{'name.raw': {'order': 'asc'}}]
+        return await self._autocomplete(ElasticIndexNames.PERSON.value, 'name', params, Person, sort)
 
     async def get_by_id(self, person_id: str) -> dict[str, Any] | None:
         """ Получает персону из эластика по id """
+        return await self._get_by_id(ElasticIndexNames.PERSON.value, person_id, Person)
+
+    async def get_many(self, person_ids: list[str]) -> list[dict[str, Any]]:
+        """ Получает найденных персон по списку id одним запросом """
+        return await self._get_many(ElasticIndexNames.PERSON.value, person_ids, Person)
+
+    async def get_films(self, person_id: str, params: BasePaginationParams) -> Page[dict[str, Any]] | None:
+        """
+        Получение фильмов по персоне с пагинацией в порядке убывания рейтинга, при равном рейтинге - по id.
+        Фильмография персоны собирается ETL в её документе, страница вырезается из неё в процессе;
+        у документа без фильмографии фильмы ищутся запросом по индексу фильмов.
+        Наличие персоны проверяется тем же запросом документа, которым читается фильмография.
+        :return: None, если персоны нет.
+        """
+
         try:
-            return await self.elastic.get(
+            doc = await self.elastic.get(
                 index=ElasticIndexNames.PERSON.value,
                 id=person_id,
+                source_includes=['films'],
+                filter_path=['_source'],
             )
         except NotFoundError:
             return None
 
-    async def get_films(self, person_id: str, params: BasePaginationParams) -> list[dict[str, Any]]:
-        """ Получение фильмов по персоне с пагинацией """
-        query = {
-            'bool': {
-                'should': self._build_person_role_search_query(person_id),
-            },
-        }
+        if (filmography := doc.get('_source', {}).get('films')) is not None:
+            return paginate_filmography(filmography, params)
 
-        body = {
-            'size': params.limit,
-            'from': params.offset,
-            'query': query,
-        }
+        query = build_person_films_query(person_id)
+        sort = [{'imdb_rating': {'order': 'desc'}}]
+        return await self._search_page(ElasticIndexNames.MOVIE.value, query, params, Film, sort)
 
-        try:
-            response = await self.elastic.search(
-                index=ElasticIndexNames.MOVIE.value,
-                body=body,
-            )
-        except NotFoundError:
-            return []
-
-        return response['hits']['hits']
-
-    @staticmethod
-    def _build_search_query_body(search: str):
-        return {
-            'bool': {
-                'must': [{
-                    'multi_match': {
-                        'query': search,
-                        'fuzziness': 'AUTO',
-                    },
-                }],
-            },
+
+def paginate_filmography(films: list[dict[str, Any]], params: BasePaginationParams) -> Page[dict[str, Any]]:
+    """
+    Страница фильмографии в порядке убывания рейтинга, при равном рейтинге - по id.
+    Записи возвращаются в виде hits поиска, курсор - значения сортировки последней записи, как у выдачи из индекса.
+    """
+
+    films = sorted(films, key=_get_filmography_order)
+
+    start = params.offset
+    if params.cursor:
+        search_after = Cursor.decode(params.cursor).search_after
+        if len(search_after) != 2 or not isinstance(search_after[0], (int, float)) or not isinstance(search_after[1], str):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+        last = _get_filmography_order({'imdb_rating': search_after[0], 'id': search_after[1]})
+        start = bisect_right(films, last, key=_get_filmography_order)
+
+    page = [
+        {
+            '_id': film['id'],
+            '_source': {field: film[field] for field in Film.model_fields},
+            'sort': [film['imdb_rating'], film['id']],
         }
+        for film in films[start:start + params.limit]
+    ]
+    next_cursor = None
+    if len(page) == params.limit and start + params.limit < len(films):
+        next_cursor = Cursor(page[-1]['sort'], None).encode()
+
+    return Page(page, next_cursor)
+
 
-    @staticmethod
-    def _build_person_role_search_query(person_id: str):
-        return [
-            {
-                'nested': {
-                    'path': role,
-                    'query': {'match': {f"{role}.id": person_id}},
-                },
-            }
-            for role in ['actors', 'directors', 'writers']
-        ]
+def _get_filmography_order(film: dict[str, Any]) -> tuple[float, str]:
+    return -film['imdb_rating'], film['id']
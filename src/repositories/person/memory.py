@@ -0,0 +1,42 @@
+from typing import Any
+
+from src.models.base import AutocompleteParams, BasePaginationParams, Page
+from src.models.person import PersonSearchParams
+from src.repositories.memory.base import BaseMemoryRepository, by_id, by_rating
+from src.repositories.person.base import BasePersonRepository
+
+
+def by_name(doc: dict[str, Any]) -> tuple:
+    return doc['name'], doc['id']
+
+
+class MemoryPersonRepository(BaseMemoryRepository, BasePersonRepository):
+
+    async def all(self, params: BasePaginationParams) -> Page[dict[str, Any]]:
+        """ Получает всех персон каталога в памяти с пагинацией """
+        return self._paginate(self.catalog.persons, params, by_id)
+
+    async def search(self, params: PersonSearchParams) -> Page[dict[str, Any]]:
+        """ Ищет персон по параметру query в индексе в памяти """
+        catalog = self.catalog
+        return self._search(catalog.person_index, catalog.persons, params.query, params, catalog.persons)
+
+    async def autocomplete(self, params: AutocompleteParams) -> list[dict[str, Any]]:
+        """ Подсказки по началу слов имени в алфавитном порядке """
+        return self._autocomplete(self.catalog.person_index, self.catalog.persons, params, by_name)
+
+    async def get_by_id(self, person_id: str) -> dict[str, Any] | None:
+        """ Получает персону из каталога в памяти по id """
+        if person := self.catalog.persons_by_id.get(person_id):
+            return {'_id': person_id, '_source': person}
+        return None
+
+    async def get_many(self, person_ids: list[str]) -> list[dict[str, Any]]:
+        """ Получает найденных персон по списку id """
+        return self._get_many(self.catalog.persons_by_id, person_ids)
+
+    async def get_films(self, person_id: str, params: BasePaginationParams) -> Page[dict[str, Any]] | None:
+        """ Получение фильмов персоны с пагинацией в порядке убывания рейтинга; None, если персоны нет """
+        if person_id not in self.catalog.persons_by_id:
+            return None
+        return self._paginate(self.catalog.person_films.get(person_id, []), params, by_rating)
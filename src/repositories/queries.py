@@ -0,0 +1,73 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.repositories.search_profiles import SearchProfile
+
+# Роли персон в индексе фильмов, по каждой есть вложенный список {id, name}
+PERSON_ROLES = ('actors', 'directors', 'writers')
+
+
+@dataclass
+class SearchQuery:
+    """
+    Запрос к индексу без пагинации и сортировки.
+    Условия must влияют на релевантность, условия filter только отбирают документы:
+    они не считают score и кэшируются Elasticsearch в filter cache.
+    Выдача кэшируемого запроса зависит только от состояния индекса,
+    поэтому её можно хранить в shard request cache.
+    """
+    must: list[dict[str, Any]] = field(default_factory=list)
+    filter: list[dict[str, Any]] = field(default_factory=list)
+    cacheable: bool = False
+
+    def compile(self) -> dict[str, Any]:
+        """ Тело запроса: пустое, если условий нет - тогда Elasticsearch выполняет match_all """
+
+        clauses = {occur: conditions for occur, conditions in (('must', self.must), ('filter', self.filter)) if conditions}
+        return {'query': {'bool': clauses}} if clauses else {}
+
+
+def nested_term(path: str, field_name: str, value: Any) -> dict[str, Any]:
+    """ Точное совпадение keyword-поля вложенного документа """
+    return {
+        'nested': {
+            'path': path,
+            'query': {'term': {f'{path}.{field_name}': value}},
+        },
+    }
+
+
+def any_of(*clauses: dict[str, Any]) -> dict[str, Any]:
+    """ Условие выполняется, если выполнено хотя бы одно из вложенных """
+    return {'bool': {'should': list(clauses), 'minimum_should_match': 1}}
+
+
+def match_prefix(field_name: str, prefix: str) -> dict[str, Any]:
+    """ Все слова строки - начала слов поля; поле должно индексироваться с edge n-gram """
+    return {'match': {field_name: {'query': prefix, 'operator': 'and'}}}
+
+
+def build_list_query(*filters: dict[str, Any]) -> SearchQuery:
+    """ Выдача списка без поиска: только фильтры, результат кэшируется """
+    return SearchQuery(filter=list(filters), cacheable=True)
+
+
+def build_search_query(search: str | None, profile: SearchProfile, fuzzy: bool = True) -> SearchQuery:
+    """ Полнотекстовый поиск по профилю: запросы пользователей почти не повторяются, поэтому без кэша выдачи """
+    if not search:
+        return build_list_query()
+    return SearchQuery(must=[profile.build_query(search, fuzzy)])
+
+
+def build_autocomplete_query(field_name: str, prefix: str) -> SearchQuery:
+    """ Подсказки по префиксу: префиксы повторяются у многих пользователей, поэтому выдача кэшируется """
+    return build_list_query(match_prefix(f'{field_name}.autocomplete', prefix))
+
+
+def build_genre_films_query(genre_id: str) -> SearchQuery:
+    return build_list_query(nested_term('genres', 'id', genre_id))
+
+
+def build_person_films_query(person_id: str) -> SearchQuery:
+    roles = (nested_term(role, 'id', person_id) for role in PERSON_ROLES)
+    return build_list_query(any_of(*roles))
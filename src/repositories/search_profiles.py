@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+from typing import Any
+
+from src.core.config import SearchProfileName
+
+# Профиль по умолчанию - прежнее поведение; другой выбирается по замерам etl/benchmark_search.py
+DEFAULT_SEARCH_PROFILE: SearchProfileName = 'all_fields'
+
+# Поля поиска с весами; описание оставлено с малым весом, чтобы фильм находился и по тексту описания
+FILM_SEARCH_FIELDS = (
+    'title.raw^5',
+    'title^3',
+    'actors_names^2',
+    'directors_names^2',
+    'writers_names',
+    'description^0.5',
+)
+PERSON_SEARCH_FIELDS = ('name.raw^3', 'name')
+
+
+@dataclass(frozen=True)
+class SearchProfile:
+    """
+    Профиль полнотекстового поиска.
+    :param fields: поля с весами; пусто - все поля индекса, как в index.query.default_field.
+    :param fuzziness: допустимое число опечаток или None - без нечёткого поиска.
+    :param prefix_length: сколько первых символов слова должны совпасть точно, сокращает перебор вариантов.
+    :param max_expansions: максимум вариантов слова, в которые раскрывается нечёткий запрос.
+    :param exact_first: сначала точный запрос, нечёткий - только если точный ничего не нашёл.
+    """
+    fields: tuple[str, ...] = ()
+    fuzziness: str | None = 'AUTO'
+    prefix_length: int = 0
+    max_expansions: int = 50
+    exact_first: bool = False
+
+    def build_query(self, search: str, fuzzy: bool = True) -> dict[str, Any]:
+        """ Условие multi_match профиля; точный вариант требует совпадения всех слов строки """
+
+        query: dict[str, Any] = {'query': search}
+        if self.fields:
+            query['fields'] = list(self.fields)
+
+        if fuzzy and self.fuzziness:
+            query.update(fuzziness=self.fuzziness, prefix_length=self.prefix_length, max_expansions=self.max_expansions)
+        else:
+            query['operator'] = 'and'
+
+        return {'multi_match': query}
+
+
+def _get_profiles(fields: tuple[str, ...]) -> dict[SearchProfileName, SearchProfile]:
+    return {
+        # Прежнее поведение: нечёткий поиск по всем полям индекса
+        'all_fields': SearchProfile(),
+        'fields': SearchProfile(fields=fields, prefix_length=1, max_expansions=10),
+        'exact_first': SearchProfile(fields=fields, prefix_length=1, max_expansions=10, exact_first=True),
+    }
+
+
+FILM_SEARCH_PROFILES = _get_profiles(FILM_SEARCH_FIELDS)
+PERSON_SEARCH_PROFILES = _get_profiles(PERSON_SEARCH_FIELDS)
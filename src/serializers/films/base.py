@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 
-from src.models.film import Film
+from src.models.film import Film, FilmFacets, FilmSuggestion
 
 
 class BaseFilmSerializer(ABC):
@@ -8,3 +8,11 @@ class BaseFilmSerializer(ABC):
     @abstractmethod
     def serialize(self, film: dict) -> Film:
         ...
+
+    @abstractmethod
+    def serialize_facets(self, data: dict) -> FilmFacets:
+        ...
+
+    @abstractmethod
+    def serialize_suggestion(self, film: dict) -> FilmSuggestion:
+        ...
@@ -1,7 +1,29 @@
-from src.models.film import Film
+from src.models.film import Film, FilmFacets, FilmSuggestion, GenreFacet, RatingFacet
 from src.serializers.films.base import BaseFilmSerializer
 
 
 class ElasticFilmSerializer(BaseFilmSerializer):
     def serialize(self, data: dict) -> Film:
         return Film(**data['_source'])
+
+    def serialize_facets(self, data: dict) -> FilmFacets:
+        aggregations = data.get('aggregations', {})
+        genres = [
+            GenreFacet(id=bucket['key'], name=self._get_genre_name(bucket), count=bucket['doc_count'])
+            for bucket in aggregations.get('genres', {}).get('ids', {}).get('buckets', [])
+        ]
+        ratings = [
+            RatingFacet(rating=bucket['key'], count=bucket['doc_count'])
+            for bucket in aggregations.get('ratings', {}).get('buckets', [])
+        ]
+        total = data.get('hits', {}).get('total', {}).get('value', 0)
+        return FilmFacets(total=total, genres=genres, ratings=ratings)
+
+    @staticmethod
+    def _get_genre_name(bucket: dict) -> str | None:
+        # _source вложенного документа в top_hits - сам объект жанра
+        hits = bucket.get('name', {}).get('hits', {}).get('hits', [])
+        return hits[0]['_source'].get('name') if hits else None
+
+    def serialize_suggestion(self, data: dict) -> FilmSuggestion:
+        return FilmSuggestion(**data['_source'])
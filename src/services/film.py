@@ -1,4 +1,5 @@
-from src.models.film import Film, FilmQueryParams, FilmSearchParams
+from src.models.base import AutocompleteParams, Page
+from src.models.film import Film, FilmFacetParams, FilmFacets, FilmQueryParams, FilmSearchParams, FilmSuggestion
 from src.repositories.film.base import BaseFilmRepository
 from src.serializers.films.base import BaseFilmSerializer
 
@@ -8,21 +9,28 @@ class FilmService:
         self.repo = repository
         self.serializer = serializer
 
-    async def all(self, params: FilmQueryParams) -> list[Film]:
+    async def all(self, params: FilmQueryParams) -> Page[Film]:
         """ Возвращает список фильмов """
 
-        if films := await self.repo.all(params):
-            return [self.serializer.serialize(film) for film in films]
+        films = await self.repo.all(params)
+        return Page((self.serializer.serialize(film) for film in films), films.next_cursor, films.max_age)
 
-        return []
-
-    async def search(self, params: FilmSearchParams) -> list[Film]:
+    async def search(self, params: FilmSearchParams) -> Page[Film]:
         """ Возвращает список фильмов """
 
-        if films := await self.repo.search(params):
-            return [self.serializer.serialize(film) for film in films]
+        films = await self.repo.search(params)
+        return Page((self.serializer.serialize(film) for film in films), films.next_cursor, films.max_age)
+
+    async def get_facets(self, params: FilmFacetParams) -> FilmFacets:
+        """ Возвращает количество фильмов по жанрам и гистограмму рейтинга """
+
+        return self.serializer.serialize_facets(await self.repo.get_facets(params))
 
-        return []
+    async def autocomplete(self, params: AutocompleteParams) -> list[FilmSuggestion]:
+        """ Возвращает подсказки по началу названия фильма """
+
+        films = await self.repo.autocomplete(params)
+        return [self.serializer.serialize_suggestion(film) for film in films]
 
     async def get_by_id(self, film_id: str) -> Film | None:
         """ Возвращает объект фильма. Он опционален, так как фильм может отсутствовать в базе """
@@ -31,3 +39,9 @@ class FilmService:
             return self.serializer.serialize(film)
 
         return None
+
+    async def get_many(self, film_ids: list[str]) -> dict[str, Film]:
+        """ Возвращает найденные фильмы по списку id """
+
+        films = await self.repo.get_many(film_ids)
+        return {film['_id']: self.serializer.serialize(film) for film in films}
@@ -1,5 +1,7 @@
+import asyncio
+
 from src.exceptions.genre import GenreNotFound
-from src.models.base import BasePaginationParams
+from src.models.base import BasePaginationParams, Page
 from src.models.genre import Film, Genre
 from src.repositories.genre.base import BaseGenreRepository
 from src.serializers.genre.base import BaseGenreSerializer
@@ -10,13 +12,11 @@ class GenreService:
         self.repo = repository
         self.serializer = serializer
 
-    async def all(self, params: BasePaginationParams) -> list[Genre]:
+    async def all(self, params: BasePaginationParams) -> Page[Genre]:
         """ Получение всех жанров с пагинацией """
 
-        if genres := await self.repo.all(params):
-            return [self.serializer.serialize(genre) for genre in genres]
-
-        return []
+        genres = await self.repo.all(params)
+        return Page((self.serializer.serialize(genre) for genre in genres), genres.next_cursor, genres.max_age)
 
     async def get_by_id(self, genre_id: str) -> Genre | None:
         """ Получение жанра по Id """
@@ -25,13 +25,22 @@ class GenreService:
 
         return None
 
-    async def get_films_by_genre(self, genre_id: str, params: BasePaginationParams) -> list[Film]:
+    async def get_films_by_genre(self, genre_id: str, params: BasePaginationParams) -> Page[Film]:
         """ Получение списка фильмов по id жанра """
 
-        if not await self.repo.get_by_id(genre_id):
+        # Проверка жанра и поиск фильмов не зависят друг от друга, поэтому идут параллельно.
+        # Ошибка поиска (например, неверный курсор) поднимается только для существующего жанра:
+        # для неизвестного жанра ответ всегда 404
+        genre, films = await asyncio.gather(
+            self.repo.get_by_id(genre_id),
+            self.repo.get_films(genre_id, params),
+            return_exceptions=True,
+        )
+        if isinstance(genre, BaseException):
+            raise genre
+        if not genre:
             raise GenreNotFound('Жанр не найден!')
+        if isinstance(films, BaseException):
+            raise films
 
-        if films := await self.repo.get_films(genre_id, params):
-            return [self.serializer.serialize_movie(film) for film in films]
-
-        return []
+        return Page((self.serializer.serialize_movie(film) for film in films), films.next_cursor, films.max_age)
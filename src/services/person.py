@@ -1,5 +1,5 @@
 from src.exceptions.person import PersonNotFound
-from src.models.base import BasePaginationParams
+from src.models.base import AutocompleteParams, BasePaginationParams, Page
 from src.models.person import Film, Person, PersonSearchParams
 
 from src.repositories.person.base import BasePersonRepository
@@ -11,21 +11,23 @@ class PersonService:
         self.repo = repository
         self.serializer = serializer
 
-    async def all(self, params: BasePaginationParams) -> list[Person]:
+    async def all(self, params: BasePaginationParams) -> Page[Person]:
         """ Получение всех персон с пагинацией """
 
-        if persons := await self.repo.all(params):
-            return [self.serializer.serialize(person) for person in persons]
+        persons = await self.repo.all(params)
+        return Page((self.serializer.serialize(person) for person in persons), persons.next_cursor, persons.max_age)
 
-        return []
-
-    async def search(self, params: PersonSearchParams) -> list[Person]:
+    async def search(self, params: PersonSearchParams) -> Page[Person]:
         """ Получение персон с пагинацией по поиску """
 
-        if persons := await self.repo.search(params):
-            return [self.serializer.serialize(person) for person in persons]
+        persons = await self.repo.search(params)
+        return Page((self.serializer.serialize(person) for person in persons), persons.next_cursor, persons.max_age)
+
+    async def autocomplete(self, params: AutocompleteParams) -> list[Person]:
+        """ Получение подсказок по началу имени персоны """
 
-        return []
+        persons = await self.repo.autocomplete(params)
+        return [self.serializer.serialize(person) for person in persons]
 
     async def get_by_id(self, person_id: str) -> Person | None:
         """ Получение персоны по Id """
@@ -35,13 +37,17 @@ class PersonService:
 
         return None
 
-    async def get_films_by_person(self, person_id: str, params: BasePaginationParams) -> list[Film]:
+    async def get_many(self, person_ids: list[str]) -> dict[str, Person]:
+        """ Получение найденных персон по списку id """
+
+        persons = await self.repo.get_many(person_ids)
+        return {person['_id']: self.serializer.serialize(person) for person in persons}
+
+    async def get_films_by_person(self, person_id: str, params: BasePaginationParams) -> Page[Film]:
         """ Получение списка фильмов по id персоны """
 
-        if not await self.repo.get_by_id(person_id):
+        films = await self.repo.get_films(person_id, params)
+        if films is None:
             raise PersonNotFound('Персона не найдена!')
 
-        if films := await self.repo.get_films(person_id, params):
-            return [self.serializer.serialize_movie(film) for film in films]
-
-        return []
+        return Page((self.serializer.serialize_movie(film) for film in films), films.next_cursor, films.max_age)
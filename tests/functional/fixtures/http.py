@@ -6,11 +6,11 @@ from httpx import AsyncClient, Response
 def make_get_request():
     """
     Фикстура для выполнения HTTP GET-запросов с помощью AsyncClient.
-    Принимает URL и параметры запроса, возвращает HTTP-ответ.
+    Принимает URL, параметры и заголовки запроса, возвращает HTTP-ответ.
     """
 
-    async def inner(url: str, query_data: dict = None) -> Response:
+    async def inner(url: str, query_data: dict = None, headers: dict = None) -> Response:
         async with AsyncClient() as client:
-            return await client.get(url, params=query_data)
+            return await client.get(url, params=query_data, headers=headers)
 
     return inner
@@ -66,6 +66,25 @@ class TestFilmAPI:
         assert isinstance(body, dict)
         assert body['id'] == film_id
 
+    @pytest.mark.asyncio
+    async def test_get_film_batch(self, redis_client, es_write_data, make_get_request):
+        """ Тест получения нескольких фильмов одним запросом: порядок id сохраняется, отсутствующие пропускаются. """
+        bulk_query = await self.prepare_data(es_write_data, count=5)
+        film_ids = [film['_id'] for film in bulk_query[:3]]
+
+        await redis_client.flushdb()
+        await make_get_request(f'{self.url}/{film_ids[0]}', query_data=None)
+
+        response = await make_get_request(
+            f'{self.url}/batch',
+            query_data={'ids': [film_ids[2], 'd566a651-86df-4566-8305-8cb1acc471d5', film_ids[0], film_ids[1]]},
+        )
+        keys = {key.decode('utf-8') for key in await redis_client.keys('film:*')}
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [film['id'] for film in response.json()] == [film_ids[2], film_ids[0], film_ids[1]]
+        assert {f'film:film_id={film_id}' for film_id in film_ids} <= keys, 'Фильмы из batch-запроса должны попадать в кэш'
+
     @pytest.mark.asyncio
     async def test_film_bad_sort(self, es_write_data, make_get_request):
         """ Тест для проверки обработки некорректного параметра сортировки. """
@@ -75,6 +94,34 @@ class TestFilmAPI:
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST, f'Ответ должен содержать статус код = {status.HTTP_400_BAD_REQUEST}'
 
+    @pytest.mark.asyncio
+    async def test_film_list_cursor_pagination(self, redis_client, es_write_data, make_get_request):
+        """ Тест курсорной пагинации: страницы по курсору идут без пропусков и повторов. """
+        bulk_query = await self.prepare_data(es_write_data, count=30)
+        await redis_client.flushdb()
+
+        film_ids, cursor = [], None
+        for _ in range(4):
+            query_data = {'page_size': 8, 'cursor': cursor} if cursor else {'page_size': 8}
+            response = await make_get_request(self.url, query_data=query_data)
+            assert response.status_code == status.HTTP_200_OK
+            film_ids.extend(film['id'] for film in response.json())
+            cursor = response.headers.get('x-next-cursor')
+            if not cursor:
+                break
+
+        assert len(film_ids) == len(set(film_ids)) == 30
+        assert set(film_ids) == {film['_id'] for film in bulk_query}
+
+    @pytest.mark.asyncio
+    async def test_film_list_bad_cursor(self, es_write_data, make_get_request):
+        """ Тест для проверки обработки некорректного курсора. """
+        await self.prepare_data(es_write_data, count=1)
+
+        response = await make_get_request(self.url, query_data={'cursor': 'wrong cursor'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, f'Ответ должен содержать статус код = {status.HTTP_400_BAD_REQUEST}'
+
     @pytest.mark.asyncio
     async def test_film_cache(self, redis_client, es_write_data, make_get_request):
         """ Тест для проверки работы кеширования. """
@@ -82,7 +129,7 @@ class TestFilmAPI:
         await redis_client.flushdb()
 
         response = await make_get_request(self.url, query_data={'query': 'The Star'})
-        keys = await redis_client.keys()
+        keys = await redis_client.keys('films_all:*')
         await redis_client.aclose()
 
         assert response.status_code == status.HTTP_200_OK, f'Ответ должен содержать статус код = {status.HTTP_200_OK}'
@@ -149,8 +196,66 @@ class TestFilmAPI:
         await redis_client.flushdb()
 
         response = await make_get_request(self.url + '/search', query_data={'query': 'film'})
-        keys = await redis_client.keys()
+        keys = await redis_client.keys('films_search:*')
         await redis_client.aclose()
 
         assert response.status_code == status.HTTP_200_OK, f'Ответ должен содержать статус код = {status.HTTP_200_OK}'
         assert len(keys) == 1, 'В кэше отсутствуют данные'
+
+    @pytest.mark.asyncio
+    async def test_film_cache_key_canonical(self, redis_client, es_write_data, make_get_request):
+        """ Тест того, что порядок и явная передача параметров по умолчанию не порождают новых ключей кэша. """
+        await self.prepare_data(es_write_data, count=1)
+        await redis_client.flushdb()
+
+        await make_get_request(self.url, query_data=None)
+        await make_get_request(self.url, query_data={'page_size': 12, 'page_number': 1})
+        await make_get_request(self.url, query_data={'page_number': 1, 'sort': '-imdb_rating', 'page_size': 12})
+        keys = await redis_client.keys('films_all:*')
+
+        assert len(keys) == 1, 'Одинаковые по смыслу запросы должны попадать в один ключ кэша'
+        assert keys[0].decode('utf-8') == 'films_all:cursor=&genre=&limit=12&offset=0&sort=-imdb_rating'
+
+    @pytest.mark.asyncio
+    async def test_film_autocomplete(self, redis_client, es_write_data, make_get_request):
+        """ Тест подсказок: совпадение по началу слов названия, порядок по рейтингу, один ключ кэша на префикс. """
+        bulk_query = []
+        for title in ('Star Wars', 'Starship Troopers', 'Moon Walk'):
+            films_data = self.film_generator.get_generated_data(title=title, count=2)
+            bulk_query += await generate_bulk_query(index_name=self.movie_index_name, data_generator=films_data)
+        await es_write_data(self.movie_index_name, self.movie_index_schema, bulk_query)
+        await redis_client.flushdb()
+
+        response = await make_get_request(self.url + '/autocomplete', query_data={'prefix': 'Sta'})
+        await make_get_request(self.url + '/autocomplete', query_data={'prefix': '  sta '})
+        narrowed = await make_get_request(self.url + '/autocomplete', query_data={'prefix': 'star w'})
+        keys = await redis_client.keys('films_autocomplete:*')
+
+        assert response.status_code == status.HTTP_200_OK
+        expected = sorted(
+            (film['_source'] for film in bulk_query if film['_source']['title'].startswith('Star')),
+            key=lambda film: (-film['imdb_rating'], film['id']),
+        )
+        assert [film['id'] for film in response.json()] == [film['id'] for film in expected]
+        assert {film['title'] for film in narrowed.json()} == {'Star Wars'}
+        assert len(keys) == 2, 'Префиксы, отличающиеся регистром и пробелами, должны попадать в один ключ кэша'
+
+    @pytest.mark.asyncio
+    async def test_film_facets(self, redis_client, es_write_data, make_get_request):
+        """ Тест фасетов: количество по жанрам, гистограмма рейтинга и фильтр по жанру. """
+        bulk_query = await self.prepare_data(es_write_data, count=15)
+        await redis_client.flushdb()
+
+        response = await make_get_request(self.url + '/facets', query_data=None)
+        filtered = await make_get_request(self.url + '/facets', query_data={'genre': 'b92ef010-5e4c-4fd0-99d6-41b6456272cd'})
+        keys = await redis_client.keys('films_facets:*')
+        body = response.json()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert body['total'] == 15
+        assert {genre['name']: genre['count'] for genre in body['genres']} == {'Sci-Fi': 15, 'Action': 15}
+        assert sum(bucket['count'] for bucket in body['ratings']) == 15
+        expected = sum(1 for film in bulk_query if 7 <= film['_source']['imdb_rating'] < 8)
+        assert next(bucket['count'] for bucket in body['ratings'] if bucket['rating'] == 7) == expected
+        assert filtered.json()['total'] == 0
+        assert len(keys) == 2
@@ -3,6 +3,10 @@ import random
 
 import pytest
 
+from src.cache.managers.redis import RedisCacheManager
+from src.cache.serializers.json import JsonSerializer
+from src.constants.elastic import ElasticIndexNames
+from src.repositories.genre.rankings import RANKING_KEY
 from tests.functional.settings import test_settings
 from tests.functional.utils.generator import GenreGenerator, FilmGenerator, generate_bulk_query
 
@@ -103,9 +107,87 @@ async def test_genre_cache(redis_client, es_write_data, make_get_request):
     url = test_settings.service.url + f'/api/v1/genres/{genre_id}'
     response = await make_get_request(url, query_data=None)
 
-    keys = await redis_client.keys()
+    keys = await redis_client.keys('genre:*')
     await redis_client.aclose()
 
     assert response.status_code == http.HTTPStatus.OK
     assert len(keys) == 1
-    assert keys[0].decode('utf-8') == f'genre:{url}'
+    assert keys[0].decode('utf-8') == f'genre:genre_id={genre_id}'
+
+
+@pytest.mark.asyncio
+async def test_genre_cache_invalidation(redis_client, es_write_data, make_get_request):
+    genre_index_name, genre_index_schema = test_settings.elastic.genre_index
+
+    genres_data = genre_generator.get_generated_data(count=5)
+    bulk_query = await generate_bulk_query(index_name=genre_index_name, data_generator=genres_data)
+    genre_id = bulk_query[0]['_id']
+
+    await es_write_data(genre_index_name, genre_index_schema, bulk_query)
+
+    await redis_client.flushdb()
+
+    await make_get_request(test_settings.service.url + '/api/v1/genres', query_data=None)
+    await make_get_request(test_settings.service.url + f'/api/v1/genres/{genre_id}', query_data=None)
+    await make_get_request(test_settings.service.url + f'/api/v1/genres/{bulk_query[1]["_id"]}', query_data=None)
+
+    cache_manager = RedisCacheManager(redis=redis_client, serializer=JsonSerializer())
+    await cache_manager.invalidate(ElasticIndexNames.GENRE, [genre_id])
+
+    keys = {key.decode('utf-8') for key in await redis_client.keys('genre*')}
+
+    assert keys == {f'genre:genre_id={bulk_query[1]["_id"]}'}, 'Должны удаляться только записи, зависящие от изменённых данных'
+
+
+@pytest.mark.asyncio
+async def test_genre_list_not_modified(redis_client, es_write_data, make_get_request):
+    genre_index_name, genre_index_schema = test_settings.elastic.genre_index
+
+    genres_data = genre_generator.get_generated_data(count=10)
+    bulk_query = await generate_bulk_query(index_name=genre_index_name, data_generator=genres_data)
+
+    await es_write_data(genre_index_name, genre_index_schema, bulk_query)
+
+    await redis_client.flushdb()
+
+    url = test_settings.service.url + '/api/v1/genres'
+    response = await make_get_request(url, query_data=None)
+    etag = response.headers.get('etag')
+
+    not_modified = await make_get_request(url, query_data=None, headers={'If-None-Match': etag})
+    modified = await make_get_request(url, query_data=None, headers={'If-None-Match': '"outdated"'})
+
+    assert response.status_code == http.HTTPStatus.OK
+    assert etag and response.headers.get('cache-control')
+    assert not_modified.status_code == http.HTTPStatus.NOT_MODIFIED
+    assert not_modified.headers.get('etag') == etag
+    assert not_modified.content == b''
+    assert modified.status_code == http.HTTPStatus.OK
+    assert modified.json() == response.json()
+
+
+@pytest.mark.asyncio
+async def test_films_by_genre_ranking(redis_client, es_write_data, make_get_request):
+    movie_index_name, movie_index_schema = test_settings.elastic.movie_index
+    genre_index_name, genre_index_schema = test_settings.elastic.genre_index
+    genre_id = '6c162475-c7ed-4461-9184-001ef3d9f26e'
+
+    films_data = film_generator.get_generated_data(count=4)
+    film_bulk_query = await generate_bulk_query(index_name=movie_index_name, data_generator=films_data)
+    genres_data = genre_generator.get_loaded_data(path='tests/functional/data/genres.json')
+    genre_bulk_query = await generate_bulk_query(index_name=genre_index_name, data_generator=genres_data)
+
+    await es_write_data(movie_index_name, movie_index_schema, film_bulk_query)
+    await es_write_data(genre_index_name, genre_index_schema, genre_bulk_query)
+
+    await redis_client.flushdb()
+    film_ids = [film['_id'] for film in film_bulk_query]
+    await redis_client.zadd(RANKING_KEY.format(genre_id=genre_id), {film_id: -i for i, film_id in enumerate(film_ids)})
+
+    url = test_settings.service.url + f'/api/v1/genres/{genre_id}/films'
+    first = await make_get_request(url, query_data={'page_size': 3})
+    second = await make_get_request(url, query_data={'page_size': 3, 'cursor': first.headers['X-Next-Cursor']})
+
+    assert first.status_code == http.HTTPStatus.OK
+    assert [film['id'] for film in first.json()] == film_ids[:0:-1]
+    assert [film['id'] for film in second.json()] == film_ids[:1]
@@ -103,12 +103,12 @@ async def test_person_cache(redis_client, es_write_data, make_get_request):
     url = test_settings.service.url + f'/api/v1/persons/{person_id}'
     response = await make_get_request(url, query_data=None)
 
-    keys = await redis_client.keys()
+    keys = await redis_client.keys('person:*')
     await redis_client.aclose()
 
     assert response.status_code == http.HTTPStatus.OK
     assert len(keys) == 1
-    assert keys[0].decode('utf-8') == f'person:{url}'
+    assert keys[0].decode('utf-8') == f'person:person_id={person_id}'
 
 
 @pytest.mark.asyncio
@@ -125,12 +125,12 @@ async def test_person_search_cache(redis_client, es_write_data, make_get_request
     url = test_settings.service.url + f'/api/v1/persons/search'
     response = await make_get_request(url, query_data=None)
 
-    keys = await redis_client.keys()
+    keys = await redis_client.keys('person_search:*')
     await redis_client.aclose()
 
     assert response.status_code == http.HTTPStatus.OK
     assert len(keys) == 1
-    assert keys[0].decode('utf-8') == f'person_search:{url}'
+    assert keys[0].decode('utf-8') == 'person_search:cursor=&limit=12&offset=0&query='
 
 
 @pytest.mark.asyncio
@@ -183,3 +183,31 @@ async def test_person_search_name(es_write_data, make_get_request):
 
     assert response.status_code == http.HTTPStatus.OK
     assert  response.json()[0].get('name') == find_name, 'Неудовлетворительный результат поиска, необходимый актёр не найден'
+
+
+@pytest.mark.asyncio
+async def test_films_by_person_filmography(redis_client, es_write_data, make_get_request):
+    person_index_name, person_index_schema = test_settings.elastic.person_index
+
+    person_id = 'ef86b8ff-3c82-4d31-ad8e-72b69f4e3f95'
+    films = [
+        {'id': f'00000000-0000-0000-0000-00000000000{i}', 'title': f'Film {i}', 'imdb_rating': rating, 'roles': ['actors']}
+        for i, rating in enumerate([5.5, 8.1, 7.0, 8.1])
+    ]
+    person = {'id': person_id, 'name': 'Filmography Person', 'films': films}
+    bulk_query = [{'_index': person_index_name, '_id': person_id, '_source': person}]
+
+    await es_write_data(person_index_name, person_index_schema, bulk_query)
+
+    await redis_client.flushdb()
+
+    url = test_settings.service.url + f'/api/v1/persons/{person_id}/films'
+    response = await make_get_request(url, query_data={'page_size': 3})
+    body, status = response.json(), response.status_code
+
+    assert status == http.HTTPStatus.OK
+    assert [film['imdb_rating'] for film in body] == [8.1, 8.1, 7.0]
+    assert [film['id'] for film in body[:2]] == [films[1]['id'], films[3]['id']]
+
+    response = await make_get_request(url, query_data={'page_size': 3, 'cursor': response.headers['X-Next-Cursor']})
+    assert [film['id'] for film in response.json()] == [films[0]['id']]
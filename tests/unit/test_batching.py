@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import NotFoundError
+
+from src.repositories.loader import DocumentLoader
+from src.repositories.msearch import SearchDispatcher
+
+
+class RecordingLoader:
+    def __init__(self, docs=(), error=None):
+        self.docs = {doc_id: {'_id': doc_id} for doc_id in docs}
+        self.error = error
+        self.calls = []
+
+    async def __call__(self, doc_ids):
+        self.calls.append(doc_ids)
+        if self.error:
+            raise self.error
+        return [self.docs[doc_id] for doc_id in doc_ids if doc_id in self.docs]
+
+
+@pytest.mark.asyncio
+async def test_loader_coalesces_requests_of_one_iteration():
+    load_many = RecordingLoader(['a', 'b'])
+    loader = DocumentLoader(load_many)
+
+    docs = await asyncio.gather(loader.load('a'), loader.load('b'), loader.load('a'), loader.load('c'))
+    again = await loader.load('b')
+
+    assert docs == [{'_id': 'a'}, {'_id': 'b'}, {'_id': 'a'}, None]
+    assert again == {'_id': 'b'}
+    assert load_many.calls == [['a', 'b', 'c'], ['b']]
+
+
+@pytest.mark.asyncio
+async def test_loader_error_and_cancellation():
+    load_many = RecordingLoader(['a'])
+    loader = DocumentLoader(load_many)
+
+    cancelled = asyncio.create_task(loader.load('a'))
+    waiting = asyncio.create_task(loader.load('a'))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiting == {'_id': 'a'}
+    assert cancelled.cancelled()
+
+    failing = DocumentLoader(RecordingLoader(error=ConnectionError('elastic')))
+    results = await asyncio.gather(failing.load('a'), failing.load('b'), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+class MsearchElastic:
+    """ Отвечает на _msearch по очереди заготовленными ответами отдельных запросов """
+
+    def __init__(self, error=None):
+        self.error = error
+        self.requests = []
+
+    async def msearch(self, searches, filter_path=None):
+        self.requests.append({'searches': searches, 'filter_path': filter_path})
+        if self.error:
+            raise self.error
+
+        responses = []
+        for header, body in zip(searches[::2], searches[1::2]):
+            if header['index'] == 'missing':
+                responses.append({'status': 404, 'error': {'type': 'index_not_found_exception'}})
+            else:
+                responses.append({'status': 200, 'hits': {'hits': [{'_source': {'index': header['index'], **body}}]}})
+        return MsearchResponse(responses=responses)
+
+
+class MsearchResponse(dict):
+    meta = ApiResponseMeta(200, '1.1', HttpHeaders(), 0.0, NodeConfig('http', 'localhost', 9200))
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_one_msearch():
+    elastic = MsearchElastic()
+    dispatcher = SearchDispatcher(elastic, max_wait=0.01, filter_path=['hits.hits._source'])
+
+    first, second, missing = await asyncio.gather(
+        dispatcher.search('movies', {'size': 1}, request_cache=True),
+        dispatcher.search('persons', {'size': 2}),
+        dispatcher.search('missing', {'size': 3}),
+        return_exceptions=True,
+    )
+
+    assert len(elastic.requests) == 1
+    assert elastic.requests[0]['searches'][0] == {'index': 'movies', 'request_cache': True}
+    assert elastic.requests[0]['filter_path'] == ['responses.hits.hits._source', 'responses.status', 'responses.error']
+    assert first['hits']['hits'][0]['_source'] == {'index': 'movies', 'size': 1}
+    assert second['hits']['hits'][0]['_source'] == {'index': 'persons', 'size': 2}
+    assert isinstance(missing, NotFoundError)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_flushes_full_batch_and_shares_transport_error():
+    elastic = MsearchElastic()
+    dispatcher = SearchDispatcher(elastic, max_batch_size=2, max_wait=10)
+
+    await asyncio.gather(*(dispatcher.search('movies', {'from': i}) for i in range(4)))
+    assert [len(request['searches']) for request in elastic.requests] == [4, 4]
+
+    failing = SearchDispatcher(MsearchElastic(error=ConnectionError('elastic')), max_wait=0)
+    results = await asyncio.gather(failing.search('movies', {}), failing.search('movies', {}), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
@@ -0,0 +1,339 @@
+import asyncio
+import struct
+from typing import Annotated
+
+import orjson
+import pytest
+from fastapi import Depends, HTTPException
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from src.cache import entry as cache_entry
+from src.cache.entry import CacheEntry
+from src.cache.keys import MAX_KEY_LENGTH, build_cache_key, get_key_params
+from src.cache.managers.redis import CACHE_STATUS_HEADER, RedisCacheManager
+from src.cache.serializers.format import FormatSerializer
+from src.cache.serializers.json import JsonSerializer
+from src.cache.serializers.response import ResponseSerializer
+from src.models.base import BasePaginationParams
+from src.models.film import FilmQueryParams, FilmSortParams
+
+
+class Item(BaseModel):
+    id: str
+    title: str
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """ Строки и множества Redis в словаре, без учёта TTL """
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    async def sscan(self, key, cursor=0, count=10):
+        members = sorted(self.data.get(key, ()))
+        page = members[cursor:cursor + count]
+        return (cursor + count if cursor + count < len(members) else 0), page
+
+    async def srem(self, key, *members):
+        self.data.get(key, set()).difference_update(members)
+
+    async def expire(self, key, seconds, nx=False, gt=False):
+        return True
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+
+
+def make_request(path='/items/1', headers=()):
+    return Request({
+        'type': 'http',
+        'method': 'GET',
+        'scheme': 'http',
+        'server': ('testserver', 80),
+        'path': path,
+        'query_string': b'',
+        'headers': list(headers),
+    })
+
+
+def make_manager(redis=None, serializer=None, lock_wait=1):
+    serializer = serializer or JsonSerializer()
+    return RedisCacheManager(redis or FakeRedis(), serializer, lock_wait=lock_wait, lock_poll_interval=0.01)
+
+
+def test_cache_key_is_canonical():
+    sort = FilmSortParams.parse_sort_param('-imdb_rating')
+    params = FilmQueryParams(limit=10, offset=0, sort=sort, genre=None)
+
+    key = build_cache_key('films', {'params': params, 'request': make_request()})
+
+    assert key == build_cache_key('films', {'params': FilmQueryParams(sort=sort, genre=None, offset=0, limit=10)})
+    assert key.startswith('films:') and 'sort=-imdb_rating' in key
+    # Строка поиска уходит в Elasticsearch как есть, поэтому и в ключ попадает без изменений
+    assert build_cache_key('search', {'query': 'Star Wars'}) != build_cache_key('search', {'query': 'star wars'})
+    assert build_cache_key('search', {'query': 'a&limit=1'}) != build_cache_key('search', {'query': 'a', 'limit': 1})
+    assert len(build_cache_key('films', {'ids': 'x' * MAX_KEY_LENGTH})) == len('films:') + 32
+    assert build_cache_key('films', {'params': BasePaginationParams(limit=10, offset=0)}) != key
+
+
+def test_cache_key_rejects_unsupported_params():
+    def get_service():
+        return object()
+
+    async def handler(
+            request: Request,
+            service: Annotated[object, Depends(get_service)],
+            params: Annotated[FilmQueryParams, Depends(get_service)],
+            item_id: str,
+    ):
+        ...
+
+    assert get_key_params(handler) == {'request', 'params', 'item_id'}
+    with pytest.raises(TypeError):
+        build_cache_key('films', {'ids': ['1', '2']})
+
+
+@pytest.mark.asyncio
+async def test_single_flight_computes_once():
+    manager = make_manager()
+    calls = []
+
+    @manager.cache(Item, 'items', expire=60)
+    async def handler(*, request, item_id):
+        calls.append(item_id)
+        await asyncio.sleep(0.01)
+        return Item(id=item_id, title='Star Wars')
+
+    responses = await asyncio.gather(*(handler(request=make_request(), item_id='1') for _ in range(5)))
+    cached = await handler(request=make_request(), item_id='1')
+
+    assert calls == ['1']
+    assert {response.headers['ETag'] for response in responses} == {cached.headers['ETag']}
+    assert b'Star Wars' in cached.body and cached.headers[CACHE_STATUS_HEADER] == 'HIT'
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors():
+    manager = make_manager()
+    calls = []
+
+    @manager.cache(Item, 'items', expire=60)
+    async def handler(*, request, item_id):
+        calls.append(item_id)
+        await asyncio.sleep(0.01)
+        raise ConnectionError('elastic')
+
+    results = await asyncio.gather(*(handler(request=make_request(), item_id='1') for _ in range(3)), return_exceptions=True)
+
+    assert calls == ['1']
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors_and_negative_entries():
+    manager = make_manager()
+    calls = []
+
+    @manager.cache(Item, 'items', expire=60, negative_expire=30)
+    async def handler(*, request, item_id):
+        calls.append(item_id)
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=404, detail='not found')
+
+    results = await asyncio.gather(*(handler(request=make_request(), item_id='1') for _ in range(3)), return_exceptions=True)
+    with pytest.raises(HTTPException):
+        await handler(request=make_request(), item_id='1')
+
+    assert calls == ['1']
+    assert all(isinstance(result, HTTPException) and result.status_code == 404 for result in results)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_waits_for_other_worker():
+    redis = FakeRedis()
+    manager = make_manager(redis)
+    calls = []
+
+    @manager.cache(Item, 'items', expire=60)
+    async def handler(*, request, item_id):
+        calls.append(item_id)
+        return Item(id=item_id, title='computed')
+
+    # Блокировку держит другой воркер, он же записывает значение в кэш
+    key = build_cache_key('items', {'item_id': '1'})
+    redis.data[f'lock:{key}'] = 'other'
+
+    async def other_worker():
+        await asyncio.sleep(0.03)
+        redis.data[key] = Item(id='1', title='from other worker').json()
+
+    result, _ = await asyncio.gather(handler(request=make_request(), item_id='1'), other_worker())
+
+    assert b'from other worker' in result.body
+    assert calls == []
+
+
+def test_entry_round_trip():
+    entry = CacheEntry(b'payload', stale_at=100.5, delta=0.25)
+
+    unpacked = CacheEntry.unpack(entry.pack())
+
+    assert unpacked == entry
+    assert unpacked.etag == entry.etag and len(entry.etag) == 16
+    # Запись без заголовка свежая, пока живёт в Redis
+    assert not CacheEntry.unpack(b'{"id": "1"}').is_stale()
+
+
+def test_entry_reads_previous_header_versions():
+    legacy = struct.Struct('!2sBdf').pack(CacheEntry.MAGIC, 1, 100.0, 0.5) + b'payload'
+    with_status = struct.Struct('!2sBdfH').pack(CacheEntry.MAGIC, 2, 100.0, 0.5, 404) + b'not found'
+
+    assert CacheEntry.unpack(legacy) == CacheEntry(b'payload', 100.0, 0.5)
+    assert CacheEntry.unpack(with_status).is_negative
+
+
+def test_entry_early_refresh(monkeypatch):
+    entry = CacheEntry(b'', stale_at=100.0, delta=2.0)
+
+    assert entry.should_refresh(now=100.0)
+    assert not entry.should_refresh(now=99.0)
+    # -delta * beta * ln(1 - 0.9) = 4.6 секунды до stale_at
+    monkeypatch.setattr(cache_entry.random, 'random', lambda: 0.9)
+    assert entry.should_refresh(beta=1.0, now=96.0)
+    assert not entry.should_refresh(beta=1.0, now=95.0)
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_and_refreshed_in_background():
+    redis = FakeRedis()
+    manager = make_manager(redis)
+    titles = iter(['old', 'new'])
+
+    @manager.cache(Item, 'items', expire=60, soft_expire=0)
+    async def handler(*, request, item_id):
+        await asyncio.sleep(0.01)
+        return Item(id=item_id, title=next(titles))
+
+    await handler(request=make_request(), item_id='1')
+    stale = await asyncio.gather(*(handler(request=make_request(), item_id='1') for _ in range(3)))
+    await asyncio.gather(*manager._background_tasks)
+
+    assert all(b'old' in response.body for response in stale)
+    assert b'new' in (await handler(request=make_request(), item_id='1')).body
+    assert not [key for key in redis.data if key.startswith('lock:')]
+
+
+@pytest.mark.asyncio
+async def test_tag_does_not_keep_expired_keys():
+    redis = FakeRedis()
+    manager = RedisCacheManager(redis, FormatSerializer(ResponseSerializer()), tag_prune_batch_size=10)
+
+    await manager.set('items:live', Item(id='live', title='Star Wars'), 60, tags=['tag:items'])
+    for i in range(1000):
+        await manager.set(f'items:{i}', Item(id=str(i), title='Star Wars'), 60, tags=['tag:items'])
+        # Запись истекла в Redis, её ключ остался в теге
+        del redis.data[f'items:{i}']
+        assert len(redis.data['tag:items']) <= 20
+
+    assert 'items:live' in redis.data['tag:items']
+
+
+@pytest.mark.asyncio
+async def test_etag_not_modified():
+    manager = make_manager(serializer=FormatSerializer(ResponseSerializer()))
+
+    @manager.cache(Item, 'items', expire=60)
+    async def handler(*, request, item_id):
+        return Item(id=item_id, title='Star Wars')
+
+    etag = (await handler(request=make_request(), item_id='1')).headers['ETag']
+    response = await handler(request=make_request(headers=[(b'if-none-match', f'W/{etag}'.encode())]), item_id='1')
+
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_batch_response_has_etag_and_not_modified():
+    manager = make_manager()
+    calls = []
+
+    async def fetch(ids):
+        calls.append(ids)
+        return {item_id: Item(id=item_id, title='Star Wars') for item_id in ids if item_id != 'missing'}
+
+    first = await manager.cache_many(make_request(), Item, 'item', 'item_id', ['1', 'missing', '2'], fetch, not_found_detail='not found')
+    etag = first.headers['ETag']
+    second = await manager.cache_many(make_request(headers=[(b'if-none-match', etag.encode())]), Item, 'item', 'item_id', ['1', 'missing', '2'], fetch)
+    reordered = await manager.cache_many(make_request(headers=[(b'if-none-match', etag.encode())]), Item, 'item', 'item_id', ['2', '1'], fetch)
+
+    assert [item['id'] for item in orjson.loads(first.body)] == ['1', '2']
+    assert first.headers['Cache-Control'] == 'public, max-age=60' and first.headers[CACHE_STATUS_HEADER] == 'MISS'
+    assert second.status_code == 304 and second.headers[CACHE_STATUS_HEADER] == 'HIT'
+    assert reordered.status_code == 200 and reordered.headers['ETag'] != etag
+    assert calls == [['1', 'missing', '2']]
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_background_refresh():
+    redis = FakeRedis()
+    manager = make_manager(redis)
+    started = asyncio.Event()
+
+    @manager.cache(Item, 'items', expire=60, soft_expire=0)
+    async def handler(*, request, item_id):
+        if manager._background_tasks:
+            started.set()
+            await asyncio.sleep(60)
+        return Item(id=item_id, title='Star Wars')
+
+    await handler(request=make_request(), item_id='1')
+    await handler(request=make_request(), item_id='1')
+    await asyncio.wait_for(started.wait(), 1)
+    tasks = list(manager._background_tasks)
+
+    await manager.close()
+
+    assert tasks and all(task.done() for task in tasks) and not manager._background_tasks
+    # Отменённое обновление снимает свою блокировку
+    assert not [key for key in redis.data if key.startswith('lock:')]
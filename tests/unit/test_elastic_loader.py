@@ -0,0 +1,104 @@
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import BadRequestError
+
+from etl.client import ElasticLoader
+
+SCHEMA = {'settings': {'analysis': {}}, 'mappings': {'dynamic': 'strict', 'properties': {'id': {'type': 'keyword'}}}}
+
+
+def make_bad_request():
+    meta = ApiResponseMeta(400, '1.1', HttpHeaders(), 0.0, NodeConfig('http', 'localhost', 9200))
+    return BadRequestError('illegal_argument_exception', meta, {})
+
+
+class RecordingIndices:
+    def __init__(self, existing, mapping_error=None):
+        self.existing = existing
+        self.mapping_error = mapping_error
+        self.requests = []
+
+    async def exists(self, index):
+        return index in self.existing
+
+    async def create(self, index, body):
+        self.requests.append(('create', index, body))
+
+    async def put_mapping(self, index, body):
+        self.requests.append(('put_mapping', index))
+        if self.mapping_error:
+            raise self.mapping_error
+
+    async def get(self, index):
+        return {self.existing[index]: {}}
+
+    async def update_aliases(self, actions):
+        self.requests.append(('update_aliases', actions))
+
+    async def delete(self, index):
+        self.requests.append(('delete', index))
+
+
+class RecordingElastic:
+    def __init__(self, indices, reindex_response=None):
+        self.indices = indices
+        self.reindex_response = reindex_response or {'total': 3, 'failures': []}
+        self.reindexed = []
+
+    async def reindex(self, **kwargs):
+        self.reindexed.append(kwargs)
+        return self.reindex_response
+
+
+@pytest.mark.asyncio
+async def test_new_index_is_created_behind_alias(monkeypatch):
+    monkeypatch.setattr(ElasticLoader, 'get_versioned_name', staticmethod(lambda name: f'{name}_1'))
+    indices = RecordingIndices({})
+
+    await ElasticLoader(RecordingElastic(indices)).create_index('movies', SCHEMA)
+
+    assert indices.requests == [('create', 'movies_1', {**SCHEMA, 'aliases': {'movies': {}}})]
+
+
+@pytest.mark.asyncio
+async def test_compatible_mapping_is_updated_in_place():
+    indices = RecordingIndices({'movies': 'movies_1'})
+    elastic = RecordingElastic(indices)
+
+    await ElasticLoader(elastic).create_index('movies', SCHEMA)
+
+    assert indices.requests == [('put_mapping', 'movies')]
+    assert elastic.reindexed == []
+
+
+@pytest.mark.asyncio
+async def test_rejected_mapping_migrates_to_new_index(monkeypatch):
+    monkeypatch.setattr(ElasticLoader, 'get_versioned_name', staticmethod(lambda name: f'{name}_2'))
+    # Индекс без алиаса, созданный прежней версией ETL
+    indices = RecordingIndices({'persons': 'persons'}, mapping_error=make_bad_request())
+    elastic = RecordingElastic(indices)
+
+    await ElasticLoader(elastic).create_index('persons', SCHEMA)
+
+    assert elastic.reindexed[0]['source'] == {'index': 'persons'}
+    assert elastic.reindexed[0]['dest'] == {'index': 'persons_2'}
+    assert indices.requests[1:] == [
+        ('create', 'persons_2', SCHEMA),
+        ('update_aliases', [
+            {'add': {'index': 'persons_2', 'alias': 'persons'}},
+            {'remove_index': {'index': 'persons'}},
+        ]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_migration_is_not_swallowed(monkeypatch):
+    monkeypatch.setattr(ElasticLoader, 'get_versioned_name', staticmethod(lambda name: f'{name}_2'))
+    indices = RecordingIndices({'persons': 'persons_1'}, mapping_error=make_bad_request())
+    elastic = RecordingElastic(indices, reindex_response={'total': 1, 'failures': [{'id': 'p1'}]})
+
+    with pytest.raises(RuntimeError):
+        await ElasticLoader(elastic).create_index('persons', SCHEMA)
+
+    assert indices.requests[-1] == ('delete', 'persons_2')
+    assert not any(request[0] == 'update_aliases' for request in indices.requests)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from src.models.base import Cursor
+from src.models.film import FilmQueryParams, FilmSortParams
+from src.repositories.film.columns import FilmColumnIndex, FilmColumns
+from src.repositories.film.elastic import ElasticFilmRepository
+
+FILMS = [
+    {'id': 'a', 'imdb_rating': 7.1, 'genres': [{'id': 'g1'}]},
+    {'id': 'b', 'imdb_rating': 8.6, 'genres': [{'id': 'g1'}, {'id': 'g2'}]},
+    {'id': 'c', 'imdb_rating': 7.1, 'genres': [{'id': 'g2'}]},
+    {'id': 'd', 'imdb_rating': 9.0, 'genres': []},
+    {'id': 'e', 'imdb_rating': 7.1, 'genres': [{'id': 'g1'}]},
+]
+
+
+def make_params(limit=10, offset=0, cursor=None, sort='-imdb_rating', genre=None):
+    sort = FilmSortParams.parse_sort_param(sort) if sort else None
+    return FilmQueryParams(limit=limit, offset=offset, cursor=cursor, sort=sort, genre=genre)
+
+
+def read_all(columns, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = columns.get_page(make_params(limit=2, cursor=cursor, **kwargs))
+        ids.extend(page)
+        if not (cursor := page.next_cursor):
+            return ids
+
+
+@pytest.mark.parametrize('sort, genre, expected', [
+    ('-imdb_rating', None, ['d', 'b', 'a', 'c', 'e']),
+    ('imdb_rating', None, ['a', 'c', 'e', 'b', 'd']),
+    (None, None, ['a', 'b', 'c', 'd', 'e']),
+    ('-imdb_rating', 'g1', ['b', 'a', 'e']),
+    ('imdb_rating', 'g2', ['c', 'b']),
+])
+def test_pages(sort, genre, expected):
+    columns = FilmColumns(FILMS)
+
+    assert list(columns.get_page(make_params(sort=sort, genre=genre))) == expected
+    assert list(columns.get_page(make_params(limit=2, offset=1, sort=sort, genre=genre))) == expected[1:3]
+    assert read_all(columns, sort=sort, genre=genre) == expected
+
+
+def test_cursor_matches_elastic_sort_values():
+    columns = FilmColumns(FILMS)
+
+    page = columns.get_page(make_params(limit=2))
+
+    # Поле float индекса возвращает значение сортировки float32, приведённое к double
+    assert Cursor.decode(page.next_cursor).search_after == [float(np.float32(8.6)), 'b']
+    # Курсор выдачи из индекса с PIT содержит ещё значение _shard_doc
+    cursor = Cursor([float(np.float32(7.1)), 'a', 42], 'pit').encode()
+    assert list(columns.get_page(make_params(cursor=cursor))) == ['c', 'e']
+
+
+def test_unknown_genre_and_bad_cursor():
+    columns = FilmColumns(FILMS)
+
+    assert columns.get_page(make_params(genre='unknown')) is None
+    with pytest.raises(HTTPException):
+        columns.get_page(make_params(cursor=Cursor(['a'], None).encode()))
+
+
+class MgetElastic:
+    def __init__(self):
+        self.requests = []
+
+    async def mget(self, **kwargs):
+        self.requests.append(kwargs)
+        return {'docs': [{'_id': film_id, '_source': {'id': film_id}, 'found': True} for film_id in kwargs['ids']]}
+
+
+@pytest.mark.asyncio
+async def test_repository_hydrates_only_page():
+    elastic = MgetElastic()
+    index = FilmColumnIndex(redis=None)
+    index.columns = FilmColumns(FILMS)
+    repository = ElasticFilmRepository(elastic, columns=index)
+
+    page = await repository.all(make_params(limit=2, genre='g1'))
+
+    assert [film['_id'] for film in page] == ['b', 'a']
+    assert page.next_cursor is not None
+    assert [request['ids'] for request in elastic.requests] == [['b', 'a']]
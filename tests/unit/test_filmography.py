@@ -0,0 +1,84 @@
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import NotFoundError
+from fastapi import HTTPException
+
+from etl.pipeline import add_filmographies, build_filmographies
+from src.models.base import BasePaginationParams, Cursor
+from src.repositories.person.elastic import ElasticPersonRepository, paginate_filmography
+
+FILMS = [
+    {'id': 'a', 'title': 'A', 'imdb_rating': 5.0, 'roles': ['actors']},
+    {'id': 'b', 'title': 'B', 'imdb_rating': 9.0, 'roles': ['directors']},
+    {'id': 'c', 'title': 'C', 'imdb_rating': 7.5, 'roles': ['actors', 'writers']},
+    {'id': 'd', 'title': 'D', 'imdb_rating': 9.0, 'roles': ['writers']},
+]
+
+
+def test_build_filmographies():
+    movies = [
+        {'id': 'm1', 'title': 'M1', 'imdb_rating': 7.5, 'actors': [{'id': 'p1'}], 'directors': [], 'writers': [{'id': 'p1'}]},
+        {'id': 'm2', 'title': 'M2', 'imdb_rating': 6.0, 'actors': [{'id': 'p2'}], 'directors': [{'id': 'p1'}], 'writers': None},
+    ]
+
+    assert build_filmographies(movies) == {
+        'p1': [
+            {'id': 'm1', 'title': 'M1', 'imdb_rating': 7.5, 'roles': ['actors', 'writers']},
+            {'id': 'm2', 'title': 'M2', 'imdb_rating': 6.0, 'roles': ['directors']},
+        ],
+        'p2': [{'id': 'm2', 'title': 'M2', 'imdb_rating': 6.0, 'roles': ['actors']}],
+    }
+    assert add_filmographies([{'id': 'p3', 'name': 'P3'}], movies) == [{'id': 'p3', 'name': 'P3', 'films': []}]
+
+
+def test_paginate_filmography_by_offset():
+    page = paginate_filmography(FILMS, BasePaginationParams(limit=2, offset=1))
+
+    assert page == [
+        {'_id': 'd', '_source': {'id': 'd', 'title': 'D', 'imdb_rating': 9.0}, 'sort': [9.0, 'd']},
+        {'_id': 'c', '_source': {'id': 'c', 'title': 'C', 'imdb_rating': 7.5}, 'sort': [7.5, 'c']},
+    ]
+    assert Cursor.decode(page.next_cursor).search_after == [7.5, 'c']
+
+
+def test_paginate_filmography_by_cursor():
+    first = paginate_filmography(FILMS, BasePaginationParams(limit=2, offset=0))
+    second = paginate_filmography(FILMS, BasePaginationParams(limit=2, offset=0, cursor=first.next_cursor))
+
+    assert [film['_id'] for film in first] == ['b', 'd']
+    assert [film['_id'] for film in second] == ['c', 'a']
+    assert second.next_cursor is None
+
+
+def test_paginate_filmography_bad_cursor():
+    cursor = Cursor(['b'], None).encode()
+
+    with pytest.raises(HTTPException):
+        paginate_filmography(FILMS, BasePaginationParams(limit=2, offset=0, cursor=cursor))
+
+
+class PersonElastic:
+    """ Отдаёт документы персон по id и запоминает запросы к индексу """
+
+    def __init__(self, persons):
+        self.persons = persons
+        self.requests = []
+
+    async def get(self, **kwargs):
+        self.requests.append(kwargs)
+        if kwargs['id'] not in self.persons:
+            meta = ApiResponseMeta(404, '1.1', HttpHeaders(), 0.0, NodeConfig('http', 'localhost', 9200))
+            raise NotFoundError('not_found', meta, {})
+        return {'_source': {'films': self.persons[kwargs['id']]}}
+
+
+@pytest.mark.asyncio
+async def test_person_films_read_with_existence_check():
+    elastic = PersonElastic({'p1': FILMS})
+    repository = ElasticPersonRepository(elastic)
+
+    page = await repository.get_films('p1', BasePaginationParams(limit=2, offset=0))
+
+    assert [film['_id'] for film in page] == ['b', 'd']
+    assert await repository.get_films('unknown', BasePaginationParams(limit=2, offset=0)) is None
+    assert len(elastic.requests) == 2
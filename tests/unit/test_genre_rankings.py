@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+from src.models.base import BasePaginationParams, Cursor
+from src.repositories.genre import rankings as genre_rankings
+from src.repositories.genre.rankings import GENRES_KEY, RANKING_KEY, GenreRankings, get_score
+
+KEY = RANKING_KEY.format(genre_id='g1')
+# Порядок выдачи индекса: imdb_rating desc, id asc
+FILMS = {'a': 8.6, 'c': 8.6, 'b': 8.6, 'd': 9.1, 'e': 7.0}
+ES_ORDER = ['d', 'a', 'b', 'c', 'e']
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """ Sorted set и множества Redis: при равном score члены упорядочены по байтам, как в Redis """
+
+    def __init__(self):
+        self.zsets = {}
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _ordered(self, key):
+        return sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    async def exists(self, key):
+        return int(key in self.zsets)
+
+    async def delete(self, key):
+        self.zsets.pop(key, None)
+        self.sets.pop(key, None)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update({member.encode(): score for member, score in mapping.items()})
+
+    async def zrange(self, key, start, end, withscores=False, byscore=False):
+        items = self._ordered(key)
+        items = [item for item in items if start <= item[1] <= end] if byscore else items[start:end + 1]
+        return items if withscores else [member for member, _ in items]
+
+    async def zrank(self, key, member):
+        members = [item[0] for item in self._ordered(key)]
+        return members.index(member.encode()) if member.encode() in members else None
+
+    async def zcount(self, key, low, high):
+        assert low == '-inf' and high.startswith('(')
+        return sum(score < float(high[1:]) for _, score in self._ordered(key))
+
+    async def smembers(self, key):
+        return {member.encode() for member in self.sets.get(key, ())}
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+
+async def read_all(rankings, limit):
+    ids, cursor = [], None
+    while True:
+        page = await rankings.get_page('g1', BasePaginationParams(limit=limit, offset=0, cursor=cursor))
+        ids.extend(page)
+        if not (cursor := page.next_cursor):
+            return ids
+
+
+@pytest.mark.asyncio
+async def test_pages_follow_index_order():
+    redis = FakeRedis()
+    await redis.zadd(KEY, {film_id: get_score(rating) for film_id, rating in FILMS.items()})
+    rankings = GenreRankings(redis)
+
+    first = await rankings.get_page('g1', BasePaginationParams(limit=2, offset=0))
+
+    assert list(first) == ES_ORDER[:2]
+    # Курсор совпадает с sort последнего фильма в выдаче индекса: рейтинг float32 и id
+    assert Cursor.decode(first.next_cursor).search_after == [float(np.float32(8.6)), 'a']
+    assert await read_all(rankings, 2) == ES_ORDER
+    assert await rankings.get_page('g2', BasePaginationParams(limit=2, offset=0)) is None
+
+
+@pytest.mark.asyncio
+async def test_cursor_of_removed_film_continues_after_it():
+    redis = FakeRedis()
+    await redis.zadd(KEY, {film_id: get_score(rating) for film_id, rating in FILMS.items() if film_id != 'b'})
+    rankings = GenreRankings(redis)
+    # Курсор страницы, построенной до того, как фильм b выпал из рейтинга
+    cursor = Cursor([float(np.float32(8.6)), 'b'], None).encode()
+
+    page = await rankings.get_page('g1', BasePaginationParams(limit=10, offset=0, cursor=cursor))
+
+    assert list(page) == ['c', 'e']
+
+
+@pytest.mark.asyncio
+async def test_materialize_skips_genres_with_unrated_films(monkeypatch):
+    films = [
+        {'id': 'a', 'imdb_rating': 8.6, 'genres': [{'id': 'g1'}, {'id': 'g2'}]},
+        {'id': 'b', 'imdb_rating': None, 'genres': [{'id': 'g2'}]},
+        {'id': 'c', 'genres': [{'id': 'g3'}]},
+    ]
+
+    async def scan(*args, **kwargs):
+        for film in films:
+            yield {'_source': film}
+
+    monkeypatch.setattr(genre_rankings, 'async_scan', scan)
+    redis = FakeRedis()
+
+    assert await GenreRankings(redis).materialize(elastic=None) == 1
+    assert redis.zsets == {KEY: {b'a': get_score(8.6)}}
+    assert redis.sets[GENRES_KEY] == {'g1'}
@@ -0,0 +1,33 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from src.exceptions.genre import GenreNotFound
+from src.models.base import BasePaginationParams, Page
+from src.serializers.genre.elastic import ElasticGenreSerializer
+from src.services.genre import GenreService
+
+
+class CursorCheckingRepository:
+    """ Жанр g1 существует; выдача фильмов отклоняет курсор, как репозиторий Elasticsearch """
+
+    async def get_by_id(self, genre_id):
+        return {'id': genre_id} if genre_id == 'g1' else None
+
+    async def get_films(self, genre_id, params):
+        if params.cursor:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+        return Page()
+
+
+@pytest.mark.asyncio
+async def test_unknown_genre_is_not_found_before_bad_cursor():
+    service = GenreService(CursorCheckingRepository(), ElasticGenreSerializer())
+    params = BasePaginationParams(limit=10, offset=0, cursor='broken')
+
+    with pytest.raises(GenreNotFound):
+        await service.get_films_by_genre('unknown', params)
+    with pytest.raises(HTTPException) as error:
+        await service.get_films_by_genre('g1', params)
+    assert error.value.status_code == HTTPStatus.BAD_REQUEST
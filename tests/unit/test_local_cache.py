@@ -0,0 +1,134 @@
+import orjson
+import pytest
+
+from src.cache.managers import memory
+from src.cache.managers.memory import LRUCache
+from src.cache.managers.redis import INVALIDATION_CHANNEL
+from src.cache.managers.tiered import TieredCacheManager
+from src.cache.serializers.json import JsonSerializer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(memory.time, 'monotonic', clock)
+    return clock
+
+
+def test_lru_evicts_least_recently_used_by_entries():
+    cache = LRUCache(max_size=1024, max_entries=2, ttl=60)
+
+    cache.set('a', b'1')
+    cache.set('b', b'2')
+    cache.get('a')
+    cache.set('c', b'3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1' and cache.get('c') == b'3'
+    assert len(cache) == 2
+
+
+def test_lru_evicts_by_size():
+    cache = LRUCache(max_size=10, max_entries=100, ttl=60)
+
+    cache.set('a', b'1234')
+    cache.set('b', b'1234')
+    cache.set('c', b'1234')
+    cache.set('big', b'12345678901')
+
+    assert cache.get('a') is None and cache.get('big') is None
+    assert cache.size == 10
+
+
+def test_lru_ttl_is_shortest_of_prefix_and_expire(clock):
+    cache = LRUCache(max_size=1024, max_entries=100, ttl=60, prefix_ttls={'films': 10})
+
+    cache.set('films:1', b'1', expire=30)
+    cache.set('persons:1', b'1', expire=2.5)
+    cache.set('genres:1', b'1', expire=0)
+
+    clock.now += 3
+    assert cache.get('films:1') == b'1'
+    assert cache.get('persons:1') is None
+    assert cache.get('genres:1') is None
+    clock.now += 7
+    assert cache.get('films:1') is None
+    assert cache.size == 0
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args))
+
+    async def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """ Строки с TTL в миллисекундах и опубликованные сообщения """
+
+    def __init__(self, data=None, ttls=None):
+        self.data = data or {}
+        self.ttls = ttls or {}
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pttl(self, key):
+        return self.ttls.get(key, -1) if key in self.data else -2
+
+    def unlink(self, *keys):
+        return sum(self.data.pop(key.decode() if isinstance(key, bytes) else key, None) is not None for key in keys)
+
+    def publish(self, channel, message):
+        self.published.append((channel, orjson.loads(message)))
+
+
+@pytest.mark.asyncio
+async def test_tiered_keeps_entry_no_longer_than_redis(clock):
+    redis = FakeRedis({'films:1': b'a', 'films:2': b'b'}, {'films:1': 1500})
+    manager = TieredCacheManager(redis, JsonSerializer(), LRUCache(max_size=1024, max_entries=100, ttl=60))
+
+    assert await manager.get('films:1') == b'a'
+    entries = await manager.get_entries(['films:2', 'films:3'])
+    assert entries[0].payload == b'b' and entries[1] is None
+
+    redis.data.clear()
+    clock.now += 1
+    assert await manager.get('films:1') == b'a'
+    assert await manager.get('films:2') == b'b'
+    clock.now += 1
+    assert await manager.get('films:1') is None
+
+
+@pytest.mark.asyncio
+async def test_invalidation_is_published_for_other_processes():
+    redis = FakeRedis({'films:1': b'a', 'tag': b''})
+    manager = TieredCacheManager(redis, JsonSerializer(), LRUCache(max_size=1024, max_entries=100, ttl=60))
+    await manager.get('films:1')
+
+    assert await manager._delete([b'films:1', 'tag']) == 2
+    assert manager.local.get('films:1') is None
+    assert redis.published == [(INVALIDATION_CHANNEL, ['films:1', 'tag'])]
@@ -0,0 +1,171 @@
+import pytest
+from fastapi import HTTPException
+
+from src.models.base import AutocompleteParams, BasePaginationParams, Cursor
+from src.models.film import FilmFacetParams, FilmQueryParams, FilmSearchParams, FilmSortParams
+from src.models.person import PersonSearchParams
+from src.repositories.film.memory import MemoryFilmRepository
+from src.repositories.genre.memory import MemoryGenreRepository
+from src.repositories.memory.analysis import analyze
+from src.repositories.memory.catalog import MemoryCatalog
+from src.repositories.memory.index import InvertedIndex, bounded_distance
+from src.repositories.person.memory import MemoryPersonRepository
+
+SCI_FI = {'id': 'g1', 'name': 'Sci-Fi'}
+DRAMA = {'id': 'g2', 'name': 'Drama'}
+LUCAS = {'id': 'p1', 'name': 'George Lucas'}
+HAMILL = {'id': 'p2', 'name': 'Mark Hamill'}
+
+
+def make_film(film_id, title, rating, genres, description='', directors=(), actors=()):
+    return {
+        'id': film_id,
+        'title': title,
+        'imdb_rating': rating,
+        'description': description,
+        'genres': list(genres),
+        'directors': list(directors),
+        'actors': list(actors),
+        'writers': [],
+        'directors_names': [person['name'] for person in directors],
+        'actors_names': [person['name'] for person in actors],
+        'writers_names': [],
+    }
+
+
+FILMS = [
+    make_film('f1', 'Star Wars', 8.6, [SCI_FI], 'A galaxy far away', directors=[LUCAS], actors=[HAMILL]),
+    make_film('f2', 'The Empire Strikes Back', 8.7, [SCI_FI], 'Rebels hide on Hoth', actors=[HAMILL]),
+    make_film('f3', 'Star Trek', 7.9, [SCI_FI], 'Space travels of the Enterprise'),
+    make_film('f4', 'Lonely Stars', 6.5, [DRAMA], 'A quiet story about astronomers'),
+    make_film('f5', 'Звёздные войны', 8.6, [SCI_FI, DRAMA], 'Русское название'),
+]
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return MemoryCatalog(FILMS, [LUCAS, HAMILL], [SCI_FI, DRAMA])
+
+
+def ids(page):
+    return [hit['_id'] for hit in page]
+
+
+def test_analyze():
+    assert analyze("The Empire's Strikes") == ['empire', 'strik']
+    assert analyze('Звёздные войны и люди') == ['звёздн', 'войн', 'люд']
+
+
+def test_bounded_distance():
+    assert bounded_distance('wars', 'wras', 1) == 1
+    assert bounded_distance('star', 'start', 1) == 1
+    assert bounded_distance('star', 'trek', 2) is None
+
+
+def test_index_top_matches_full_ranking(catalog):
+    index = InvertedIndex({'title': 3.0, 'description': 1.0})
+    films = [{**film, 'id': f'{film["id"]}-{i}'} for i in range(20) for film in FILMS]
+    index.add_many(films)
+
+    ranking = index.search('star wars travels', len(films))
+    after = ranking[4][:2]
+
+    assert len(ranking) == 60
+    assert [key[:2] for key in ranking] == sorted(key[:2] for key in ranking)
+    assert index.search('star wars travels', 5) == ranking[:5]
+    assert index.search('star wars travels', 5, after) == ranking[5:10]
+
+
+@pytest.mark.asyncio
+async def test_film_list_by_rating(catalog):
+    repository = MemoryFilmRepository(catalog)
+    params = FilmQueryParams(limit=2, offset=0, sort=FilmSortParams.parse_sort_param('-imdb_rating'), genre=None)
+
+    first = await repository.all(params)
+    second = await repository.all(params.model_copy(update={'cursor': first.next_cursor}))
+
+    assert ids(first) == ['f2', 'f1']
+    assert ids(second) == ['f5', 'f3']
+    assert Cursor.decode(first.next_cursor).search_after == [-8.6, 'f1']
+
+
+@pytest.mark.asyncio
+async def test_film_list_by_genre_ascending(catalog):
+    repository = MemoryFilmRepository(catalog)
+    params = FilmQueryParams(limit=10, offset=0, sort=FilmSortParams.parse_sort_param('imdb_rating'), genre='g2')
+
+    assert ids(await repository.all(params)) == ['f4', 'f5']
+
+
+@pytest.mark.asyncio
+async def test_film_search(catalog):
+    repository = MemoryFilmRepository(catalog)
+
+    assert ids(await repository.search(FilmSearchParams(limit=10, offset=0, query='star wars')))[0] == 'f1'
+    assert ids(await repository.search(FilmSearchParams(limit=10, offset=0, query='strar wras')))[0] == 'f1'
+    assert ids(await repository.search(FilmSearchParams(limit=10, offset=0, query='hamill'))) == ['f1', 'f2']
+    assert ids(await repository.search(FilmSearchParams(limit=10, offset=0, query='войны'))) == ['f5']
+    assert ids(await repository.search(FilmSearchParams(limit=10, offset=0, query='xyz'))) == []
+
+
+@pytest.mark.asyncio
+async def test_film_search_by_cursor(catalog):
+    repository = MemoryFilmRepository(catalog)
+    params = FilmSearchParams(limit=1, offset=0, query='star')
+
+    first = await repository.search(params)
+    rest = await repository.search(params.model_copy(update={'limit': 10, 'cursor': first.next_cursor}))
+
+    found = ids(await repository.search(params.model_copy(update={'limit': 10})))
+    assert ids(first) + ids(rest) == found
+    assert set(found) == {'f1', 'f3', 'f4'}
+
+
+@pytest.mark.asyncio
+async def test_bad_cursor(catalog):
+    repository = MemoryFilmRepository(catalog)
+    sort = FilmSortParams.parse_sort_param('-imdb_rating')
+
+    with pytest.raises(HTTPException):
+        cursor = Cursor(['f1'], None).encode()
+        await repository.search(FilmSearchParams(limit=10, offset=0, query='star', cursor=cursor))
+    with pytest.raises(HTTPException):
+        cursor = Cursor(['f1', 'f2'], None).encode()
+        await repository.all(FilmQueryParams(limit=10, offset=0, cursor=cursor, sort=sort, genre=None))
+
+
+@pytest.mark.asyncio
+async def test_film_autocomplete(catalog):
+    repository = MemoryFilmRepository(catalog)
+
+    suggestions = await repository.autocomplete(AutocompleteParams(prefix='sta', limit=10))
+
+    assert ids(suggestions) == ['f1', 'f3', 'f4']
+
+
+@pytest.mark.asyncio
+async def test_film_facets(catalog):
+    facets = await MemoryFilmRepository(catalog).get_facets(FilmFacetParams(genre='g2'))
+
+    genres = facets['aggregations']['genres']['ids']['buckets']
+    ratings = {bucket['key']: bucket['doc_count'] for bucket in facets['aggregations']['ratings']['buckets']}
+    assert facets['hits']['total']['value'] == 2
+    assert [(bucket['key'], bucket['doc_count']) for bucket in genres] == [('g2', 2), ('g1', 1)]
+    assert ratings[6.0] == 1 and ratings[8.0] == 1 and sum(ratings.values()) == 2
+
+
+@pytest.mark.asyncio
+async def test_genre_and_person_films(catalog):
+    params = BasePaginationParams(limit=10, offset=0)
+
+    assert ids(await MemoryGenreRepository(catalog).get_films('g1', params)) == ['f2', 'f1', 'f5', 'f3']
+    assert ids(await MemoryPersonRepository(catalog).get_films('p2', params)) == ['f2', 'f1']
+    assert await MemoryPersonRepository(catalog).get_films('unknown', params) is None
+
+
+@pytest.mark.asyncio
+async def test_person_search_and_autocomplete(catalog):
+    repository = MemoryPersonRepository(catalog)
+
+    assert ids(await repository.search(PersonSearchParams(limit=10, offset=0, query='lucsa'))) == ['p1']
+    assert ids(await repository.autocomplete(AutocompleteParams(prefix='mar ham', limit=10))) == ['p2']
@@ -0,0 +1,120 @@
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import NotFoundError
+
+from src.cache.managers.redis import RedisCacheManager
+from src.cache.serializers.json import JsonSerializer
+from src.models.base import BasePaginationParams, Cursor, Page
+from src.repositories.elastic import MAX_SHARD_DOC, parse_time_value
+from src.repositories.genre.elastic import ElasticGenreRepository
+
+GENRES = [{'id': genre_id, 'name': genre_id} for genre_id in 'abcde']
+
+
+def make_not_found():
+    meta = ApiResponseMeta(404, '1.1', HttpHeaders(), 0.0, NodeConfig('http', 'localhost', 9200))
+    return NotFoundError('search_context_missing_exception', meta, {})
+
+
+class PitElastic:
+    """ Выдача жанров по id с search_after; записывает открытые и закрытые point-in-time """
+
+    def __init__(self):
+        self.opened = []
+        self.closed = []
+        self.searches = []
+
+    async def open_point_in_time(self, index, keep_alive):
+        self.opened.append((index, keep_alive))
+        return {'id': f'pit-{len(self.opened)}'}
+
+    async def close_point_in_time(self, id):
+        self.closed.append(id)
+        if id == 'expired':
+            raise make_not_found()
+
+    async def search(self, body, filter_path=None, index=None, **kwargs):
+        self.searches.append({'index': index, **body})
+        after = body.get('search_after', [''])[0]
+        genres = [genre for genre in GENRES if genre['id'] > after][body.get('from', 0):][:body['size']]
+        hits = [{'_source': genre, 'sort': [genre['id'], 0] if 'pit' in body else [genre['id']]} for genre in genres]
+        response = {'hits': {'hits': hits}} if hits else {}
+        if 'pit' in body:
+            response['pit_id'] = body['pit']['id']
+        return response
+
+
+async def read_all(repository, limit):
+    pages, cursor = [], None
+    while True:
+        page = await repository.all(BasePaginationParams(limit=limit, offset=0, cursor=cursor))
+        pages.append(page)
+        if not (cursor := page.next_cursor):
+            return pages
+
+
+@pytest.mark.asyncio
+async def test_pit_is_opened_on_first_page_and_closed_on_last():
+    elastic = PitElastic()
+    repository = ElasticGenreRepository(elastic, pit_keep_alive='1m')
+
+    pages = await read_all(repository, 2)
+
+    assert [[hit['_source']['id'] for hit in page] for page in pages] == [['a', 'b'], ['c', 'd'], ['e']]
+    assert elastic.opened == [('genres', '1m')]
+    assert all(search['pit']['id'] == 'pit-1' and search['index'] is None for search in elastic.searches)
+    assert elastic.searches[1]['search_after'] == ['b', 0]
+    assert elastic.closed == ['pit-1']
+    # Страницы с курсором на PIT кэшируются не дольше его keep_alive
+    assert [page.max_age for page in pages] == [60, 60, None]
+    assert Cursor.decode(pages[0].next_cursor).pit_id == 'pit-1'
+
+
+@pytest.mark.asyncio
+async def test_pit_is_not_opened_for_offset_pages_and_without_keep_alive():
+    elastic = PitElastic()
+
+    await ElasticGenreRepository(elastic, pit_keep_alive='1m').all(BasePaginationParams(limit=2, offset=2))
+    page = await ElasticGenreRepository(elastic).all(BasePaginationParams(limit=2, offset=0))
+
+    assert elastic.opened == [] and elastic.closed == []
+    assert 'pit' not in elastic.searches[0] and page.max_age is None
+
+
+@pytest.mark.asyncio
+async def test_closing_expired_pit_is_ignored():
+    elastic = PitElastic()
+    repository = ElasticGenreRepository(elastic, pit_keep_alive='30s')
+    cursor = Cursor(['d', MAX_SHARD_DOC], 'expired').encode()
+
+    page = await repository.all(BasePaginationParams(limit=2, offset=0, cursor=cursor))
+
+    assert [hit['_source']['id'] for hit in page] == ['e'] and page.next_cursor is None
+    assert elastic.closed == ['expired']
+
+
+class TtlRedis:
+    def __init__(self):
+        self.ttls = {}
+
+    async def set(self, key, value, ex=None):
+        self.ttls[key] = ex
+
+
+@pytest.mark.asyncio
+async def test_page_with_pit_is_cached_no_longer_than_keep_alive():
+    redis = TtlRedis()
+    manager = RedisCacheManager(redis, JsonSerializer())
+
+    entry = await manager.set('genres:1', Page([], 'cursor', max_age=30), 300, stale_after=120)
+    await manager.set('genres:2', Page([], 'cursor'), 300, stale_after=120)
+
+    assert redis.ttls == {'genres:1': 30, 'genres:2': 300}
+    assert manager._get_max_age(entry) <= 30
+
+
+def test_parse_time_value():
+    assert parse_time_value('1m') == 60
+    assert parse_time_value('500ms') == 0.5
+    with pytest.raises(ValueError):
+        parse_time_value('1 minute')
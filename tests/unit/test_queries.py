@@ -0,0 +1,326 @@
+import pytest
+from fastapi import HTTPException
+
+from src.models.base import AutocompleteParams, BasePaginationParams, Cursor
+from src.models.film import Film, FilmFacetParams, FilmQueryParams, FilmSearchParams, FilmSortParams
+from src.models.person import PersonSearchParams
+from src.repositories.elastic import SEARCH_FILTER_PATH, get_source_fields
+from src.repositories.film.elastic import ElasticFilmRepository
+from src.repositories.search_profiles import FILM_SEARCH_PROFILES, PERSON_SEARCH_PROFILES
+from src.repositories.genre.elastic import ElasticGenreRepository
+from src.repositories.person.elastic import ElasticPersonRepository
+
+FILM_SOURCE = ('id', 'title', 'imdb_rating')
+FULL_FILM_SOURCE = get_source_fields(Film)
+CACHED = {'request_cache': True, 'preference': 'cinema-api'}
+
+
+class RecordingElastic:
+    """ Запоминает отправленные запросы поиска вместо обращения к Elasticsearch """
+
+    def __init__(self, responses=()):
+        self.requests = []
+        self.responses = list(responses)
+
+    async def search(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses.pop(0) if self.responses else {}
+
+    async def get(self, **kwargs):
+        # Документ без фильмографии: фильмы персоны ищутся запросом по индексу фильмов
+        return {'_source': {}}
+
+
+def make_repository(repository_class, **kwargs):
+    elastic = RecordingElastic()
+    return repository_class(elastic, preference='cinema-api', **kwargs), elastic
+
+
+def genres_filter(genre_id):
+    return {'nested': {'path': 'genres', 'query': {'term': {'genres.id': genre_id}}}}
+
+
+@pytest.mark.asyncio
+async def test_film_list_request():
+    repository, elastic = make_repository(ElasticFilmRepository)
+    params = FilmQueryParams(limit=10, offset=20, sort=FilmSortParams.parse_sort_param('-imdb_rating'), genre='g1')
+
+    await repository.all(params)
+
+    assert elastic.requests == [{
+        'index': 'movies',
+        'body': {
+            'query': {'bool': {'filter': [genres_filter('g1')]}},
+            'size': 10,
+            'sort': [{'imdb_rating': {'order': 'desc'}}, {'id': 'asc'}],
+            '_source': FULL_FILM_SOURCE,
+            'from': 20,
+        },
+        'filter_path': SEARCH_FILTER_PATH,
+        **CACHED,
+    }]
+
+
+@pytest.mark.asyncio
+async def test_film_list_without_filters_request():
+    repository, elastic = make_repository(ElasticFilmRepository)
+
+    await repository.all(FilmQueryParams(limit=10, offset=0, sort=None, genre=None))
+
+    assert elastic.requests[0]['body'] == {
+        'size': 10,
+        'sort': [{'id': 'asc'}],
+        '_source': FULL_FILM_SOURCE,
+        'from': 0,
+    }
+    assert elastic.requests[0]['request_cache'] is True
+
+
+@pytest.mark.asyncio
+async def test_film_search_request():
+    repository, elastic = make_repository(ElasticFilmRepository, search_profile=FILM_SEARCH_PROFILES['fields'])
+
+    await repository.search(FilmSearchParams(limit=10, offset=0, query='star'))
+
+    assert elastic.requests == [{
+        'index': 'movies',
+        'body': {
+            'query': {'bool': {'must': [{
+                'multi_match': {
+                    'query': 'star',
+                    'fields': ['title.raw^5', 'title^3', 'actors_names^2', 'directors_names^2', 'writers_names', 'description^0.5'],
+                    'fuzziness': 'AUTO',
+                    'prefix_length': 1,
+                    'max_expansions': 10,
+                },
+            }]}},
+            'size': 10,
+            'sort': ['_score', {'id': 'asc'}],
+            '_source': FULL_FILM_SOURCE,
+            'from': 0,
+        },
+        'filter_path': SEARCH_FILTER_PATH,
+    }]
+
+
+@pytest.mark.asyncio
+async def test_genre_films_request():
+    repository, elastic = make_repository(ElasticGenreRepository)
+
+    await repository.get_films('g1', BasePaginationParams(limit=10, offset=0))
+
+    assert elastic.requests == [{
+        'index': 'movies',
+        'body': {
+            'query': {'bool': {'filter': [genres_filter('g1')]}},
+            'size': 10,
+            'sort': [{'imdb_rating': {'order': 'desc'}}, {'id': 'asc'}],
+            '_source': FILM_SOURCE,
+            'from': 0,
+        },
+        'filter_path': SEARCH_FILTER_PATH,
+        **CACHED,
+    }]
+
+
+@pytest.mark.asyncio
+async def test_person_films_without_filmography_request():
+    repository, elastic = make_repository(ElasticPersonRepository)
+
+    await repository.get_films('p1', BasePaginationParams(limit=10, offset=0))
+
+    assert elastic.requests[0]['body']['query'] == {
+        'bool': {
+            'filter': [{
+                'bool': {
+                    'should': [
+                        {'nested': {'path': 'actors', 'query': {'term': {'actors.id': 'p1'}}}},
+                        {'nested': {'path': 'directors', 'query': {'term': {'directors.id': 'p1'}}}},
+                        {'nested': {'path': 'writers', 'query': {'term': {'writers.id': 'p1'}}}},
+                    ],
+                    'minimum_should_match': 1,
+                },
+            }],
+        },
+    }
+    # Порядок совпадает с фильмографией из документа персоны: по убыванию рейтинга, затем по id
+    assert elastic.requests[0]['body']['sort'] == [{'imdb_rating': {'order': 'desc'}}, {'id': 'asc'}]
+    assert elastic.requests[0]['preference'] == 'cinema-api'
+
+
+@pytest.mark.asyncio
+async def test_default_search_profile_keeps_previous_query():
+    repository, elastic = make_repository(ElasticFilmRepository)
+
+    await repository.search(FilmSearchParams(limit=10, offset=0, query='star'))
+
+    assert elastic.requests[0]['body']['query'] == {
+        'bool': {'must': [{'multi_match': {'query': 'star', 'fuzziness': 'AUTO', 'prefix_length': 0, 'max_expansions': 50}}]},
+    }
+
+
+@pytest.mark.asyncio
+async def test_person_search_request_is_not_cached():
+    repository, elastic = make_repository(ElasticPersonRepository, search_profile=PERSON_SEARCH_PROFILES['fields'])
+
+    await repository.search(PersonSearchParams(limit=10, offset=0, query='lucas'))
+
+    assert elastic.requests[0]['body']['query'] == {
+        'bool': {'must': [{
+            'multi_match': {
+                'query': 'lucas',
+                'fields': ['name.raw^3', 'name'],
+                'fuzziness': 'AUTO',
+                'prefix_length': 1,
+                'max_expansions': 10,
+            },
+        }]},
+    }
+    assert 'request_cache' not in elastic.requests[0]
+    assert 'preference' not in elastic.requests[0]
+
+
+@pytest.mark.asyncio
+async def test_request_cache_disabled():
+    elastic = RecordingElastic()
+    repository = ElasticGenreRepository(elastic, request_cache=False, preference='cinema-api')
+
+    await repository.all(BasePaginationParams(limit=10, offset=0))
+
+    assert 'request_cache' not in elastic.requests[0]
+    assert 'preference' not in elastic.requests[0]
+
+
+@pytest.mark.asyncio
+async def test_film_autocomplete_request():
+    repository, elastic = make_repository(ElasticFilmRepository)
+
+    await repository.autocomplete(AutocompleteParams(prefix='star wa', limit=5))
+
+    assert elastic.requests == [{
+        'index': 'movies',
+        'body': {
+            'query': {'bool': {'filter': [{'match': {'title.autocomplete': {'query': 'star wa', 'operator': 'and'}}}]}},
+            'size': 5,
+            'sort': [{'imdb_rating': {'order': 'desc'}}, {'id': 'asc'}],
+            '_source': ('id', 'title'),
+            'from': 0,
+        },
+        'filter_path': SEARCH_FILTER_PATH,
+        **CACHED,
+    }]
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_empty_prefix():
+    repository, elastic = make_repository(ElasticPersonRepository)
+
+    assert await repository.autocomplete(AutocompleteParams(prefix='', limit=5)) == []
+    assert elastic.requests == []
+
+
+def get_queries(elastic):
+    return [request['body']['query']['bool']['must'][0]['multi_match'] for request in elastic.requests]
+
+
+@pytest.mark.asyncio
+async def test_exact_first_search_stops_on_exact_hits():
+    hit = {'hits': {'hits': [{'_source': {}, 'sort': [1.0, 'f1']}]}}
+    elastic = RecordingElastic([hit])
+    repository = ElasticFilmRepository(elastic, search_profile=FILM_SEARCH_PROFILES['exact_first'])
+
+    page = await repository.search(FilmSearchParams(limit=10, offset=0, query='star wars'))
+
+    assert len(page) == 1
+    assert get_queries(elastic) == [{
+        'query': 'star wars',
+        'fields': list(FILM_SEARCH_PROFILES['exact_first'].fields),
+        'operator': 'and',
+    }]
+
+
+@pytest.mark.asyncio
+async def test_exact_first_search_falls_back_to_fuzzy():
+    elastic = RecordingElastic()
+    repository = ElasticFilmRepository(elastic, search_profile=FILM_SEARCH_PROFILES['exact_first'])
+
+    await repository.search(FilmSearchParams(limit=10, offset=0, query='star wras'))
+
+    exact, fuzzy = get_queries(elastic)
+    assert exact['operator'] == 'and' and 'fuzziness' not in exact
+    assert fuzzy['fuzziness'] == 'AUTO' and 'operator' not in fuzzy
+
+
+@pytest.mark.asyncio
+async def test_exact_first_search_past_last_exact_page():
+    hit = {'hits': {'hits': [{'_source': {}, 'sort': [1.0, 'f1']}]}}
+    elastic = RecordingElastic([{}, hit])
+    repository = ElasticFilmRepository(elastic, search_profile=FILM_SEARCH_PROFILES['exact_first'])
+
+    page = await repository.search(FilmSearchParams(limit=10, offset=20, query='star wars'))
+
+    assert page == []
+    assert [request['body']['from'] for request in elastic.requests] == [20, 0]
+    assert all('fuzziness' not in query for query in get_queries(elastic))
+
+
+@pytest.mark.asyncio
+async def test_film_facets_request():
+    repository, elastic = make_repository(ElasticFilmRepository)
+
+    await repository.get_facets(FilmFacetParams(genre='g1'))
+
+    assert elastic.requests == [{
+        'index': 'movies',
+        'body': {
+            'query': {'bool': {'filter': [genres_filter('g1')]}},
+            'size': 0,
+            'track_total_hits': True,
+            'aggs': {
+                'genres': {
+                    'nested': {'path': 'genres'},
+                    'aggs': {
+                        'ids': {
+                            'terms': {'field': 'genres.id', 'size': 100},
+                            'aggs': {'name': {'top_hits': {'size': 1, '_source': ['genres.name']}}},
+                        },
+                    },
+                },
+                'ratings': {
+                    'histogram': {
+                        'field': 'imdb_rating',
+                        'interval': 1,
+                        'min_doc_count': 0,
+                        'extended_bounds': {'min': 0, 'max': 10},
+                    },
+                },
+            },
+        },
+        'filter_path': ['hits.total.value', 'aggregations'],
+        **CACHED,
+    }]
+
+
+@pytest.mark.parametrize('search_after, valid', [
+    ([8.1, 'f1'], True),
+    ([8, 'f1', 42], True),
+    (['f1', 8.1], False),
+    ([8.1], False),
+    ([8.1, 'f1', 'shard'], False),
+    ([True, 'f1'], False),
+    ([{'a': 1}, 'f1'], False),
+])
+@pytest.mark.asyncio
+async def test_cursor_must_match_sort(search_after, valid):
+    repository, elastic = make_repository(ElasticFilmRepository)
+    sort = FilmSortParams.parse_sort_param('-imdb_rating')
+    params = FilmQueryParams(limit=10, offset=0, sort=sort, genre=None, cursor=Cursor(search_after, None).encode())
+
+    if valid:
+        await repository.all(params)
+        assert elastic.requests[0]['body']['search_after'] == search_after[:2]
+    else:
+        with pytest.raises(HTTPException) as error:
+            await repository.all(params)
+        assert error.value.status_code == 400
+        assert elastic.requests == []
@@ -0,0 +1,80 @@
+from typing import get_args
+
+import pytest
+from pydantic import BaseModel
+
+from src.cache.cache_manager import SERIALIZERS
+from src.cache.serializers.compressed import CODECS, CompressedSerializer, ZlibCodec
+from src.cache.serializers.format import FormatSerializer
+from src.cache.serializers.json import JsonSerializer
+from src.cache.serializers.msgpack import MsgpackSerializer
+from src.cache.serializers.orjson import OrjsonSerializer
+from src.cache.serializers.response import ResponseSerializer
+from src.core.config import CacheCompressionName, CacheSerializerName
+
+
+class Item(BaseModel):
+    id: str
+    title: str
+
+
+@pytest.mark.parametrize('serializer_class', [JsonSerializer, OrjsonSerializer, MsgpackSerializer])
+def test_serializer_round_trip(serializer_class):
+    item = Item(id='1', title='Звёздные войны')
+    serializer = serializer_class()
+
+    assert serializer.deserialize(serializer.serialize(item), Item) == item
+    assert serializer.deserialize(serializer.serialize([item, item]), Item) == [item, item]
+
+
+def test_response_serializer_keeps_body():
+    serializer = ResponseSerializer()
+    data = serializer.serialize([Item(id='1', title='Star Wars')])
+
+    assert serializer.deserialize(data, Item).body == b'[{"id":"1","title":"Star Wars"}]'
+
+
+def test_format_serializer_reads_other_formats():
+    item = Item(id='1', title='Star Wars')
+    json_data = FormatSerializer(JsonSerializer()).serialize(item)
+    serializer = FormatSerializer(OrjsonSerializer(), readers=[JsonSerializer()], fallback=JsonSerializer())
+
+    assert serializer.serialize(item)[:1] == OrjsonSerializer.format
+    assert serializer.deserialize(serializer.serialize(item), Item) == item
+    assert serializer.deserialize(json_data, Item) == item
+    assert serializer.deserialize(item.json(), Item) == item
+    with pytest.raises(ValueError):
+        FormatSerializer(OrjsonSerializer()).deserialize(json_data, Item)
+
+
+def test_settings_accept_only_registered_formats():
+    assert set(get_args(CacheSerializerName)) == set(SERIALIZERS)
+    assert set(get_args(CacheCompressionName)) == set(CODECS)
+
+
+def test_compressed_serializer():
+    items = [Item(id=str(i), title='Star Wars') for i in range(100)]
+    serializer = CompressedSerializer(OrjsonSerializer(), codec=ZlibCodec(), threshold=100)
+    plain = CompressedSerializer(OrjsonSerializer())
+
+    small, large = serializer.serialize(items[:1]), serializer.serialize(items)
+
+    assert small[:1] == CompressedSerializer.NO_COMPRESSION
+    assert large[:1] == ZlibCodec.marker and len(large) < len(plain.serialize(items))
+    assert serializer.deserialize(large, Item) == items
+    # Сжатые записи читаются и при выключенном сжатии, записи до появления сжатия - без маркера
+    assert plain.deserialize(large, Item) == items
+    assert plain.deserialize(b'{"id": "1", "title": "Star Wars"}', Item) == items[1]
+
+
+@pytest.mark.parametrize('name', list(CODECS))
+def test_codec_round_trip(name):
+    items = [Item(id=str(i), title='Star Wars') for i in range(100)]
+    serializer = CompressedSerializer(FormatSerializer(MsgpackSerializer()), codec=CODECS[name](), threshold=100)
+
+    data = serializer.serialize(items)
+
+    assert data[:1] == CODECS[name].marker
+    assert serializer.deserialize(data, Item) == items
+    # Запись читается и сериализатором с другим кодеком
+    assert CompressedSerializer(FormatSerializer(MsgpackSerializer())).deserialize(data, Item) == items
@@ -0,0 +1,85 @@
+import subprocess
+import sys
+
+import pytest
+from fastapi import FastAPI, Response
+from starlette.requests import Request
+
+from src.cache.warmup import HITS_KEY, CacheWarmer, HitCounter, get_canonical_path
+
+
+class RecordingPipeline:
+    def __init__(self, commands):
+        self.commands = commands
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, *args))
+
+    async def execute(self):
+        return []
+
+
+class RecordingRedis:
+    """ Запоминает команды pipeline вместо обращения к Redis """
+
+    def __init__(self):
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return RecordingPipeline(self.commands)
+
+
+def make_request(query_string):
+    return Request({'type': 'http', 'method': 'GET', 'path': '/api/v1/films', 'query_string': query_string.encode(), 'headers': []})
+
+
+def test_canonical_path():
+    assert get_canonical_path(make_request('sort=-imdb_rating&genre=g1')) == '/api/v1/films?genre=g1&sort=-imdb_rating'
+    assert get_canonical_path(make_request('genre=g1&sort=-imdb_rating&genre=')) == '/api/v1/films?genre=g1&sort=-imdb_rating'
+    assert get_canonical_path(make_request('')) == '/api/v1/films'
+    assert get_canonical_path(make_request('page_size=10&cursor=abc')) is None
+    assert get_canonical_path(make_request('query=star')) is None
+
+
+@pytest.mark.asyncio
+async def test_hit_counter_flushes_in_one_pipeline_and_trims():
+    redis = RecordingRedis()
+    counter = HitCounter(max_size=50, max_pending=2)
+
+    for path in ('/a', '/a', '/b', '/c'):
+        counter.add(path)
+
+    assert await counter.flush(redis) == 2
+    assert redis.commands == [
+        ('zincrby', HITS_KEY, 2, '/a'),
+        ('zincrby', HITS_KEY, 1, '/b'),
+        ('zremrangebyrank', HITS_KEY, 0, -51),
+    ]
+    assert await counter.flush(redis) == 0
+
+
+@pytest.mark.asyncio
+async def test_warmup_report_counts_written_entries():
+    app = FastAPI()
+
+    @app.get('/{status}')
+    async def page(status: str):
+        if status == 'error':
+            return Response(status_code=500)
+        return Response(headers={'X-Cache': status.upper()} if status != 'plain' else {})
+
+    report = await CacheWarmer(app).run(['/miss', '/hit', '/error', '/plain', '/miss'])
+
+    assert (report.total, report.warmed, report.cached, report.failed) == (4, 1, 1, 2)
+
+
+def test_etl_does_not_import_api_app():
+    # Отдельный процесс: в процессе тестов приложение могли уже импортировать другие тесты
+    code = 'import sys, etl.pipeline; sys.exit("src.main" in sys.modules)'
+    assert subprocess.run([sys.executable, '-c', code]).returncode == 0